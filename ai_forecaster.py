@@ -1,17 +1,33 @@
 import pandas as pd
 import numpy as np
-from sqlalchemy import create_engine
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.model_selection import train_test_split
+from sqlalchemy import create_engine, text, inspect
+from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, r2_score
+from sklearn.utils.class_weight import compute_class_weight
 import joblib
 import datetime
 import os
 from dotenv import load_dotenv
 import argparse
-import json
 import sys
-import warnings
+import time
+import tempfile
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+from forest_uncertainty import forest_mean_std, build_quantile_index, forest_quantiles
+from compact_forest import compact_models, measure_model_load
+from forecast_verification import record_forecast
+from forecast_store import save_forecast
+from model_registry import (
+    MODEL_FILE, COMPACT_FILE, get_version_dir, get_current_version, get_current_path, register_models,
+    import_model_files, add_version_file, promote, rollback, list_versions, prune_versions
+)
+from model_engines import (
+    ENGINES, make_classifier, make_regressor, get_model_engine, train_quantile_models, boosting_quantiles,
+    boosting_mean_std
+)
 
 load_dotenv()
 
@@ -21,9 +37,134 @@ DB_HOST = '10.1.1.126'
 DB_NAME = 'weewx'
 
 MODEL_PATH = "/home/dave/projects/weather_predictor/weather_multi_model.pkl"
+COMPACT_MODEL_PATH = "/home/dave/projects/weather_predictor/weather_multi_model_compact.pkl"
+FEATURE_STORE_PATH = "/home/dave/projects/weather_predictor/weather_features.db"
+FEATURE_STORE_VERSION = 2  # Bump when engineer_features changes so the store is rebuilt
 LOOKBACK_HOURS = 48
 FORECAST_HOURS = 24
+FEATURE_WINDOW = 12  # 5-minute samples used for diffs and rolling windows (1 hour)
+FEATURE_RECHECK_SECONDS = 900  # Stored rows this recent are engineered again, as update_conditions stamps conditions late
+PREDICT_LOOKBACK_ROWS = FEATURE_WINDOW * 3  # Window rows plus room to forward-fill short gaps
+LOAD_CHUNK_SIZE = 20000  # Archive rows per chunk read from the server-side cursor when loading history
 MIN_RECORDS_REQUIRED = 500
+TEMP_INTERVAL_QUANTILES = (0.05, 0.95)  # Quantile regression forest bounds for the temperature intervals
+TEMP_TARGETS = ['max_temp_future', 'min_temp_future']  # Output order of a multi-output temperature forest
+TEST_SIZE = 0.2  # Most recent fraction of labeled rows held out for evaluation
+TRAIN_GAP_ROWS = FORECAST_HOURS * 12  # Rows dropped before the test set, whose targets overlap it
+TRAIN_N_JOBS = -1  # Cores used to build each forest's trees (-1 uses all)
+MEMORY_SAMPLE_INTERVAL = 0.05  # Seconds between RSS samples while training
+REFRESH_DAYS = 14  # Days of recent data the trees added by --refresh are fitted on
+REFRESH_NEW_TREES = 15  # Trees added to (and oldest trees retired from) each forest per refresh
+COMPACT_MAX_DEPTH = 20  # Depth compact trees are pruned to
+COMPACT_MAX_TREES = 100  # Trees kept per forest in the compact models
+COMPACT_ACCURACY_TOLERANCE = 0.01  # Largest allowed drop in classification accuracy when compacting
+COMPACT_MAE_TOLERANCE = 0.1  # Largest allowed increase in temperature MAE (°C) when compacting
+HOURLY_HORIZONS = list(range(1, FORECAST_HOURS + 1))  # Hours ahead predicted by the hourly models
+HOURLY_ROW_STRIDE = 12  # Use one training row per hour, as each is repeated for every horizon
+HOURLY_RAIN_THRESHOLD = 0.01  # Inches of rain in an hour (one gauge tip) labeled as Rain
+DEFAULT_ENGINE = 'forest'  # Model backend, see model_engines
+INFERENCE_REPEATS = 20  # Latest-row forecasts timed per engine by --compare-engines
+
+RAW_COLUMNS = [
+    'dateTime', 'pressure', 'outTemp', 'outHumidity', 'windSpeed', 'rain',
+    'lightning_distance', 'lightning_strike_count', 'conditions'
+]
+
+FEATURES = [
+    'pressure', 'pressure_change', 'outTemp', 'temp_change',
+    'outHumidity', 'humidity_change', 'rolling_rain', 'wind_avg',
+    'lightning_last_hour', 'lightning_closest_km',
+    'month', 'day_of_year', 'hour', 'sin_doy', 'cos_doy',
+    'cond_Clear', 'cond_Cloudy', 'cond_Rain', 'cond_Storm'
+]
+
+HOURLY_FEATURES = FEATURES + ['horizon']
+
+# WeatherAPI condition codes and the category each one is one-hot encoded as
+CONDITION_CATEGORIES = {
+    1000: 'Clear', 1003: 'Cloudy', 1006: 'Cloudy', 1009: 'Cloudy', 1030: 'Cloudy',
+    1063: 'Rain', 1066: 'Storm', 1069: 'Rain', 1072: 'Rain', 1087: 'Storm',
+    1114: 'Storm', 1117: 'Storm', 1135: 'Cloudy', 1147: 'Cloudy', 1150: 'Rain',
+    1153: 'Rain', 1168: 'Rain', 1171: 'Rain', 1180: 'Rain', 1183: 'Rain',
+    1186: 'Rain', 1189: 'Rain', 1192: 'Rain', 1195: 'Rain', 1198: 'Rain',
+    1201: 'Rain', 1204: 'Rain', 1207: 'Rain', 1210: 'Rain', 1213: 'Rain',
+    1216: 'Rain', 1219: 'Rain', 1222: 'Rain', 1225: 'Rain', 1237: 'Rain',
+    1240: 'Rain', 1243: 'Rain', 1246: 'Rain', 1249: 'Rain', 1252: 'Rain',
+    1255: 'Rain', 1258: 'Rain', 1261: 'Rain', 1264: 'Rain', 1273: 'Storm',
+    1276: 'Storm', 1279: 'Storm', 1282: 'Rain'
+}
+
+# Compact dtypes for the raw archive columns (dateTime stays int64)
+RAW_DTYPES = {
+    'pressure': 'float32', 'outTemp': 'float32', 'outHumidity': 'float32', 'windSpeed': 'float32',
+    'rain': 'float32', 'lightning_distance': 'float32', 'lightning_strike_count': 'Int32',
+    'conditions': pd.CategoricalDtype(sorted(CONDITION_CATEGORIES))
+}
+
+def get_engine():
+    """Create a SQLAlchemy engine for the weewx database."""
+    return create_engine(f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}')
+
+def prepare_raw_data(df):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Convert raw archive rows to compact dtypes and index them by timestamp.
+    Description:
+        The database driver returns every measurement as float64 and condition codes as
+        float64 or Python objects. Measurements are downcast to float32 (what the forests
+        use internally anyway), lightning strike counts to nullable Int32 and condition
+        codes to a categorical of the known WeatherAPI codes, roughly halving the memory
+        of each row. Every archive query goes through here, so features are computed from
+        the same dtypes whether they are built for training or prediction.
+    Args:
+        df (pandas.DataFrame): Raw archive rows with a dateTime column.
+    Returns:
+        pandas.DataFrame: Raw weather data with timestamp index.
+    Raises:
+        None
+    """
+    df = df.astype({column: dtype for column, dtype in RAW_DTYPES.items() if column in df.columns})
+    df["timestamp"] = pd.to_datetime(df["dateTime"], unit="s")
+    df.set_index("timestamp", inplace=True)
+    return df
+
+def iter_data_chunks(days, chunksize=LOAD_CHUNK_SIZE, engine=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Stream historical weather data from the weewx database in compact chunks.
+    Description:
+        Queries the archive table for the last number of days with stream_results enabled,
+        so the MySQL driver uses a server-side cursor, and yields DataFrames of at most
+        chunksize rows converted by prepare_raw_data. Only one chunk is held in memory at
+        a time, however long the window.
+    Args:
+        days (int): Number of days of historical data to retrieve from the database.
+        chunksize (int): Maximum number of rows per chunk.
+        engine (sqlalchemy.engine.Engine, optional): Engine to query. Defaults to a new
+            engine from get_engine.
+    Yields:
+        pandas.DataFrame: Chunk of raw weather data with timestamp index, in ascending time order.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    query = text(f"""
+        SELECT {', '.join(RAW_COLUMNS)}
+        FROM archive
+        WHERE dateTime > :since
+        ORDER BY dateTime ASC
+    """)
+    with (engine or get_engine()).connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        for chunk in pd.read_sql(query, conn, params={'since': int(time.time() - days * 86400)}, chunksize=chunksize):
+            yield prepare_raw_data(chunk)
 
 def get_data(days):
     """
@@ -37,8 +178,10 @@ def get_data(days):
         Connects to the weewx MySQL database and queries the archive table for weather data
         from the specified number of days ago up to the current time. Extracts key weather
         metrics including pressure, temperature, humidity, wind speed, rainfall, and lightning
-        data. Converts the Unix timestamp to a pandas datetime index for time-series analysis.
-        This function serves as the primary data source for the AI weather forecasting system.
+        data. Rows are streamed in chunks by iter_data_chunks and joined, so the result is
+        held in compact dtypes without a full float64 copy ever being built. Where the whole
+        window isn't needed at once, such as building the feature store, use
+        iter_data_chunks directly.
     Args:
         days (int): Number of days of historical data to retrieve from the database.
     Returns:
@@ -46,57 +189,47 @@ def get_data(days):
     Raises:
         Exception: When database connection fails or query execution errors occur.
     """
-    engine = create_engine(f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}')
-    query = f"""
-        SELECT dateTime, pressure, outTemp, outHumidity, windSpeed, rain,
-               lightning_distance, lightning_strike_count, conditions
-        FROM archive
-        WHERE dateTime > UNIX_TIMESTAMP(NOW() - INTERVAL {days} DAY)
-        ORDER BY dateTime ASC
-    """
-    df = pd.read_sql(query, engine)
-    df["timestamp"] = pd.to_datetime(df["dateTime"], unit="s")
-    df.set_index("timestamp", inplace=True)
-    return df
+    return pd.concat(iter_data_chunks(days))
 
-def engineer_features(df):
+def compute_raw_features(df, window=FEATURE_WINDOW):
     """
     Author:
         David Rogers
     Email:
         dave@djrogers.net.au
     Summary:
-        Create engineered features from raw weather data for machine learning model training.
+        Compute engineered features from raw weather data without filling gaps.
     Description:
-        Transforms raw weather data into features suitable for machine learning by creating
-        derived metrics and temporal features. Calculates pressure, temperature, and humidity
-        changes over 12-hour periods. Computes rolling averages for rainfall and wind speed.
-        Converts lightning distance to kilometers and creates lightning-related features.
-        Adds seasonal and temporal features including month, day of year, hour, and cyclical
-        encoding of day of year using sine and cosine transformations. Handles missing data
-        through forward-fill and dropna operations to ensure data quality for model training.
+        Calculates pressure, temperature, and humidity changes over window samples
+        (FEATURE_WINDOW, 12 five-minute samples or one hour, by default) and rolling
+        rainfall, wind, and lightning windows of the same length. Adds seasonal and
+        temporal features and one-hot encodes the WeatherAPI condition code. Every feature
+        of a row depends only on that row and the window rows before it, which is what
+        lets the feature store compute new rows from a short trailing window. Missing values are left in place; see
+        engineer_features for the forward-fill and cleanup.
     Args:
         df (pandas.DataFrame): Raw weather data DataFrame with timestamp index.
+        window (int): Samples used for diffs and rolling windows.
     Returns:
-        pandas.DataFrame: DataFrame with engineered features ready for model training.
+        pandas.DataFrame: DataFrame with engineered feature columns, possibly containing NaN.
     Raises:
-        None: Function handles data cleaning internally.
+        None
     """
     df = df.copy()
 
-    df['pressure_change'] = df['pressure'].diff(periods=12)
-    df['temp_change'] = df['outTemp'].diff(periods=12)
-    df['humidity_change'] = df['outHumidity'].diff(periods=12)
-    df['rolling_rain'] = df['rain'].rolling(window=12).sum()
-    df['wind_avg'] = df['windSpeed'].rolling(window=12).mean()
+    df['pressure_change'] = df['pressure'].diff(periods=window)
+    df['temp_change'] = df['outTemp'].diff(periods=window)
+    df['humidity_change'] = df['outHumidity'].diff(periods=window)
+    df['rolling_rain'] = df['rain'].rolling(window=window).sum()
+    df['wind_avg'] = df['windSpeed'].rolling(window=window).mean()
 
     df['lightning_distance_km'] = df['lightning_distance'] * 1.60934
     df['lightning_strike'] = df['lightning_strike_count'].fillna(0)
-    df['lightning_last_hour'] = df['lightning_strike'].rolling(window=12, min_periods=1).sum()
+    df['lightning_last_hour'] = df['lightning_strike'].rolling(window=window, min_periods=1).sum()
     df['lightning_closest_km'] = (
         df['lightning_distance_km']
         .where(df['lightning_strike'] > 0)
-        .rolling(window=12, min_periods=1)
+        .rolling(window=window, min_periods=1)
         .min()
         .fillna(1000)
     )
@@ -108,21 +241,9 @@ def engineer_features(df):
     df['cos_doy'] = np.cos(2 * np.pi * df['day_of_year'] / 365.25)
 
     # Map conditions code to category and one-hot encode
-    code_to_category = {
-        1000: 'Clear', 1003: 'Cloudy', 1006: 'Cloudy', 1009: 'Cloudy', 1030: 'Cloudy',
-        1063: 'Rain', 1066: 'Storm', 1069: 'Rain', 1072: 'Rain', 1087: 'Storm',
-        1114: 'Storm', 1117: 'Storm', 1135: 'Cloudy', 1147: 'Cloudy', 1150: 'Rain',
-        1153: 'Rain', 1168: 'Rain', 1171: 'Rain', 1180: 'Rain', 1183: 'Rain',
-        1186: 'Rain', 1189: 'Rain', 1192: 'Rain', 1195: 'Rain', 1198: 'Rain',
-        1201: 'Rain', 1204: 'Rain', 1207: 'Rain', 1210: 'Rain', 1213: 'Rain',
-        1216: 'Rain', 1219: 'Rain', 1222: 'Rain', 1225: 'Rain', 1237: 'Rain',
-        1240: 'Rain', 1243: 'Rain', 1246: 'Rain', 1249: 'Rain', 1252: 'Rain',
-        1255: 'Rain', 1258: 'Rain', 1261: 'Rain', 1264: 'Rain', 1273: 'Storm',
-        1276: 'Storm', 1279: 'Storm', 1282: 'Rain'
-    }
     if 'conditions' in df.columns:
-        df['condition_cat'] = df['conditions'].map(code_to_category)
-        condition_dummies = pd.get_dummies(df['condition_cat'], prefix='cond')
+        df['condition_cat'] = df['conditions'].map(CONDITION_CATEGORIES)
+        condition_dummies = pd.get_dummies(df['condition_cat'], prefix='cond').astype(int)
         for col in ['cond_Clear', 'cond_Cloudy', 'cond_Rain', 'cond_Storm']:
             if col not in condition_dummies:
                 condition_dummies[col] = 0
@@ -132,9 +253,570 @@ def engineer_features(df):
         for col in ['cond_Clear', 'cond_Cloudy', 'cond_Rain', 'cond_Storm']:
             df[col] = 0
 
+    return df
+
+def engineer_features(df, window=FEATURE_WINDOW):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Create engineered features from raw weather data for machine learning model training.
+    Description:
+        Transforms raw weather data into features suitable for machine learning using
+        compute_raw_features, which creates pressure, temperature, and humidity changes,
+        rolling rainfall, wind, and lightning windows, and seasonal and temporal features.
+        Handles missing data through forward-fill and dropna operations to ensure data
+        quality for model training.
+    Args:
+        df (pandas.DataFrame): Raw weather data DataFrame with timestamp index.
+        window (int): Samples used for diffs and rolling windows.
+    Returns:
+        pandas.DataFrame: DataFrame with engineered features ready for model training.
+    Raises:
+        None: Function handles data cleaning internally.
+    """
+    df = compute_raw_features(df, window)
     df = df.ffill().dropna()
     return df
 
+def engineer_feature_chunks(chunks, window=FEATURE_WINDOW):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Engineer features chunk by chunk as raw data streams in.
+    Description:
+        Gives the same rows as engineer_features on the whole window, one chunk at a time.
+        Each raw chunk is prefixed with the last window raw rows of the chunk before it,
+        which is all the history its diffs and rolling windows look at, and its features
+        are forward-filled from the last forward-filled row of the chunk before it. Memory
+        therefore depends on the chunk size rather than the length of the window.
+    Args:
+        chunks (iterable): Raw weather data chunks in ascending time order, e.g. from
+            iter_data_chunks.
+        window (int): Samples used for diffs and rolling windows.
+    Yields:
+        pandas.DataFrame: Engineered features for each chunk, skipping chunks left empty.
+    Raises:
+        None
+    """
+    trailing = None
+    seed = None
+    for raw in chunks:
+        if trailing is not None:
+            raw = pd.concat([trailing, raw])
+        features = compute_raw_features(raw, window).iloc[len(trailing) if trailing is not None else 0:]
+        trailing = raw.iloc[-window:]
+        if features.empty:
+            continue
+        filled = pd.concat([seed, features]).ffill().iloc[1:] if seed is not None else features.ffill()
+        seed = filled.iloc[-1:]
+        df = filled.dropna()
+        if not df.empty:
+            yield df
+
+def open_feature_store():
+    """Create a SQLAlchemy engine for the local SQLite feature store."""
+    os.makedirs(os.path.dirname(FEATURE_STORE_PATH), exist_ok=True)
+    return create_engine(f'sqlite:///{FEATURE_STORE_PATH}')
+
+def get_store_bounds(store):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the first and last dateTime held in the feature store.
+    Description:
+        Returns (None, None) when the store is empty, hasn't been created yet, or was built
+        by a different FEATURE_STORE_VERSION or FEATURE_WINDOW, which tells the caller it
+        needs to be rebuilt.
+    Args:
+        store (sqlalchemy.engine.Engine): Feature store engine from open_feature_store.
+    Returns:
+        tuple: (first, last) Unix timestamps, or (None, None).
+    Raises:
+        Exception: When the store can't be read.
+    """
+    tables = inspect(store).get_table_names()
+    if 'features' not in tables or 'store_meta' not in tables:
+        return None, None
+    with store.connect() as conn:
+        meta = dict(conn.execute(text("SELECT key, value FROM store_meta")).fetchall())
+        if meta.get('version') != str(FEATURE_STORE_VERSION) or meta.get('window') != str(FEATURE_WINDOW):
+            return None, None
+        first, last = conn.execute(text("SELECT MIN(dateTime), MAX(dateTime) FROM features")).one()
+    return first, last
+
+def write_features(store, df, replace=False, after=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Write engineered feature rows to the feature store.
+    Description:
+        Appends rows to the features table, or replaces the table and its metadata when
+        rebuilding. Rows after a given time can be deleted first, to be replaced by the rows
+        written. The write happens in a single transaction, so a crash mid-update leaves
+        the store at its previous state rather than with a partial batch of rows.
+    Args:
+        store (sqlalchemy.engine.Engine): Feature store engine from open_feature_store.
+        df (pandas.DataFrame): Engineered features with timestamp index and dateTime column.
+        replace (bool): Whether to replace the existing table instead of appending.
+        after (int, optional): Delete stored rows with dateTime after this Unix timestamp first.
+    Returns:
+        None
+    Raises:
+        Exception: When the store can't be written.
+    """
+    with store.begin() as conn:
+        if replace:
+            conn.execute(text("DROP TABLE IF EXISTS features"))
+            conn.execute(text("DROP TABLE IF EXISTS store_meta"))
+            conn.execute(text("CREATE TABLE store_meta (key TEXT PRIMARY KEY, value TEXT)"))
+            conn.execute(
+                text("INSERT INTO store_meta (key, value) VALUES ('version', :version), ('window', :window)"),
+                {'version': str(FEATURE_STORE_VERSION), 'window': str(FEATURE_WINDOW)}
+            )
+        elif after is not None:
+            conn.execute(text("DELETE FROM features WHERE dateTime > :after"), {'after': int(after)})
+        df.to_sql('features', conn, if_exists='append', index=False)
+        if replace:
+            conn.execute(text("CREATE UNIQUE INDEX idx_features_dateTime ON features (dateTime)"))
+
+def read_features(store, since=None, rows=None, until=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Read engineered feature rows from the feature store.
+    Description:
+        Reads either every row after a given time or just the most recent rows, using the
+        dateTime index, and restores the timestamp index used throughout the forecaster.
+    Args:
+        store (sqlalchemy.engine.Engine): Feature store engine from open_feature_store.
+        since (int, optional): Only return rows with dateTime after this Unix timestamp.
+        rows (int, optional): Only return this many of the most recent rows.
+        until (int, optional): With rows, only count rows with dateTime up to this Unix timestamp.
+    Returns:
+        pandas.DataFrame: Engineered features in ascending time order.
+    Raises:
+        Exception: When the store can't be read.
+    """
+    if rows is not None:
+        condition = "WHERE dateTime <= :until " if until is not None else ""
+        query = text(f"SELECT * FROM (SELECT * FROM features {condition}ORDER BY dateTime DESC LIMIT :rows) ORDER BY dateTime ASC")
+        params = {'rows': rows, 'until': until}
+    else:
+        query = text("SELECT * FROM features WHERE dateTime > :since ORDER BY dateTime ASC")
+        params = {'since': since or 0}
+    with store.connect() as conn:
+        df = pd.read_sql(query, conn, params=params)
+    df["timestamp"] = pd.to_datetime(df["dateTime"], unit="s")
+    df.set_index("timestamp", inplace=True)
+    return df
+
+def get_rows_after(engine, last_datetime):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Retrieve new archive rows plus the trailing rows needed to compute their features.
+    Description:
+        Fetches every archive row after last_datetime together with the FEATURE_WINDOW rows
+        at or before it. Diffs and rolling windows only look back FEATURE_WINDOW rows, so
+        this is all the raw history needed to engineer features for the new rows.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for the weewx database.
+        last_datetime (int): Unix timestamp of the last row already in the feature store.
+    Returns:
+        pandas.DataFrame: Raw weather data with timestamp index in ascending time order.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    columns = ', '.join(RAW_COLUMNS)
+    params = {'last': int(last_datetime), 'window': FEATURE_WINDOW}
+    with engine.connect() as conn:
+        trailing = pd.read_sql(
+            text(f"SELECT {columns} FROM archive WHERE dateTime <= :last ORDER BY dateTime DESC LIMIT :window"),
+            conn, params=params
+        )
+        new = pd.read_sql(
+            text(f"SELECT {columns} FROM archive WHERE dateTime > :last ORDER BY dateTime ASC"),
+            conn, params=params
+        )
+    return prepare_raw_data(pd.concat([trailing.iloc[::-1], new], ignore_index=True))
+
+def update_feature_store(days, rebuild=False):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Bring the persistent feature store up to date with the archive.
+    Description:
+        Keeps engineered features in a local SQLite store keyed by dateTime so they don't
+        have to be recomputed on every run. If the store is missing, outdated, doesn't
+        reach back the requested number of days, or a rebuild is requested, it is rebuilt
+        from the full window, streamed and written a chunk at a time so memory doesn't grow
+        with the number of days. If a rebuild is interrupted, the next update carries on
+        from the last chunk written. Otherwise only archive rows newer than the last stored row
+        are fetched, along with the FEATURE_WINDOW trailing rows they depend on. Their raw
+        features are computed, forward-filled from the last stored row, and appended, which
+        gives exactly the same values as recomputing the whole window. The stored rows from
+        the last FEATURE_RECHECK_SECONDS are engineered again and replaced along with them,
+        as update_conditions may have stamped their conditions since they were stored.
+    Args:
+        days (int): Number of days of history the store should cover.
+        rebuild (bool): Whether to rebuild the store from scratch.
+    Returns:
+        int: Number of rows added to the store (not counting rows replaced).
+    Raises:
+        Exception: When database or feature store operations fail.
+    """
+    store = open_feature_store()
+    first, last = (None, None) if rebuild else get_store_bounds(store)
+    since = time.time() - days * 86400
+
+    if last is None or first > since + 86400:
+        added = 0
+        for df in engineer_feature_chunks(iter_data_chunks(days)):
+            write_features(store, df, replace=added == 0)
+            added += len(df)
+        return added
+
+    recheck = last - FEATURE_RECHECK_SECONDS
+    raw = get_rows_after(get_engine(), recheck)
+    features = compute_raw_features(raw)
+    new = features[features['dateTime'] > recheck]
+    if new.empty:
+        return 0
+
+    # Seed the forward-fill with the last stored row kept so gaps are filled exactly as in a full rebuild
+    seed = read_features(store, rows=1, until=recheck)[new.columns]
+    df = pd.concat([seed, new]).ffill().iloc[len(seed):].dropna()
+    write_features(store, df, after=recheck)
+    return int((df['dateTime'] > last).sum())
+
+def discard_features_since(since):
+    """Delete feature store rows from since on, so the next update_feature_store engineers them again."""
+    store = open_feature_store()
+    if 'features' not in inspect(store).get_table_names():
+        return 0
+    with store.begin() as conn:
+        return conn.execute(text("DELETE FROM features WHERE dateTime >= :since"), {'since': int(since)}).rowcount
+
+def load_features(days=None, rows=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Load engineered features from the feature store for training or prediction.
+    Description:
+        Returns either the last number of days of features (for training) or just the most
+        recent rows (for prediction), without touching the weewx database.
+    Args:
+        days (int, optional): Number of days of features to load.
+        rows (int, optional): Number of most recent rows to load.
+    Returns:
+        pandas.DataFrame: Engineered features with timestamp index.
+    Raises:
+        Exception: When the feature store can't be read.
+    """
+    since = int(time.time() - days * 86400) if days is not None else None
+    return read_features(open_feature_store(), since=since, rows=rows)
+
+def get_latest_rows(rows=PREDICT_LOOKBACK_ROWS, engine=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Retrieve only the most recent archive rows needed to predict from the latest sample.
+    Description:
+        Features for the latest sample depend on at most FEATURE_WINDOW trailing 5-minute
+        samples, so prediction doesn't need the full training window. Fetches the last
+        few rows with an indexed ORDER BY ... LIMIT query instead of days of history.
+    Args:
+        rows (int): Number of most recent rows to fetch.
+        engine (sqlalchemy.engine.Engine, optional): Engine to query. Defaults to a new
+            engine from get_engine.
+    Returns:
+        pandas.DataFrame: Raw weather data with timestamp index in ascending time order.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    query = text(f"SELECT {', '.join(RAW_COLUMNS)} FROM archive ORDER BY dateTime DESC LIMIT :rows")
+    with (engine or get_engine()).connect() as conn:
+        df = pd.read_sql(query, conn, params={'rows': rows})
+    return prepare_raw_data(df.iloc[::-1])
+
+def engineer_latest_features(df):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Engineer the feature row for the latest sample in a short window of raw data.
+    Description:
+        Computes features over the window, forward-fills short gaps and returns the last
+        row that has every model feature. Unlike engineer_features, rows are only dropped
+        for missing model features, so a NULL in an unused column such as
+        lightning_distance doesn't discard the latest sample.
+    Args:
+        df (pandas.DataFrame): Raw weather data from get_latest_rows.
+    Returns:
+        pandas.DataFrame: Single-row DataFrame of features, or an empty DataFrame.
+    Raises:
+        None
+    """
+    df = compute_raw_features(df)
+    df = df.ffill().dropna(subset=FEATURES)
+    return df.tail(1)
+
+def get_model_path():
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Choose the model file to load for prediction.
+    Description:
+        Uses the version promoted in the model registry, preferring its compact models
+        when export_compact_models has added them. The path returned is inside the
+        version's directory, so it changes whenever another version is promoted.
+        Before any version has been registered, falls back to the files saved before the
+        registry existed: the compact models, as long as they are at least as new as the
+        full models, or MODEL_PATH.
+    Args:
+        None
+    Returns:
+        str: Path of the model file to load.
+    Raises:
+        None
+    """
+    version = get_current_version()
+    if version is not None:
+        compact_path = os.path.join(get_version_dir(version), COMPACT_FILE)
+        return compact_path if os.path.exists(compact_path) else os.path.join(get_version_dir(version), MODEL_FILE)
+    try:
+        if os.path.getmtime(COMPACT_MODEL_PATH) >= os.path.getmtime(MODEL_PATH):
+            return COMPACT_MODEL_PATH
+    except OSError:
+        if os.path.exists(COMPACT_MODEL_PATH):
+            return COMPACT_MODEL_PATH
+    return MODEL_PATH
+
+def get_full_model_path():
+    """Return the path of the served full (not compact) models, falling back to MODEL_PATH before the registry is used."""
+    return get_current_path() or MODEL_PATH
+
+def load_models(path=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Load the trained forecast models from disk.
+    Description:
+        Loads the model dictionary saved by train_model or export_compact_models and
+        checks it contains every model needed for prediction. Compact models are
+        memory-mapped, so loading them doesn't read the tree arrays up front.
+    Args:
+        path (str, optional): Path of the saved model file. Defaults to get_model_path().
+    Returns:
+        dict: Dictionary containing the trained machine learning models.
+    Raises:
+        ValueError: When the model file is outdated.
+        Exception: When the model file is missing or can't be loaded.
+    """
+    path = path or get_model_path()
+    compact = path == COMPACT_MODEL_PATH or os.path.basename(path) == COMPACT_FILE
+    models = joblib.load(path, mmap_mode='r' if compact else None)
+    if 'wind' not in models:
+        raise ValueError("Model file is outdated — missing 'wind' model.")
+    return models
+
+def save_models(models, path=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Save the trained forecast models to disk atomically.
+    Description:
+        Dumps the model dictionary to a temporary file next to the model file and
+        renames it into place, so a process watching the model file (such as the web
+        app's live forecast) never loads a half-written file.
+    Args:
+        models (dict): Dictionary of trained models.
+        path (str, optional): Path of the model file. Defaults to MODEL_PATH.
+    Returns:
+        None
+    Raises:
+        Exception: When the model file can't be written.
+    """
+    path = path or MODEL_PATH
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(models, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def import_legacy_models():
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Bring the models saved before the model registry existed into it.
+    Description:
+        When nothing has been promoted yet and MODEL_PATH exists, registers it (with the
+        compact models at COMPACT_MODEL_PATH if they were exported from it) as a version
+        and promotes it, so refreshes, compact exports and rollbacks work from the start.
+    Args:
+        None
+    Returns:
+        str: The version imported, or None when there was nothing to import.
+    Raises:
+        Exception: When the files can't be registered.
+    """
+    if get_current_version() is not None or not os.path.exists(MODEL_PATH):
+        return None
+    compact_path = None
+    if os.path.exists(COMPACT_MODEL_PATH) and os.path.getmtime(COMPACT_MODEL_PATH) >= os.path.getmtime(MODEL_PATH):
+        compact_path = COMPACT_MODEL_PATH
+    version = import_model_files(MODEL_PATH, compact_path, {'source': 'legacy', 'imported_from': MODEL_PATH})
+    promote(version)
+    return version
+
+def get_version_metadata(source, df, report, **details):
+    """Return the registry metadata shared by retrained and refreshed models, plus any details."""
+    peaks = [entry['peak_rss_mb'] for entry in report if entry['peak_rss_mb'] is not None]
+    return {
+        'source': source,
+        'window': {
+            'start': df.index[0].isoformat(),
+            'end': df.index[-1].isoformat(),
+            'days': round((df.index[-1] - df.index[0]).total_seconds() / 86400, 1),
+            'rows': len(df)
+        },
+        'features': FEATURES,
+        'feature_window': FEATURE_WINDOW,
+        'feature_store_version': FEATURE_STORE_VERSION,
+        'training_seconds': round(sum(entry['seconds'] for entry in report), 2),
+        'peak_rss_mb': round(max(peaks), 1) if peaks else None,
+        **details
+    }
+
+def format_scores(scores):
+    """Convert evaluate_models scores to {model: {metric: value}} for the registry metadata."""
+    return {name: {metric: round(float(value), 4)} for name, (metric, value) in scores.items()}
+
+def save_model_version(models, metadata, promote_version=True):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Save models as a new registry version and promote it.
+    Description:
+        Registers the models with their metadata, promotes the new version unless told not
+        to (it can be promoted later with --promote), and prunes old versions.
+    Args:
+        models (dict): Dictionary of trained models.
+        metadata (dict): Metadata from get_version_metadata.
+        promote_version (bool): Whether to start serving the new version.
+    Returns:
+        str: The new version name.
+    Raises:
+        Exception: When the version can't be saved.
+    """
+    version = register_models(models, metadata)
+    print(f"\nModels saved as version {version}")
+    if promote_version:
+        promote(version)
+        print(f"Promoted model version {version}")
+    deleted = prune_versions()
+    if deleted:
+        print(f"Removed old model versions: {', '.join(deleted)}")
+    return version
+
+def print_model_versions():
+    """Print the registered model versions with their main metadata, marking the current one."""
+    current = get_current_version()
+    print(f"  {'Version':<17} {'Created':<19} {'Source':<8} {'Engine':<6} {'Days':>5} {'Rows':>7} "
+          f"{'Weather':>7} {'Max MAE':>7} {'Train s':>8} {'Size MB':>8}")
+    for entry in list_versions():
+        metrics = entry.get('metrics') or {}
+        weather = metrics.get('weather', {}).get('accuracy')
+        max_mae = (metrics.get('max_temp') or metrics.get('temp') or {}).get('mae')
+        window = entry.get('window', {})
+        size = sum(entry.get('size_bytes', {}).values()) / 2**20
+        training = entry.get('training_seconds')
+        print(f"{'*' if entry['version'] == current else ' '} {entry['version']:<17} {entry.get('created', ''):<19} "
+              f"{entry.get('source', ''):<8} {entry.get('engine', ''):<6} {window.get('days', ''):>5} "
+              f"{window.get('rows', ''):>7} {weather if weather is not None else '':>7} "
+              f"{max_mae if max_mae is not None else '':>7} {training if training is not None else '':>8} {size:>8.1f}")
+
+def classify_conditions(rain, wind, humidity, temp_var, lightning_count, lightning_km, rain_threshold):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Classify weather observations as Storm, Rain, Cloudy or Clear.
+    Description:
+        Applies the labeling rules shared by the daily and hourly targets: storms require
+        heavy rain with strong wind or nearby lightning, rain requires more than
+        rain_threshold of precipitation, and cloudy conditions are identified by high
+        humidity with low temperature variability.
+    Args:
+        rain (pandas.Series): Rainfall in inches.
+        wind (pandas.Series): Wind speed in mph.
+        humidity (pandas.Series): Relative humidity in percent.
+        temp_var (pandas.Series): Rolling standard deviation of temperature.
+        lightning_count (pandas.Series): Lightning strikes in the last hour.
+        lightning_km (pandas.Series): Closest lightning strike in the last hour in km.
+        rain_threshold (float): Rainfall above which a row is labeled Rain.
+    Returns:
+        numpy.ndarray: Condition labels.
+    Raises:
+        None
+    """
+    conditions = [
+        ((rain > 2) & (wind > 20)) |
+        ((lightning_count > 1) & (lightning_km < 15)),
+        (rain > rain_threshold),
+        (humidity > 80) & (temp_var < 1.0),
+    ]
+    choices = ['Storm', 'Rain', 'Cloudy']
+    return np.select(conditions, choices, default='Clear')
+
 def label_weather(df):
     """
     Author:
@@ -154,6 +836,8 @@ def label_weather(df):
         activity, rain requires measurable precipitation, cloudy conditions are identified
         by high humidity and low temperature variability. Filters out records with missing
         labels and ensures minimum data requirements are met for model training.
+        Also adds hourly_label_<h> and hourly_temp_<h> targets for each hour ahead in
+        HOURLY_HORIZONS, labeling the hour ending h hours ahead with the same rules.
     Args:
         df (pandas.DataFrame): DataFrame with engineered features and weather data.
     Returns:
@@ -173,14 +857,20 @@ def label_weather(df):
     df['max_temp_future'] = df['outTemp'].rolling(window=FORECAST_HOURS * 12).max().shift(-FORECAST_HOURS * 12)
     df['min_temp_future'] = df['outTemp'].rolling(window=FORECAST_HOURS * 12).min().shift(-FORECAST_HOURS * 12)
 
-    conditions = [
-        ((rain_future > 2) & (wind_future > 20)) |
-        ((lightning_last_hour > 1) & (lightning_closest_km < 15)),
-        (rain_future > 0.2),
-        (humidity_now > 80) & (temp_var < 1.0),
-    ]
-    choices = ['Storm', 'Rain', 'Cloudy']
-    df['label'] = np.select(conditions, choices, default='Clear')
+    df['label'] = classify_conditions(rain_future, wind_future, humidity_now, temp_var,
+                                      lightning_last_hour, lightning_closest_km, rain_threshold=0.2)
+
+    # Hourly targets: the condition over the hour ending, and the temperature, h hours ahead
+    hourly_conditions = pd.Series(
+        classify_conditions(df['rolling_rain'], df['wind_avg'], humidity_now, temp_var,
+                            lightning_last_hour, lightning_closest_km, rain_threshold=HOURLY_RAIN_THRESHOLD),
+        index=df.index
+    )
+    hourly_targets = {}
+    for h in HOURLY_HORIZONS:
+        hourly_targets[f'hourly_label_{h}'] = hourly_conditions.shift(-h * 12)
+        hourly_targets[f'hourly_temp_{h}'] = df['outTemp'].shift(-h * 12)
+    df = pd.concat([df, pd.DataFrame(hourly_targets, index=df.index)], axis=1)
 
     df['wind_label'] = pd.cut(
         df['wind_avg'],
@@ -196,7 +886,179 @@ def label_weather(df):
 
     return df
 
-def train_model(df):
+def get_rss_bytes():
+    """Return the resident set size of this process in bytes, or None where /proc isn't available."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+@contextmanager
+def measure_training(name, report):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Measure the wall time and peak memory of training one model.
+    Description:
+        Samples the process's resident set size on a background thread every
+        MEMORY_SAMPLE_INTERVAL seconds while the block runs, and appends the elapsed
+        time, peak RSS and the increase over the RSS at the start to the report list.
+        Memory figures are None on platforms without /proc.
+    Args:
+        name (str): Model name for the report.
+        report (list): List the measurement dictionary is appended to.
+    Returns:
+        None
+    Raises:
+        None
+    """
+    start_rss = get_rss_bytes()
+    peak = [start_rss]
+    stop = threading.Event()
+
+    def sample():
+        while not stop.wait(MEMORY_SAMPLE_INTERVAL):
+            peak[0] = max(peak[0], get_rss_bytes() or 0)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    if start_rss is not None:
+        sampler.start()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stop.set()
+        if start_rss is not None:
+            sampler.join()
+            peak[0] = max(peak[0], get_rss_bytes() or 0)
+        report.append({
+            'model': name,
+            'seconds': elapsed,
+            'peak_rss_mb': peak[0] / 2**20 if start_rss is not None else None,
+            'rss_increase_mb': (peak[0] - start_rss) / 2**20 if start_rss is not None else None
+        })
+
+def print_training_report(report):
+    """Print the training time and peak memory of each model as a table."""
+    print("\nTraining Cost:")
+    print(f"{'Model':<12} {'Time (s)':>9} {'Peak RSS (MB)':>14} {'Increase (MB)':>14}")
+    for entry in report:
+        peak = f"{entry['peak_rss_mb']:.1f}" if entry['peak_rss_mb'] is not None else 'n/a'
+        increase = f"{entry['rss_increase_mb']:.1f}" if entry['rss_increase_mb'] is not None else 'n/a'
+        print(f"{entry['model']:<12} {entry['seconds']:>9.2f} {peak:>14} {increase:>14}")
+
+def split_time_ordered(df, test_size=TEST_SIZE, gap_rows=TRAIN_GAP_ROWS):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Split labeled data into training and test sets by time.
+    Description:
+        Uses the oldest rows for training and the most recent test_size fraction for
+        testing, so the models are evaluated on data from after everything they were
+        trained on. The gap_rows training rows just before the test period are dropped,
+        because their 24 hour targets overlap the test period.
+    Args:
+        df (pandas.DataFrame): Labeled DataFrame in time order.
+        test_size (float): Fraction of rows to hold out for testing.
+        gap_rows (int): Number of rows dropped between the training and test sets.
+    Returns:
+        tuple: (train, test) DataFrames.
+    Raises:
+        None
+    """
+    df = df.sort_index()
+    split = int(len(df) * (1 - test_size))
+    return df.iloc[:max(split - gap_rows, 0)], df.iloc[split:]
+
+def stack_horizons(df, horizons=HOURLY_HORIZONS):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Stack feature rows once per forecast horizon for the hourly models.
+    Description:
+        Repeats each row's FEATURES once for every horizon and adds the horizon in hours
+        as a feature, so one model covers all hours ahead and every horizon for a row can
+        be predicted in a single batched call. Rows are ordered row by row, then horizon.
+    Args:
+        df (pandas.DataFrame): DataFrame with the FEATURES columns.
+        horizons (list): Hours ahead to stack.
+    Returns:
+        pandas.DataFrame: Stacked features with the HOURLY_FEATURES columns.
+    Raises:
+        None
+    """
+    stacked = pd.DataFrame(np.repeat(df[FEATURES].to_numpy(dtype=float), len(horizons), axis=0), columns=FEATURES)
+    stacked['horizon'] = np.tile(horizons, len(df))
+    return stacked
+
+def stack_hourly_targets(df, prefix, horizons=HOURLY_HORIZONS):
+    """Return the hourly targets with the given prefix in the row order of stack_horizons."""
+    return df[[f'{prefix}_{h}' for h in horizons]].to_numpy().ravel()
+
+def train_hourly_models(train, test, report, engine=DEFAULT_ENGINE):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Train the hourly condition classifier and temperature regressor.
+    Description:
+        Takes one training row per hour (HOURLY_ROW_STRIDE) and stacks it for every
+        horizon from +1h to +24h, with the condition and temperature h hours ahead as
+        targets. Evaluates both models on the stacked test rows, reporting condition
+        accuracy and temperature mean absolute error at a few horizons. With the 'hgb'
+        engine, temperature quantile regressors are trained for the error margins.
+    Args:
+        train (pandas.DataFrame): Labeled training rows from split_time_ordered.
+        test (pandas.DataFrame): Labeled test rows from split_time_ordered.
+        report (list): Training cost report that measurements are appended to.
+        engine (str): Model backend, one of model_engines.ENGINES.
+    Returns:
+        dict: Dictionary with the 'hourly_condition' and 'hourly_temp' models, and
+            'hourly_temp_quantiles' for the 'hgb' engine.
+    Raises:
+        Exception: When model training fails.
+    """
+    train = train.iloc[::HOURLY_ROW_STRIDE]
+    test = test.iloc[::HOURLY_ROW_STRIDE]
+    X_train, X_test = stack_horizons(train), stack_horizons(test)
+    horizons = X_test['horizon'].to_numpy()
+
+    models = {}
+    with measure_training('hourly_cond', report):
+        condition_model = make_classifier(engine, n_jobs=TRAIN_N_JOBS)
+        condition_model.fit(X_train, stack_hourly_targets(train, 'hourly_label'))
+        models['hourly_condition'] = condition_model
+    with measure_training('hourly_temp', report):
+        temp_model = make_regressor(engine, n_jobs=TRAIN_N_JOBS)
+        temp_model.fit(X_train, stack_hourly_targets(train, 'hourly_temp'))
+        models['hourly_temp'] = temp_model
+        if engine == 'hgb':
+            models['hourly_temp_quantiles'] = train_quantile_models(
+                X_train, stack_hourly_targets(train, 'hourly_temp'), TEMP_INTERVAL_QUANTILES)
+
+    condition_hits = condition_model.predict(X_test) == stack_hourly_targets(test, 'hourly_label')
+    temp_errors = np.abs(temp_model.predict(X_test) - stack_hourly_targets(test, 'hourly_temp')) * 5/9
+    print("\nHourly Models Performance:")
+    for h in (1, 3, 6, 12, 24):
+        print(f"+{h}h: condition accuracy {condition_hits[horizons == h].mean():.3f}, "
+              f"temperature MAE {temp_errors[horizons == h].mean():.2f}°C")
+
+    return models
+
+def train_model(df, multi_output_temp=False, engine=DEFAULT_ENGINE, save=True, promote_version=True):
     """
     Author:
         David Rogers
@@ -205,73 +1067,534 @@ def train_model(df):
     Summary:
         Train multiple machine learning models for weather, wind, and temperature prediction.
     Description:
-        Trains four separate machine learning models using Random Forest algorithms:
+        Trains four separate machine learning models, using Random Forest algorithms or,
+        with the 'hgb' engine, histogram gradient boosting (see model_engines):
         1. Weather condition classifier (Clear, Cloudy, Rain, Storm)
         2. Wind condition classifier (Calm, Light Breeze, Stiff Breeze, Windy, High Winds)
         3. Maximum temperature regressor
         4. Minimum temperature regressor
         
+        The hourly condition and temperature models for +1h to +24h are also trained
+        (see train_hourly_models).
+        
+        With multi_output_temp, the maximum and minimum temperatures are instead
+        trained as one multi-output forest, which shares its trees between both targets.
+        Gradient boosting can't predict several outputs, so this is forest only.
+        
         Uses engineered features including pressure changes, temperature trends, humidity
         patterns, rainfall accumulation, wind averages, lightning activity, and temporal
-        features. Splits data into training and testing sets (80/20) with stratification
-        for classification tasks. Trains models with 150 estimators and balanced class
-        weights for classification models. Evaluates model performance using classification
-        reports for categorical predictions and R² scores for temperature regression.
-        Saves all trained models to a single pickle file for later use in predictions.
+        features. All models share one time-ordered split, with the most recent 20% of
+        rows held out for testing (see split_time_ordered). Trains forests with 150
+        estimators built in parallel across all cores, and balanced class weights for
+        classification models. Evaluates model performance using classification
+        reports for categorical predictions and R² scores for temperature regression,
+        and reports the training time and peak memory of each model.
+        Records the leaf membership of the temperature training rows so quantile
+        regression forest intervals can be computed at prediction time; the 'hgb' engine
+        instead trains quantile-loss regressors for the interval bounds.
+        Saves all trained models as a new version in the model registry, with the
+        training window, features, test metrics, training time and size, and promotes it.
     Args:
         df (pandas.DataFrame): DataFrame with engineered features and target labels.
+        multi_output_temp (bool): Train maximum and minimum temperature as one forest.
+        engine (str): Model backend, one of model_engines.ENGINES.
+        save (bool): Whether to save the models to the model registry.
+        promote_version (bool): Whether to promote the saved version.
     Returns:
-        dict: Dictionary containing four trained machine learning models.
+        dict: Dictionary containing the trained machine learning models.
     Raises:
+        ValueError: When multi_output_temp is used with the 'hgb' engine.
         Exception: When model training fails or file saving errors occur.
     """
-    features = [
-        'pressure', 'pressure_change', 'outTemp', 'temp_change',
-        'outHumidity', 'humidity_change', 'rolling_rain', 'wind_avg',
-        'lightning_last_hour', 'lightning_closest_km',
-        'month', 'day_of_year', 'hour', 'sin_doy', 'cos_doy',
-        'cond_Clear', 'cond_Cloudy', 'cond_Rain', 'cond_Storm'
-    ]
+    if multi_output_temp and engine != 'forest':
+        raise ValueError("Multi-output temperature models are only available with the forest engine")
+    train, test = split_time_ordered(df)
+    X_train, X_test = train[FEATURES], test[FEATURES]
+    print(f"Training on {len(train)} rows up to {train.index[-1]}, testing on {len(test)} rows from {test.index[0]}")
 
-    X = df[features]
-    y_weather = df['label']
-    y_wind = df['wind_label']
-    y_max_temp = df['max_temp_future']
-    y_min_temp = df['min_temp_future']
+    report = []
+    models = {}
 
-    X_train, X_test, y_weather_train, y_weather_test = train_test_split(X, y_weather, test_size=0.2, stratify=y_weather)
-    _, _, y_max_temp_train, y_max_temp_test = train_test_split(X, y_max_temp, test_size=0.2)
-    _, _, y_min_temp_train, y_min_temp_test = train_test_split(X, y_min_temp, test_size=0.2)
-    _, _, y_wind_train, y_wind_test = train_test_split(X, y_wind, test_size=0.2)
+    with measure_training('weather', report):
+        weather_model = make_classifier(engine, n_jobs=TRAIN_N_JOBS)
+        weather_model.fit(X_train, train['label'])
+    print("\nWeather Model Performance:\n", classification_report(test['label'], weather_model.predict(X_test), zero_division=0))
+    models['weather'] = weather_model
 
-    weather_model = RandomForestClassifier(n_estimators=150, random_state=42, class_weight='balanced')
-    weather_model.fit(X_train, y_weather_train)
-    print("\nWeather Model Performance:\n", classification_report(y_weather_test, weather_model.predict(X_test)))
+    with measure_training('wind', report):
+        wind_model = make_classifier(engine, n_jobs=TRAIN_N_JOBS)
+        wind_model.fit(X_train, train['wind_label'])
+    print("\nWind Model Performance:\n", classification_report(test['wind_label'], wind_model.predict(X_test), zero_division=0))
+    models['wind'] = wind_model
 
-    wind_model = RandomForestClassifier(n_estimators=150, random_state=42, class_weight='balanced')
-    wind_model.fit(X_train, y_wind_train)
-    print("\nWind Model Performance:\n", classification_report(y_wind_test, wind_model.predict(X_test)))
+    print("\nTemperature Models Performance:")
+    if multi_output_temp:
+        with measure_training('temp', report):
+            temp_model = make_regressor(engine, n_jobs=TRAIN_N_JOBS)
+            temp_model.fit(X_train, train[TEMP_TARGETS])
+            models['temp'] = temp_model
+            models['temp_qrf'] = build_quantile_index(temp_model, X_train, train[TEMP_TARGETS])
+        temp_pred = temp_model.predict(X_test)
+        print(f"Max Temperature R² Score: {r2_score(test['max_temp_future'], temp_pred[:, 0]):.3f}")
+        print(f"Min Temperature R² Score: {r2_score(test['min_temp_future'], temp_pred[:, 1]):.3f}")
+    else:
+        for name in ('max_temp', 'min_temp'):
+            with measure_training(name, report):
+                temp_model = make_regressor(engine, n_jobs=TRAIN_N_JOBS)
+                temp_model.fit(X_train, train[f'{name}_future'])
+                models[name] = temp_model
+                if engine == 'hgb':
+                    models[f'{name}_quantiles'] = train_quantile_models(X_train, train[f'{name}_future'],
+                                                                        TEMP_INTERVAL_QUANTILES)
+                else:
+                    models[f'{name}_qrf'] = build_quantile_index(temp_model, X_train, train[f'{name}_future'])
+        print(f"Max Temperature R² Score: {r2_score(test['max_temp_future'], models['max_temp'].predict(X_test)):.3f}")
+        print(f"Min Temperature R² Score: {r2_score(test['min_temp_future'], models['min_temp'].predict(X_test)):.3f}")
 
-    max_temp_model = RandomForestRegressor(n_estimators=150, random_state=42)
-    min_temp_model = RandomForestRegressor(n_estimators=150, random_state=42)
+    models.update(train_hourly_models(train, test, report, engine))
 
-    max_temp_model.fit(X_train, y_max_temp_train)
-    min_temp_model.fit(X_train, y_min_temp_train)
+    print_training_report(report)
+    if save:
+        metadata = get_version_metadata(
+            'retrain', df, report, engine=engine, multi_output_temp=multi_output_temp,
+            train_rows=len(train), test_rows=len(test), test_start=test.index[0].isoformat(),
+            hourly_features=HOURLY_FEATURES if 'hourly_condition' in models else None,
+            metrics=format_scores(evaluate_models(models, test))
+        )
+        save_model_version(models, metadata, promote_version)
+    return models
 
-    print("\nTemperature Models Performance:")
-    print(f"Max Temperature R² Score: {r2_score(y_max_temp_test, max_temp_model.predict(X_test)):.3f}")
-    print(f"Min Temperature R² Score: {r2_score(y_min_temp_test, min_temp_model.predict(X_test)):.3f}")
-
-    models = {
-        'weather': weather_model,
-        'wind': wind_model,
-        'max_temp': max_temp_model,
-        'min_temp': min_temp_model
+def warm_start_forest(model, X_new, y_new, X_pool, y_pool, new_trees, seed=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Add trees fitted on new data to a forest and retire the same number of oldest trees.
+    Description:
+        Fits new_trees additional trees on X_new with warm_start, then drops the oldest
+        trees (scikit-learn keeps estimators_ in the order they were built) so the forest
+        stays the same size. The new trees are seeded from seed: with the forest's own
+        random_state, every refresh would draw the same seeds, as the forest is always
+        the same size when it starts. For classifiers, every existing class must appear
+        in the new data or the class indexes of old and new trees would disagree, so the latest
+        row of any class missing from X_new is borrowed from the pool; class weights are
+        balanced over the pool rather than over the few new rows. A classifier is left
+        unchanged if the pool is missing one of its classes, or has a class it wasn't
+        trained on (new trees would predict a different set of classes from the old
+        ones), which needs a full retrain.
+    Args:
+        model (RandomForestClassifier or RandomForestRegressor): Forest to refresh.
+        X_new (pandas.DataFrame): Recent feature rows to fit the new trees on.
+        y_new (array-like): Targets for X_new.
+        X_pool (pandas.DataFrame): Feature rows of the full window, in time order.
+        y_pool (array-like): Targets for X_pool.
+        new_trees (int): Number of trees to add and retire.
+        seed (int, optional): Random state for the new trees. Defaults to the forest's own.
+    Returns:
+        bool: True when the forest was refreshed.
+    Raises:
+        Exception: When fitting fails.
+    """
+    size = len(model.estimators_)
+    restore = {name: value for name, value in model.get_params().items() if name in ('warm_start', 'class_weight', 'random_state')}
+    y_new, y_pool = np.asarray(y_new), np.asarray(y_pool)
+    if isinstance(model, RandomForestClassifier):
+        if len(np.setdiff1d(np.unique(y_pool), model.classes_)):
+            return False
+        missing = np.setdiff1d(model.classes_, y_new)
+        borrowed = [np.flatnonzero(y_pool == label)[-1:] for label in missing]
+        if any(len(rows) == 0 for rows in borrowed):
+            return False
+        if len(borrowed):
+            rows = np.concatenate(borrowed)
+            X_new = pd.concat([X_new, X_pool.iloc[rows]])
+            y_new = np.concatenate([y_new, y_pool[rows]])
+        weights = compute_class_weight('balanced', classes=model.classes_, y=y_pool)
+        model.set_params(class_weight=dict(zip(model.classes_, weights)))
+
+    if seed is not None:
+        model.set_params(random_state=seed)
+    model.set_params(warm_start=True, n_estimators=size + new_trees)
+    try:
+        model.fit(X_new, y_new)
+    finally:
+        model.set_params(**restore)
+    model.estimators_ = model.estimators_[-size:]
+    model.set_params(n_estimators=len(model.estimators_))
+    return True
+
+def refresh_models(models, df, refresh_days=REFRESH_DAYS, new_trees=REFRESH_NEW_TREES, promote_version=True):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Incrementally refresh the trained forests with recent data.
+    Description:
+        Adds new_trees trees fitted on the last refresh_days of labeled data to every
+        forest and retires the same number of oldest trees (see warm_start_forest), so
+        daily refreshes turn the whole forest over in a couple of weeks at a fraction of
+        the cost of a full retrain. The hourly models are refreshed on stacked recent
+        rows. Quantile regression forest indexes are rebuilt over the full window, as
+        they need the leaf of every training row in every tree. Reports the time and
+        peak memory of each refresh and saves the models as a new registry version,
+        recording the version they were refreshed from and the seed of the new trees,
+        which comes from the time of the latest row so each refresh draws different
+        bootstrap samples. Models from the 'hgb' engine are returned unchanged, as
+        boosting can't retire its oldest trees.
+    Args:
+        models (dict): Dictionary of full trained models (not compact models).
+        df (pandas.DataFrame): Labeled DataFrame for the full training window.
+        refresh_days (int): Days of recent data to fit the new trees on.
+        new_trees (int): Trees added to and retired from each forest.
+        promote_version (bool): Whether to promote the saved version.
+    Returns:
+        dict: Dictionary of refreshed models.
+    Raises:
+        Exception: When fitting or saving fails.
+    """
+    if get_model_engine(models) != 'forest':
+        print("\U0001F6D1 Only forest models can be refreshed; use --retrain for gradient boosting models.")
+        return models
+    recent = df[df.index >= df.index.max() - pd.Timedelta(days=refresh_days)]
+    seed = int(df.index.max().timestamp()) % 2**32
+    if len(recent) < MIN_RECORDS_REQUIRED:
+        print(f"\U0001F6D1 Only {len(recent)} records in the last {refresh_days} days; models not refreshed.")
+        return models
+
+    targets = {
+        'weather': 'label', 'wind': 'wind_label', 'max_temp': 'max_temp_future',
+        'min_temp': 'min_temp_future', 'temp': TEMP_TARGETS
     }
-    joblib.dump(models, MODEL_PATH)
-    print(f"\nModels saved to {MODEL_PATH}")
+    report = []
+    for name, target in targets.items():
+        if name not in models:
+            continue
+        with measure_training(name, report):
+            y_new, y_pool = recent[target], df[target]
+            if name == 'wind':
+                y_new, y_pool = y_new.astype(str), y_pool.astype(str)
+            refreshed = warm_start_forest(models[name], recent[FEATURES], y_new, df[FEATURES], y_pool, new_trees, seed)
+            if f'{name}_qrf' in models:
+                models[f'{name}_qrf'] = build_quantile_index(models[name], df[FEATURES], df[target])
+        if not refreshed:
+            print(f"Kept existing {name} model: its classes don't match the training window's; use --retrain.")
+
+    if 'hourly_condition' in models:
+        hourly_recent, hourly_pool = recent.iloc[::HOURLY_ROW_STRIDE], df.iloc[::HOURLY_ROW_STRIDE]
+        X_new, X_pool = stack_horizons(hourly_recent), stack_horizons(hourly_pool)
+        for name, prefix, label in (('hourly_condition', 'hourly_label', 'hourly_cond'),
+                                    ('hourly_temp', 'hourly_temp', 'hourly_temp')):
+            with measure_training(label, report):
+                refreshed = warm_start_forest(models[name], X_new, stack_hourly_targets(hourly_recent, prefix),
+                                              X_pool, stack_hourly_targets(hourly_pool, prefix), new_trees, seed)
+            if not refreshed:
+                print(f"Kept existing {name} model: its classes don't match the training window's; use --retrain.")
+
+    print(f"Refreshed models with {new_trees} new trees per forest fitted on {len(recent)} rows from the last {refresh_days} days.")
+    print_training_report(report)
+    metadata = get_version_metadata('refresh', df, report, engine=get_model_engine(models),
+                                    parent=get_current_version(), refresh_days=refresh_days,
+                                    new_trees=new_trees, refresh_rows=len(recent), refresh_seed=seed)
+    save_model_version(models, metadata, promote_version)
     return models
 
+def evaluate_models(models, test):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Score each forecast model on held-out labeled rows.
+    Description:
+        Computes accuracy for the condition classifiers and mean absolute error in °C
+        for the temperature regressors (both outputs of a multi-output 'temp' forest are
+        averaged). Hourly models are scored on the test rows stacked for every horizon.
+    Args:
+        models (dict): Dictionary of trained models.
+        test (pandas.DataFrame): Labeled test rows from split_time_ordered.
+    Returns:
+        dict: Score for each model name, as ('accuracy' or 'mae', value).
+    Raises:
+        None
+    """
+    X_test = test[FEATURES]
+    scores = {}
+    for name, target in (('weather', 'label'), ('wind', 'wind_label')):
+        scores[name] = ('accuracy', np.mean(models[name].predict(X_test) == test[target].astype(str).to_numpy()))
+    for name in ('max_temp', 'min_temp', 'temp'):
+        if name in models:
+            targets = TEMP_TARGETS if name == 'temp' else [f'{name}_future']
+            pred = np.asarray(models[name].predict(X_test)).reshape(len(test), -1)
+            scores[name] = ('mae', np.mean(np.abs(pred - test[targets].to_numpy())) * 5/9)
+    if 'hourly_condition' in models:
+        hourly_test = test.iloc[::HOURLY_ROW_STRIDE]
+        stacked = stack_horizons(hourly_test)
+        scores['hourly_condition'] = ('accuracy', np.mean(
+            models['hourly_condition'].predict(stacked) == stack_hourly_targets(hourly_test, 'hourly_label')))
+        scores['hourly_temp'] = ('mae', np.mean(np.abs(
+            models['hourly_temp'].predict(stacked) - stack_hourly_targets(hourly_test, 'hourly_temp'))) * 5/9)
+    return scores
+
+def export_compact_models(days, max_depth=COMPACT_MAX_DEPTH, max_trees=COMPACT_MAX_TREES):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Export compact, memory-mappable copies of the trained models.
+    Description:
+        Loads the full models of the promoted registry version and converts every forest
+        to a CompactForest with at most max_trees trees pruned to max_depth, stored as
+        int32 and float32 arrays. Both are scored on the most recent held-out rows; the
+        compact models are only added to the version when no classifier loses more than
+        COMPACT_ACCURACY_TOLERANCE accuracy and no temperature model gains more than
+        COMPACT_MAE_TOLERANCE MAE. Prediction then uses them in place of the full models.
+        Load time, file size and resident memory of both files are then measured in fresh
+        child processes and reported.
+    Args:
+        days (int): Number of days of stored features to evaluate on.
+        max_depth (int): Maximum tree depth to keep.
+        max_trees (int): Maximum number of trees to keep per forest.
+    Returns:
+        bool: True when the compact models were saved.
+    Raises:
+        Exception: When the full models can't be loaded or the compact models can't be saved.
+    """
+    version = get_current_version()
+    if version is None:
+        print("\U0001F6D1 No model version has been promoted; train the models first.")
+        return False
+    model_path = os.path.join(get_version_dir(version), MODEL_FILE)
+    models = joblib.load(model_path)
+    compacted = compact_models(models, max_depth=max_depth, max_trees=max_trees)
+
+    _, test = split_time_ordered(label_weather(load_features(days=days)))
+    full_scores = evaluate_models(models, test)
+    compact_scores = evaluate_models(compacted, test)
+
+    print(f"\nCompact Model Accuracy (max depth {max_depth}, {max_trees} trees, {len(test)} test rows):")
+    print(f"{'Model':<17} {'Metric':<9} {'Full':>8} {'Compact':>8}")
+    within_tolerance = True
+    for name, (metric, full) in full_scores.items():
+        compact = compact_scores[name][1]
+        if metric == 'accuracy':
+            ok = full - compact <= COMPACT_ACCURACY_TOLERANCE
+        else:
+            ok = compact - full <= COMPACT_MAE_TOLERANCE
+        within_tolerance = within_tolerance and ok
+        print(f"{name:<17} {metric:<9} {full:>8.3f} {compact:>8.3f}{'' if ok else '  (outside tolerance)'}")
+
+    if not within_tolerance:
+        print("\U0001F6D1 Compact models are outside the accuracy tolerance and were not saved.")
+        return False
+
+    compact_path = add_version_file(version, COMPACT_FILE, compacted, {
+        'compact': {'max_depth': max_depth, 'max_trees': max_trees, 'metrics': format_scores(compact_scores)}
+    })
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        full_load = executor.submit(measure_model_load, model_path).result()
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+        compact_load = executor.submit(measure_model_load, compact_path, 'r').result()
+
+    print("\nModel Load Cost:")
+    print(f"{'Models':<9} {'Size (MB)':>10} {'Load (s)':>9} {'RSS (MB)':>9}")
+    for label, path, (seconds, rss) in (('full', model_path, full_load), ('compact', compact_path, compact_load)):
+        rss = f"{rss:.1f}" if rss is not None else 'n/a'
+        print(f"{label:<9} {os.path.getsize(path) / 2**20:>10.1f} {seconds:>9.2f} {rss:>9}")
+    print(f"\nCompact models added to version {version}")
+    return True
+
+def compare_engines(df, multi_output_temp=False):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Train the models with every engine on the same data and compare their cost and skill.
+    Description:
+        Trains a full set of models with each engine in model_engines.ENGINES on the same
+        time-ordered split, without replacing the saved models. For each engine it measures
+        the training time and peak memory, and the mean time to produce the complete
+        forecast for the latest row (predict_future and predict_hourly, as the forecaster
+        and the model server do). It also records the size of the saved model file and the
+        skill on the held-out rows: condition accuracy, temperature MAE, and how often the
+        observed temperature falls inside the forecast interval.
+    Args:
+        df (pandas.DataFrame): Labeled DataFrame for the training window.
+        multi_output_temp (bool): Train the forest engine's temperatures as one forest.
+    Returns:
+        list: One dictionary of measurements per engine.
+    Raises:
+        Exception: When model training or inference fails.
+    """
+    _, test = split_time_ordered(df)
+    latest = df.tail(1)
+    results = []
+    for engine in ENGINES:
+        print(f"\n=== {engine} engine ===")
+        report = []
+        with measure_training(engine, report):
+            models = train_model(df, multi_output_temp=multi_output_temp and engine == 'forest', engine=engine, save=False)
+
+        start = time.perf_counter()
+        for _ in range(INFERENCE_REPEATS):
+            predict_future(latest, models)
+            predict_hourly(latest, models)
+        inference_ms = 1000 * (time.perf_counter() - start) / INFERENCE_REPEATS
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'models.pkl')
+            save_models(models, path)
+            size_mb = os.path.getsize(path) / 2**20
+
+        scores = evaluate_models(models, test)
+        temps = predict_temperature_uncertainty(test, models)
+        result = {
+            'engine': engine,
+            'train_seconds': report[0]['seconds'],
+            'peak_rss_mb': report[0]['peak_rss_mb'],
+            'inference_ms': inference_ms,
+            'size_mb': size_mb,
+            'weather_acc': scores['weather'][1],
+            'wind_acc': scores['wind'][1],
+            'hourly_acc': scores['hourly_condition'][1],
+            'hourly_temp_mae': scores['hourly_temp'][1]
+        }
+        covered = []
+        for name in ('max_temp', 'min_temp'):
+            observed = (test[f'{name}_future'] - 32) * 5/9
+            result[f'{name}_mae'] = np.mean(np.abs(temps[name] - observed))
+            covered.append((observed >= temps[f'{name}_low']) & (observed <= temps[f'{name}_high']))
+        result['interval_coverage'] = np.mean(np.concatenate(covered))
+        results.append(result)
+    return results
+
+def print_engine_comparison(results):
+    """Print the cost and skill of each engine from compare_engines as a table."""
+    interval = int(round(100 * (TEMP_INTERVAL_QUANTILES[1] - TEMP_INTERVAL_QUANTILES[0])))
+    print("\nEngine Comparison:")
+    print(f"{'Engine':<7} {'Train (s)':>9} {'Peak RSS (MB)':>13} {'Infer (ms)':>10} {'Size (MB)':>9} {'Weather':>7} "
+          f"{'Wind':>5} {'Max MAE':>7} {'Min MAE':>7} {f'{interval}% cover':>9} {'Hourly':>6} {'Hourly MAE':>10}")
+    for row in results:
+        peak = f"{row['peak_rss_mb']:.0f}" if row['peak_rss_mb'] is not None else 'n/a'
+        print(f"{row['engine']:<7} {row['train_seconds']:>9.2f} {peak:>13} {row['inference_ms']:>10.1f} "
+              f"{row['size_mb']:>9.1f} {row['weather_acc']:>7.3f} {row['wind_acc']:>5.3f} {row['max_temp_mae']:>7.2f} "
+              f"{row['min_temp_mae']:>7.2f} {row['interval_coverage']:>9.3f} {row['hourly_acc']:>6.3f} "
+              f"{row['hourly_temp_mae']:>10.2f}")
+
+def predict_mean_std(models, key, X):
+    """Return the mean and error margin of temperature model key, for either engine."""
+    if f'{key}_quantiles' in models:
+        return boosting_mean_std(models[key], models[f'{key}_quantiles'], X)
+    return forest_mean_std(models[key], X)
+
+def predict_temperature_uncertainty(features, models, quantiles=TEMP_INTERVAL_QUANTILES):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Predict maximum and minimum temperatures with uncertainty for many feature rows at once.
+    Description:
+        Gets every tree's output for all rows in one batched pass over each temperature
+        forest (or both outputs of a multi-output 'temp' forest), giving the mean
+        prediction and the spread across trees used as the error margin. When the models include quantile indexes (saved by train_model), quantile
+        regression forest bounds are added for the given quantiles. Gradient boosting
+        models use their quantile regressors for both the bounds and the error margin
+        (see model_engines). Suitable for a single
+        latest row, every row of an hourly horizon, or a historical backfill. Values are
+        converted from Fahrenheit to Celsius.
+    Args:
+        features (pandas.DataFrame): Feature rows with the FEATURES columns.
+        models (dict): Dictionary of trained models from train_model or load_models.
+        quantiles (tuple): Lower and upper quantiles for the intervals.
+    Returns:
+        pandas.DataFrame: Indexed like features, with max_temp, max_temp_err, min_temp and
+            min_temp_err columns, plus max_temp_low/high and min_temp_low/high when available.
+    Raises:
+        None
+    """
+    X = features[FEATURES]
+    result = pd.DataFrame(index=features.index)
+    # (model key, output index) for each temperature; a multi-output forest predicts both
+    if 'temp' in models:
+        outputs = {'max_temp': ('temp', 0), 'min_temp': ('temp', 1)}
+    else:
+        outputs = {'max_temp': ('max_temp', 0), 'min_temp': ('min_temp', 0)}
+    spreads = {}
+    bounds = {}
+    for key in set(key for key, _ in outputs.values()):
+        spreads[key] = predict_mean_std(models, key, X)
+        if f'{key}_qrf' in models:
+            bounds[key] = forest_quantiles(models[key], models[f'{key}_qrf'], X, quantiles)
+        elif f'{key}_quantiles' in models:
+            bounds[key] = boosting_quantiles(models[f'{key}_quantiles'], X, quantiles)
+    for name, (key, output) in outputs.items():
+        mean, std = spreads[key]
+        result[name] = (mean[:, output] - 32) * 5/9
+        result[f'{name}_err'] = std[:, output] * 5/9
+        if key in bounds:
+            result[f'{name}_low'] = (bounds[key][:, 0, output] - 32) * 5/9
+            result[f'{name}_high'] = (bounds[key][:, -1, output] - 32) * 5/9
+    return result
+
+def predict_hourly(df, models):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Predict the condition, rain and lightning chance and temperature for each hour ahead.
+    Description:
+        Stacks the latest feature row for every horizon in HOURLY_HORIZONS and predicts all
+        of them with one predict_proba call on the hourly condition model and one batched
+        pass over the hourly temperature forest. Temperatures are converted to Celsius,
+        with the spread across trees (or the quantile interval of gradient boosting
+        models) as the error margin.
+    Args:
+        df (pandas.DataFrame): DataFrame with engineered features; the last row is used.
+        models (dict): Dictionary of trained models.
+    Returns:
+        list: One dictionary per hour ahead, or None when the models have no hourly models.
+    Raises:
+        Exception: When model inference fails.
+    """
+    if 'hourly_condition' not in models:
+        return None
+    latest = df.tail(1)
+    stacked = stack_horizons(latest)
+    condition_model = models['hourly_condition']
+    probs = condition_model.predict_proba(stacked)
+    labels = condition_model.classes_[probs.argmax(axis=1)]
+    probs = pd.DataFrame(probs, columns=condition_model.classes_)
+    for label in ('Rain', 'Storm'):
+        if label not in probs:
+            probs[label] = 0.0
+    temp_mean, temp_std = predict_mean_std(models, 'hourly_temp', stacked)
+
+    base_time = int(latest['dateTime'].iloc[-1])
+    hourly = []
+    for i, h in enumerate(HOURLY_HORIZONS):
+        hourly.append({
+            "hour": h,
+            "time": datetime.datetime.fromtimestamp(base_time + h * 3600).isoformat(timespec='minutes'),
+            "ai_forecast": str(labels[i]),
+            "chance_of_rain": round(100 * (probs['Rain'].iloc[i] + probs['Storm'].iloc[i]), 1),
+            "chance_of_lightning": round(100 * probs['Storm'].iloc[i], 1),
+            "predicted_temp": round((temp_mean[i, 0] - 32) * 5/9, 1),
+            "predicted_temp_error": round(temp_std[i, 0] * 5/9, 1)
+        })
+    return hourly
+
 def predict_future(df, models):
     """
     Author:
@@ -285,8 +1608,10 @@ def predict_future(df, models):
         and temperature ranges. Extracts features from the latest data point and applies
         all four trained models (weather, wind, max temp, min temp) to generate predictions.
         Calculates probability distributions for weather conditions to determine chance of
-        rain and lightning. Uses ensemble predictions from individual decision trees to
-        estimate prediction uncertainty and confidence levels. Converts temperature predictions
+        rain and lightning. Uses the spread of the individual decision trees (computed in
+        one batched pass by predict_temperature_uncertainty) to estimate prediction
+        uncertainty and confidence levels, along with quantile regression forest
+        intervals when the models include them. Converts temperature predictions
         from Fahrenheit to Celsius and calculates error margins. Computes confidence levels
         for all predictions based on model uncertainty and probability distributions.
         Returns comprehensive prediction results including weather conditions, wind patterns,
@@ -297,20 +1622,13 @@ def predict_future(df, models):
         models (dict): Dictionary containing four trained machine learning models.
     Returns:
         tuple: Tuple containing weather prediction, wind prediction, temperature predictions,
-               error margins, probabilities, and confidence levels for all predictions.
+               error margins, probabilities, confidence levels for all predictions, and the
+               minimum and maximum temperature intervals (None for models without them).
     Raises:
         Exception: When prediction fails or model inference errors occur.
     """
     latest = df.tail(1)
-    features = [
-        'pressure', 'pressure_change', 'outTemp', 'temp_change',
-        'outHumidity', 'humidity_change', 'rolling_rain', 'wind_avg',
-        'lightning_last_hour', 'lightning_closest_km',
-        'month', 'day_of_year', 'hour', 'sin_doy', 'cos_doy',
-        'cond_Clear', 'cond_Cloudy', 'cond_Rain', 'cond_Storm'
-    ]
-
-    latest_features = latest[features]
+    latest_features = latest[FEATURES]
 
     weather_model = models['weather']
     weather_pred = weather_model.predict(latest_features)[0]
@@ -327,24 +1645,13 @@ def predict_future(df, models):
     lightning_confidence = 100 * max(prob_dict.get('Storm', 0), 1 - prob_dict.get('Storm', 0))
 
     wind_pred = models['wind'].predict(latest_features)[0]
-    max_temp_model = models['max_temp']
-    min_temp_model = models['min_temp']
-
-    with warnings.catch_warnings():
-        warnings.simplefilter("ignore", category=UserWarning)
-        max_temp_preds = np.array([tree.predict(latest_features.values)[0] for tree in max_temp_model.estimators_])
-        min_temp_preds = np.array([tree.predict(latest_features.values)[0] for tree in min_temp_model.estimators_])
-
-    max_temp_mean = np.mean(max_temp_preds)
-    min_temp_mean = np.mean(min_temp_preds)
-    max_temp_std = np.std(max_temp_preds)
-    min_temp_std = np.std(min_temp_preds)
-
-    # Convert to Celsius
-    max_temp_c = (max_temp_mean - 32) * 5/9
-    min_temp_c = (min_temp_mean - 32) * 5/9
-    max_temp_err = max_temp_std * 5/9
-    min_temp_err = min_temp_std * 5/9
+    temps = predict_temperature_uncertainty(latest_features, models).iloc[0]
+    max_temp_c = temps['max_temp']
+    min_temp_c = temps['min_temp']
+    max_temp_err = temps['max_temp_err']
+    min_temp_err = temps['min_temp_err']
+    max_temp_interval = (temps['max_temp_low'], temps['max_temp_high']) if 'max_temp_low' in temps else None
+    min_temp_interval = (temps['min_temp_low'], temps['min_temp_high']) if 'min_temp_low' in temps else None
 
     # Calculate temperature confidence levels (95% confidence interval)
     max_temp_confidence = 100 * (1 - (2 * max_temp_err) / max_temp_c)
@@ -352,29 +1659,78 @@ def predict_future(df, models):
 
     return (weather_pred, wind_pred, min_temp_c, max_temp_c, min_temp_err, max_temp_err, 
             chance_of_rain, chance_of_lightning, rain_confidence, lightning_confidence,
-            max_temp_confidence, min_temp_confidence)
+            max_temp_confidence, min_temp_confidence, min_temp_interval, max_temp_interval)
+
+def format_predictions(date, weather_pred, wind_pred, min_temp, max_temp, min_temp_err, max_temp_err,
+                       chance_of_rain, chance_of_lightning, rain_confidence, lightning_confidence,
+                       max_temp_confidence, min_temp_confidence, min_temp_interval=None, max_temp_interval=None,
+                       hourly=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Format a set of predictions as the forecast dictionary shown on the web dashboard.
+    Description:
+        Rounds values for display and formats temperature ranges and intervals as strings.
+        Used for the saved daily forecasts and the web app's live forecast. Takes the date
+        followed by the values returned by predict_future.
+    Args:
+        date (str): Forecast date in YYYY-MM-DD format.
+        weather_pred to max_temp_interval: The values returned by predict_future, as
+            described in save_predictions.
+        hourly (list, optional): Hourly predictions from predict_hourly.
+    Returns:
+        dict: Forecast dictionary.
+    Raises:
+        None
+    """
+    prediction = {
+        "date": date,
+        "predicted_min_temp": round(min_temp, 1),
+        "predicted_min_temp_error": round(min_temp_err, 1),
+        "predicted_min_temp_range": f"{round(min_temp - min_temp_err, 1)} to {round(min_temp + min_temp_err, 1)}",
+        "predicted_min_temp_confidence": round(min_temp_confidence, 1),
+        "predicted_max_temp": round(max_temp, 1),
+        "predicted_max_temp_error": round(max_temp_err, 1),
+        "predicted_max_temp_range": f"{round(max_temp - max_temp_err, 1)} to {round(max_temp + max_temp_err, 1)}",
+        "predicted_max_temp_confidence": round(max_temp_confidence, 1),
+        "ai_forecast": weather_pred,
+        "ai_wind_forecast": wind_pred,
+        "chance_of_rain": round(chance_of_rain, 1),
+        "chance_of_rain_confidence": round(rain_confidence, 1),
+        "chance_of_lightning": round(chance_of_lightning, 1),
+        "chance_of_lightning_confidence": round(lightning_confidence, 1)
+    }
+    if min_temp_interval is not None:
+        prediction["predicted_min_temp_interval"] = f"{round(min_temp_interval[0], 1)} to {round(min_temp_interval[1], 1)}"
+    if max_temp_interval is not None:
+        prediction["predicted_max_temp_interval"] = f"{round(max_temp_interval[0], 1)} to {round(max_temp_interval[1], 1)}"
+    if hourly is not None:
+        prediction["hourly"] = hourly
+    return prediction
 
 def save_predictions(weather_pred, wind_pred, min_temp, max_temp, min_temp_err, max_temp_err, 
                     chance_of_rain, chance_of_lightning, rain_confidence, lightning_confidence,
-                    max_temp_confidence, min_temp_confidence):
+                    max_temp_confidence, min_temp_confidence, min_temp_interval=None, max_temp_interval=None,
+                    hourly=None):
     """
     Author:
         David Rogers
     Email:
         dave@djrogers.net.au
     Summary:
-        Save weather predictions to a JSON file for display on the web dashboard.
+        Save weather predictions to the forecast store for display on the web dashboard.
     Description:
         Creates a structured JSON object containing all weather predictions and metadata
         for the current date. Formats temperature predictions with error margins and
         confidence levels. Includes weather condition forecasts, wind predictions,
-        precipitation probabilities, and lightning chances. Creates the forecasts
-        directory if it doesn't exist. Loads existing predictions from the JSON file
-        and updates with new predictions for the current date. Handles JSON file
-        corruption by creating a new file if loading fails. Saves the updated
-        predictions with proper formatting and indentation for readability.
-        The saved predictions are used by the web dashboard to display AI weather
-        forecasts to users.
+        precipitation probabilities, and lightning chances. Upserts the predictions
+        for the current date in the forecast store, replacing any saved earlier in
+        the day, in a single transaction. The saved predictions are used by the web dashboard to display AI weather
+        forecasts to users. The first forecast of each day is also recorded in the
+        forecast verification store, to be scored against what happened.
     Args:
         weather_pred (str): Predicted weather condition (Clear, Cloudy, Rain, Storm).
         wind_pred (str): Predicted wind condition (Calm, Light Breeze, etc.).
@@ -388,48 +1744,31 @@ def save_predictions(weather_pred, wind_pred, min_temp, max_temp, min_temp_err,
         lightning_confidence (float): Confidence level for lightning prediction.
         max_temp_confidence (float): Confidence level for maximum temperature prediction.
         min_temp_confidence (float): Confidence level for minimum temperature prediction.
+        min_temp_interval (tuple): Optional quantile regression forest (low, high) interval for
+            the minimum temperature in Celsius.
+        max_temp_interval (tuple): Optional quantile regression forest (low, high) interval for
+            the maximum temperature in Celsius.
+        hourly (list): Optional hourly predictions for +1h to +24h from predict_hourly.
     Returns:
-        None: Predictions are saved to file system.
+        None: Predictions are saved to the forecast store.
     Raises:
-        Exception: When file operations fail or JSON serialization errors occur.
+        Exception: When the forecast store can't be written or JSON serialization errors occur.
     """
-    forecasts_file = "/home/dave/projects/weather_predictor/forecasts/forecasts.json"
-    os.makedirs(os.path.dirname(forecasts_file), exist_ok=True)
     current_date = datetime.datetime.now().strftime("%Y-%m-%d")
 
     new_prediction = {
-        current_date: {
-            "date": current_date,
-            "predicted_min_temp": round(min_temp, 1),
-            "predicted_min_temp_error": round(min_temp_err, 1),
-            "predicted_min_temp_range": f"{round(min_temp - min_temp_err, 1)} to {round(min_temp + min_temp_err, 1)}",
-            "predicted_min_temp_confidence": round(min_temp_confidence, 1),
-            "predicted_max_temp": round(max_temp, 1),
-            "predicted_max_temp_error": round(max_temp_err, 1),
-            "predicted_max_temp_range": f"{round(max_temp - max_temp_err, 1)} to {round(max_temp + max_temp_err, 1)}",
-            "predicted_max_temp_confidence": round(max_temp_confidence, 1),
-            "ai_forecast": weather_pred,
-            "ai_wind_forecast": wind_pred,
-            "chance_of_rain": round(chance_of_rain, 1),
-            "chance_of_rain_confidence": round(rain_confidence, 1),
-            "chance_of_lightning": round(chance_of_lightning, 1),
-            "chance_of_lightning_confidence": round(lightning_confidence, 1)
-        }
+        current_date: format_predictions(current_date, weather_pred, wind_pred, min_temp, max_temp, min_temp_err,
+                                         max_temp_err, chance_of_rain, chance_of_lightning, rain_confidence,
+                                         lightning_confidence, max_temp_confidence, min_temp_confidence,
+                                         min_temp_interval, max_temp_interval, hourly)
     }
 
-    if os.path.exists(forecasts_file):
-        try:
-            with open(forecasts_file, 'r') as f:
-                forecasts = json.load(f)
-        except json.JSONDecodeError:
-            forecasts = {}
-    else:
-        forecasts = {}
+    save_forecast(current_date, new_prediction[current_date])
 
-    forecasts.update(new_prediction)
-
-    with open(forecasts_file, 'w') as f:
-        json.dump(forecasts, f, indent=4)
+    try:
+        record_forecast('ai', current_date, new_prediction[current_date])
+    except Exception as e:
+        print(f"Error recording forecast for verification: {e}")
 
 def main():
     """
@@ -442,9 +1781,10 @@ def main():
     Description:
         Orchestrates the complete weather forecasting pipeline from data retrieval
         to prediction generation and storage. Handles command-line arguments for
-        model retraining and data window configuration. Retrieves historical weather
-        data, engineers features, creates target labels, and either loads existing
-        models or trains new ones based on user preferences. Generates predictions
+        model retraining and data window configuration. Brings the persistent feature
+        store up to date with only the new archive rows, and either loads existing
+        models or trains new ones from stored features based on user preferences.
+        Target labels are only created when training. Generates predictions
         for the next 24 hours and saves results to the forecasts directory.
         Provides user feedback throughout the process including data retrieval status,
         model training progress, and prediction completion. Supports both training
@@ -452,6 +1792,29 @@ def main():
     Args:
         --retrain (bool): Optional flag to retrain models with new data.
         --days (int): Number of days of historical data to use (default: 60).
+        --rebuild-features (bool): Optional flag to rebuild the feature store from scratch.
+        --refresh (bool): Optional flag to refresh the existing models incrementally,
+            adding trees fitted on recent data and retiring the oldest.
+        --refresh-days (int): Days of recent data used by --refresh (default: 14).
+        --refresh-trees (int): Trees added and retired per forest by --refresh (default: 15).
+        --multi-output-temp (bool): Optional flag to train max and min temperature as one
+            multi-output forest.
+        --engine (str): Model backend used when training, 'forest' or 'hgb' (default: forest).
+        --compare-engines (bool): Optional flag to train with every engine, print their
+            training time, inference latency, model size and skill, and exit without
+            saving models.
+        --compact (bool): Optional flag to export compact copies of the trained models,
+            checked against the accuracy tolerances, and exit.
+        --compact-depth (int): Maximum tree depth kept by --compact (default: 20).
+        --compact-trees (int): Trees kept per forest by --compact (default: 100).
+        --predict-only (bool): Optional flag to predict from only the latest archive rows,
+            skipping the feature store, labeling and training.
+        --no-promote (bool): Optional flag to save retrained or refreshed models as a new
+            registry version without serving it.
+        --list-models (bool): Optional flag to list the registered model versions and exit.
+        --promote (str): Optional version to start serving, then exit.
+        --rollback (bool): Optional flag to return to the version served before the last
+            promotion, then exit.
     Returns:
         None: Executes the complete forecasting pipeline.
     Raises:
@@ -460,28 +1823,126 @@ def main():
     parser = argparse.ArgumentParser(description='Weather forecasting with optional model retraining')
     parser.add_argument('--retrain', action='store_true', help='Retrain the model with new data')
     parser.add_argument('--days', type=int, default=60, help='Number of days of data to use for training (default: 60)')
+    parser.add_argument('--rebuild-features', action='store_true', help='Rebuild the feature store from scratch')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Add trees fitted on recent data to the existing models and retire the oldest trees')
+    parser.add_argument('--refresh-days', type=int, default=REFRESH_DAYS,
+                        help=f'Days of recent data used by --refresh (default: {REFRESH_DAYS})')
+    parser.add_argument('--refresh-trees', type=int, default=REFRESH_NEW_TREES,
+                        help=f'Trees added and retired per forest by --refresh (default: {REFRESH_NEW_TREES})')
+    parser.add_argument('--multi-output-temp', action='store_true',
+                        help='Train max and min temperature as one multi-output forest when training')
+    parser.add_argument('--engine', choices=ENGINES, default=DEFAULT_ENGINE,
+                        help=f'Model backend used when training (default: {DEFAULT_ENGINE})')
+    parser.add_argument('--compare-engines', action='store_true',
+                        help='Train with every engine, compare cost and skill, and exit without saving models')
+    parser.add_argument('--compact', action='store_true',
+                        help='Export compact, memory-mapped copies of the trained models and exit')
+    parser.add_argument('--compact-depth', type=int, default=COMPACT_MAX_DEPTH,
+                        help=f'Maximum tree depth kept by --compact (default: {COMPACT_MAX_DEPTH})')
+    parser.add_argument('--compact-trees', type=int, default=COMPACT_MAX_TREES,
+                        help=f'Trees kept per forest by --compact (default: {COMPACT_MAX_TREES})')
+    parser.add_argument('--predict-only', action='store_true',
+                        help='Predict from the latest archive rows with existing models, without labeling or training')
+    parser.add_argument('--no-promote', action='store_true',
+                        help='Save retrained or refreshed models as a new version without serving it')
+    parser.add_argument('--list-models', action='store_true', help='List the registered model versions and exit')
+    parser.add_argument('--promote', metavar='VERSION', help='Serve a registered model version and exit')
+    parser.add_argument('--rollback', action='store_true',
+                        help='Return to the model version served before the last promotion and exit')
     args = parser.parse_args()
+    if args.multi_output_temp and args.engine != 'forest':
+        parser.error('--multi-output-temp is only available with the forest engine')
+
+    imported = import_legacy_models()
+    if imported:
+        print(f"Imported existing models into the model registry as version {imported}.")
+    if args.list_models:
+        print_model_versions()
+        return
+    if args.promote or args.rollback:
+        try:
+            version = rollback() if args.rollback else args.promote
+            if args.promote:
+                promote(version)
+        except ValueError as e:
+            print(f"\U0001F6D1 {e}")
+            sys.exit(1)
+        print(f"Now serving model version {version}.")
+        return
+
+    if args.compact:
+        if not export_compact_models(args.days, max_depth=args.compact_depth, max_trees=args.compact_trees):
+            sys.exit(1)
+        return
+
+    if args.predict_only:
+        start = time.perf_counter()
+        try:
+            models = load_models()
+        except Exception as e:
+            print(f"\U0001F6D1 Could not load models from {get_model_path()}: {e}")
+            sys.exit(1)
+        latest = engineer_latest_features(get_latest_rows())
+        if latest.empty:
+            print(f"\U0001F6D1 Not enough recent data to build features from the last {PREDICT_LOOKBACK_ROWS} rows.")
+            sys.exit(1)
+        predictions = predict_future(latest, models)
+        save_predictions(*predictions, hourly=predict_hourly(latest, models))
+        print(f"Prediction for {latest.index[-1]} completed in {time.perf_counter() - start:.2f}s")
+        return
+
+    print(f"Updating feature store with last {args.days} days of data...")
+    added = update_feature_store(args.days, rebuild=args.rebuild_features)
+    print(f"Added {added} rows to the feature store.")
 
-    print(f"Fetching last {args.days} days of data...")
-    df = get_data(args.days)
-    df = engineer_features(df)
-    df = label_weather(df)
+    if args.compare_engines:
+        print_engine_comparison(compare_engines(label_weather(load_features(days=args.days)),
+                                                multi_output_temp=args.multi_output_temp))
+        return
 
+    models = None
+    new_version = False
     if args.retrain:
         print("Training new models...")
-        models = train_model(df)
+    elif args.refresh:
+        try:
+            models = load_models(get_full_model_path())
+        except Exception:
+            print("No existing models found or invalid. Training new models...")
+            models = None
+        if models is not None:
+            models = refresh_models(models, label_weather(load_features(days=args.days)),
+                                    refresh_days=args.refresh_days, new_trees=args.refresh_trees,
+                                    promote_version=not args.no_promote)
+            new_version = True
     else:
         try:
-            models = joblib.load(MODEL_PATH)
-            if 'wind' not in models:
-                raise ValueError("Model file is outdated — missing 'wind' model.")
+            models = load_models()
             print("Loaded existing models.")
         except:
             print("No existing models found or invalid. Training new models...")
-            models = train_model(df)
+            models = None
+
+    if models is None:
+        df = load_features(days=args.days)
+        df = label_weather(df)
+        models = train_model(df, multi_output_temp=args.multi_output_temp, engine=args.engine,
+                             promote_version=not args.no_promote)
+        new_version = True
+
+    if new_version and args.no_promote:
+        # The new version isn't served yet, so predict with the promoted models instead
+        try:
+            models = load_models()
+        except Exception:
+            print("New models saved without promoting them and no promoted models to predict with. Skipping prediction.")
+            return
+        print("New models saved without promoting them. Predicting with the promoted models.")
 
-    predictions = predict_future(df, models)
-    save_predictions(*predictions)
+    latest = load_features(rows=1)
+    predictions = predict_future(latest, models)
+    save_predictions(*predictions, hourly=predict_hourly(latest, models))
 
 if __name__ == "__main__":
     main()
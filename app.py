@@ -1,24 +1,55 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, send_from_directory, send_file, stream_with_context
 from flask_cors import CORS
+from werkzeug.security import safe_join
 import os
-import pandas as pd
-from sqlalchemy import create_engine
 import json
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import pytz
 import time
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-import tempfile
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
+import importlib
 import re
-import requests
-import xml.etree.ElementTree as ET
-import math
+import gzip
+import hashlib
+import mimetypes
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+class LazyModule:
+    """Module that is only imported when one of its attributes is first used."""
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# Heavy dependencies are imported by the first request that needs them, so the app
+# starts (and generate_weekly_cache.py imports weekly_stats) without loading pandas,
+# SQLAlchemy or the forecasting models. Selenium is imported inside the two routes
+# that drive a browser. Check startup cost with import_benchmark.py.
+pd = LazyModule('pandas')
+requests = LazyModule('requests')
+archive_export = LazyModule('archive_export')
+export_jobs = LazyModule('export_jobs')
+model_server = LazyModule('model_server')
+forecast_verification = LazyModule('forecast_verification')
+forecast_store = LazyModule('forecast_store')
+update_conditions = LazyModule('update_conditions')
+pressure_tendency = LazyModule('pressure_tendency')
+weekly_stats = LazyModule('weekly_stats')
+
+def create_engine(*args, **kwargs):
+    """Create a SQLAlchemy engine, importing SQLAlchemy on first use."""
+    from sqlalchemy import create_engine as sqlalchemy_create_engine
+    return sqlalchemy_create_engine(*args, **kwargs)
 
 load_dotenv()
 
@@ -31,7 +62,6 @@ DB_PASSWORD = os.getenv('WEEWX_DB_PASSWORD')
 DB_HOST = '10.1.1.126'
 DB_NAME = 'weewx'
 DB_URI = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'
-FORECASTS_PATH = os.path.join(os.path.dirname(__file__), 'forecasts', 'forecasts.json')
 BATTERY_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'battery_cache.json')
 BATTERY_CACHE_TTL = 43200  # 12 hours in seconds
 WEATHER_CAM_CACHE_TTL = 300  # 5 minutes in seconds
@@ -63,9 +93,12 @@ DAM_LEVELS_CACHE_TTL = 86400  # 24 hours in seconds (cache for entire day)
 CAPITAL_CITIES_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'capital_cities_cache.json')
 CAPITAL_CITIES_CACHE_TTL = 3600  # 1 hour in seconds
 
-# Weekly Statistics configuration
-WEEKLY_STATS_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'weekly_stats_cache.json')
-WEEKLY_STATS_CACHE_TTL = 604800  # 7 days in seconds (1 week)
+# Response compression and static asset configuration
+COMPRESSION_MIN_SIZE = 1024  # Don't bother compressing responses smaller than 1 KB
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+STATIC_IMMUTABLE_MAX_AGE = 31536000  # 1 year in seconds, for content-hashed asset URLs
+STATIC_DEFAULT_MAX_AGE = 300  # 5 minutes in seconds, for unversioned asset URLs
 
 # Ferny Grove area suburbs for filtering alerts
 FERNY_GROVE_AREA_SUBURBS = [
@@ -76,548 +109,233 @@ FERNY_GROVE_AREA_SUBURBS = [
     'everton hills'
 ]
 
-def generate_weekly_stats_cache():
+# Per-route compression statistics, kept in memory for the life of the process
+compression_stats = {}
+compression_stats_lock = threading.Lock()
+
+# Content hashes of static assets, keyed by filename and invalidated on mtime change
+asset_hash_cache = {}
+
+def record_compression_stats(route, original_size, sent_size):
     """
     Author:
 	    David Rogers
     Email:		
 	    dave@djrogers.net.au
     Summary:
-	    Generate and cache weekly statistics data for improved performance.
+	    Record the bytes saved by compressing a response for a given route.
     Description:
-    	Calculates weekly statistics for current, previous, and trends data and stores them in a cache file.
-    	This function is designed to be called weekly (e.g., Sunday at 1 AM) to pre-generate the data
-    	and avoid expensive database queries during page loads. The cache includes all three weekly stats
-    	endpoints: current, previous, and trends.
+    	Accumulates the number of compressed responses, original bytes and bytes actually sent
+    	for each route so the effect of compression can be measured via /api/compression_stats.
     Args:
+        route (str): Route rule or path the response was served from.
+        original_size (int): Size of the uncompressed response body in bytes.
+        sent_size (int): Size of the response body actually sent in bytes.
+    Returns:
+        None
+    Raises:
         None
+    """
+    with compression_stats_lock:
+        stats = compression_stats.setdefault(route, {'responses': 0, 'original_bytes': 0, 'sent_bytes': 0})
+        stats['responses'] += 1
+        stats['original_bytes'] += original_size
+        stats['sent_bytes'] += sent_size
+
+def negotiate_encoding(accept_encoding, available=('br', 'gzip')):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Choose the best content encoding accepted by the client.
+    Description:
+    	Parses the Accept-Encoding request header and returns the preferred encoding out of
+    	those available. Brotli is preferred over gzip when both are accepted and the brotli
+    	module is installed. Encodings explicitly refused with q=0 are never selected.
+    Args:
+        accept_encoding (str): Value of the Accept-Encoding request header.
+        available (tuple): Encodings the server can produce, in order of preference.
     Returns:
-        bool: True if cache was successfully generated, False otherwise.
+        str: 'br' or 'gzip', or None if no acceptable encoding is available.
     Raises:
-        Exception: When database connection fails, query execution errors occur, or cache writing fails.
+        None
     """
-    try:
-        engine = create_engine(DB_URI)
-        now = time.time()
-        
-        # Calculate the previous week (Sunday to Saturday)
-        current_time = datetime.now()
-        days_since_saturday = (current_time.weekday() - 5) % 7
-        last_saturday = current_time - timedelta(days=days_since_saturday)
-        
-        # Current week (previous week)
-        week_start = last_saturday - timedelta(days=6)
-        week_end = last_saturday
-        
-        # Previous week
-        previous_week_start = last_saturday - timedelta(days=13)
-        previous_week_end = last_saturday - timedelta(days=7)
-        
-        # Week 3 for trends
-        week3_start = last_saturday - timedelta(days=20)
-        week3_end = last_saturday - timedelta(days=14)
-        
-        # Convert to timestamps
-        start_time = int(week_start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
-        end_time = int(week_end.replace(hour=23, minute=59, second=59, microsecond=999999).timestamp())
-        
-        previous_start_time = int(previous_week_start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
-        previous_end_time = int(previous_week_end.replace(hour=23, minute=59, second=59, microsecond=999999).timestamp())
-        
-        week3_start_time = int(week3_start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
-        week3_end_time = int(week3_end.replace(hour=23, minute=59, second=59, microsecond=999999).timestamp())
-        
-        # Generate current week data
-        current_query = f"""
-            SELECT 
-                MIN(outTemp) as min_temp,
-                MAX(outTemp) as max_temp,
-                AVG(outTemp) as avg_temp,
-                MIN(outHumidity) as min_humidity,
-                MAX(outHumidity) as max_humidity,
-                AVG(outHumidity) as avg_humidity,
-                MIN(barometer) as min_pressure,
-                MAX(barometer) as max_pressure,
-                AVG(barometer) as avg_pressure,
-                MAX(windGust) as max_wind_gust,
-                AVG(windSpeed) as avg_wind_speed,
-                SUM(rain) as total_rainfall,
-                MAX(UV) as max_uv,
-                AVG(UV) as avg_uv,
-                MAX(lightning_strike_count) as max_lightning_strikes,
-                SUM(lightning_strike_count) as total_lightning_strikes,
-                MAX(pm10_0) as max_pm10,
-                AVG(pm10_0) as avg_pm10
-            FROM archive
-            WHERE dateTime >= {start_time} AND dateTime <= {end_time}
-        """
-        
-        # Generate previous week data
-        previous_query = f"""
-            SELECT 
-                MIN(outTemp) as min_temp,
-                MAX(outTemp) as max_temp,
-                AVG(outTemp) as avg_temp,
-                MIN(outHumidity) as min_humidity,
-                MAX(outHumidity) as max_humidity,
-                AVG(outHumidity) as avg_humidity,
-                MIN(barometer) as min_pressure,
-                MAX(barometer) as max_pressure,
-                AVG(barometer) as avg_pressure,
-                MAX(windGust) as max_wind_gust,
-                AVG(windSpeed) as avg_wind_speed,
-                SUM(rain) as total_rainfall,
-                MAX(UV) as max_uv,
-                AVG(UV) as avg_uv,
-                MAX(lightning_strike_count) as max_lightning_strikes,
-                SUM(lightning_strike_count) as total_lightning_strikes,
-                MAX(pm10_0) as max_pm10,
-                AVG(pm10_0) as avg_pm10
-            FROM archive
-            WHERE dateTime >= {previous_start_time} AND dateTime <= {previous_end_time}
-        """
-        
-        # Generate week 3 data for trends
-        week3_query = f"""
-            SELECT 
-                MIN(outTemp) as min_temp,
-                MAX(outTemp) as max_temp,
-                AVG(outTemp) as avg_temp,
-                MIN(outHumidity) as min_humidity,
-                MAX(outHumidity) as max_humidity,
-                AVG(outHumidity) as avg_humidity,
-                MIN(barometer) as min_pressure,
-                MAX(barometer) as max_pressure,
-                AVG(barometer) as avg_pressure,
-                MAX(windGust) as max_wind_gust,
-                AVG(windSpeed) as avg_wind_speed,
-                SUM(rain) as total_rainfall,
-                MAX(UV) as max_uv,
-                AVG(UV) as avg_uv,
-                MAX(lightning_strike_count) as max_lightning_strikes,
-                SUM(lightning_strike_count) as total_lightning_strikes,
-                MAX(pm10_0) as max_pm10,
-                AVG(pm10_0) as avg_pm10
-            FROM archive
-            WHERE dateTime >= {week3_start_time} AND dateTime <= {week3_end_time}
-        """
-        
-        current_df = pd.read_sql(current_query, engine)
-        previous_df = pd.read_sql(previous_query, engine)
-        week3_df = pd.read_sql(week3_query, engine)
-        
-        # Process current week data
-        current_data = None
-        if not current_df.empty:
-            current_data = {
-                'week_start': week_start.strftime('%Y-%m-%d'),
-                'week_end': week_end.strftime('%Y-%m-%d'),
-                'min_temp': round((current_df['min_temp'].iloc[0] - 32) * 5/9, 1) if current_df['min_temp'].iloc[0] is not None else None,
-                'max_temp': round((current_df['max_temp'].iloc[0] - 32) * 5/9, 1) if current_df['max_temp'].iloc[0] is not None else None,
-                'avg_temp': round((current_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if current_df['avg_temp'].iloc[0] is not None else None,
-                'min_humidity': int(current_df['min_humidity'].iloc[0]) if current_df['min_humidity'].iloc[0] is not None else None,
-                'max_humidity': int(current_df['max_humidity'].iloc[0]) if current_df['max_humidity'].iloc[0] is not None else None,
-                'avg_humidity': round(current_df['avg_humidity'].iloc[0], 1) if current_df['avg_humidity'].iloc[0] is not None else None,
-                'min_pressure': round(current_df['min_pressure'].iloc[0] * 33.8639, 1) if current_df['min_pressure'].iloc[0] is not None else None,
-                'max_pressure': round(current_df['max_pressure'].iloc[0] * 33.8639, 1) if current_df['max_pressure'].iloc[0] is not None else None,
-                'avg_pressure': round(current_df['avg_pressure'].iloc[0] * 33.8639, 1) if current_df['avg_pressure'].iloc[0] is not None else None,
-                'max_wind_gust': round(current_df['max_wind_gust'].iloc[0] * 1.60934, 1) if current_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, start_time, end_time),
-                'avg_wind_speed': round(current_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if current_df['avg_wind_speed'].iloc[0] is not None else None,
-                'total_rainfall': round(current_df['total_rainfall'].iloc[0] * 25.4, 1) if current_df['total_rainfall'].iloc[0] is not None else 0,
-                'max_uv': int(current_df['max_uv'].iloc[0]) if current_df['max_uv'].iloc[0] is not None else None,
-                'avg_uv': calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, current_df['avg_uv'].iloc[0]),
-                'max_lightning_strikes': int(current_df['max_lightning_strikes'].iloc[0]) if current_df['max_lightning_strikes'].iloc[0] is not None else 0,
-                'total_lightning_strikes': int(current_df['total_lightning_strikes'].iloc[0]) if current_df['total_lightning_strikes'].iloc[0] is not None else 0,
-                'max_pm10': int(current_df['max_pm10'].iloc[0]) if current_df['max_pm10'].iloc[0] is not None else None,
-                'avg_pm10': round(current_df['avg_pm10'].iloc[0], 1) if current_df['avg_pm10'].iloc[0] is not None else None
-            }
-        
-        # Process previous week data
-        previous_data = None
-        if not previous_df.empty:
-            previous_data = {
-                'week_start': previous_week_start.strftime('%Y-%m-%d'),
-                'week_end': previous_week_end.strftime('%Y-%m-%d'),
-                'min_temp': round((previous_df['min_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['min_temp'].iloc[0] is not None else None,
-                'max_temp': round((previous_df['max_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['max_temp'].iloc[0] is not None else None,
-                'avg_temp': round((previous_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['avg_temp'].iloc[0] is not None else None,
-                'min_humidity': int(previous_df['min_humidity'].iloc[0]) if previous_df['min_humidity'].iloc[0] is not None else None,
-                'max_humidity': int(previous_df['max_humidity'].iloc[0]) if previous_df['max_humidity'].iloc[0] is not None else None,
-                'avg_humidity': round(previous_df['avg_humidity'].iloc[0], 1) if previous_df['avg_humidity'].iloc[0] is not None else None,
-                'min_pressure': round(previous_df['min_pressure'].iloc[0] * 33.8639, 1) if previous_df['min_pressure'].iloc[0] is not None else None,
-                'max_pressure': round(previous_df['max_pressure'].iloc[0] * 33.8639, 1) if previous_df['max_pressure'].iloc[0] is not None else None,
-                'avg_pressure': round(previous_df['avg_pressure'].iloc[0] * 33.8639, 1) if previous_df['avg_pressure'].iloc[0] is not None else None,
-                'max_wind_gust': round(previous_df['max_wind_gust'].iloc[0] * 1.60934, 1) if previous_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, previous_start_time, previous_end_time),
-                'avg_wind_speed': round(previous_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if previous_df['avg_wind_speed'].iloc[0] is not None else None,
-                'total_rainfall': round(previous_df['total_rainfall'].iloc[0] * 25.4, 1) if previous_df['total_rainfall'].iloc[0] is not None else 0,
-                'max_uv': int(previous_df['max_uv'].iloc[0]) if previous_df['max_uv'].iloc[0] is not None else None,
-                'avg_uv': calculate_daylight_uv_average(engine, previous_start_time, previous_end_time, previous_week_start, previous_week_end, previous_df['avg_uv'].iloc[0]),
-                'max_lightning_strikes': int(previous_df['max_lightning_strikes'].iloc[0]) if previous_df['max_lightning_strikes'].iloc[0] is not None else 0,
-                'total_lightning_strikes': int(previous_df['total_lightning_strikes'].iloc[0]) if previous_df['total_lightning_strikes'].iloc[0] is not None else 0,
-                'max_pm10': int(previous_df['max_pm10'].iloc[0]) if previous_df['max_pm10'].iloc[0] is not None else None,
-                'avg_pm10': round(previous_df['avg_pm10'].iloc[0], 1) if previous_df['avg_pm10'].iloc[0] is not None else None
-            }
-        
-        # Process trends data
-        trends_data = None
-        if not current_df.empty and not previous_df.empty and not week3_df.empty:
-            # Calculate daylight UV averages for all three weeks
-            current_avg_uv = calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, current_df['avg_uv'].iloc[0])
-            previous_avg_uv = calculate_daylight_uv_average(engine, previous_start_time, previous_end_time, previous_week_start, previous_week_end, previous_df['avg_uv'].iloc[0])
-            week3_avg_uv = calculate_daylight_uv_average(engine, week3_start_time, week3_end_time, week3_start, week3_end, week3_df['avg_uv'].iloc[0])
-            
-            # Process week 1 data (current week)
-            week1_data = {
-                'min_temp': round((current_df['min_temp'].iloc[0] - 32) * 5/9, 1) if current_df['min_temp'].iloc[0] is not None else None,
-                'max_temp': round((current_df['max_temp'].iloc[0] - 32) * 5/9, 1) if current_df['max_temp'].iloc[0] is not None else None,
-                'avg_temp': round((current_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if current_df['avg_temp'].iloc[0] is not None else None,
-                'min_humidity': int(current_df['min_humidity'].iloc[0]) if current_df['min_humidity'].iloc[0] is not None else None,
-                'max_humidity': int(current_df['max_humidity'].iloc[0]) if current_df['max_humidity'].iloc[0] is not None else None,
-                'avg_humidity': round(current_df['avg_humidity'].iloc[0], 1) if current_df['avg_humidity'].iloc[0] is not None else None,
-                'min_pressure': round(current_df['min_pressure'].iloc[0] * 33.8639, 1) if current_df['min_pressure'].iloc[0] is not None else None,
-                'max_pressure': round(current_df['max_pressure'].iloc[0] * 33.8639, 1) if current_df['max_pressure'].iloc[0] is not None else None,
-                'avg_pressure': round(current_df['avg_pressure'].iloc[0] * 33.8639, 1) if current_df['avg_pressure'].iloc[0] is not None else None,
-                'max_wind_gust': round(current_df['max_wind_gust'].iloc[0] * 1.60934, 1) if current_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, start_time, end_time),
-                'avg_wind_speed': round(current_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if current_df['avg_wind_speed'].iloc[0] is not None else None,
-                'total_rainfall': round(current_df['total_rainfall'].iloc[0] * 25.4, 1) if current_df['total_rainfall'].iloc[0] is not None else 0,
-                'max_uv': int(current_df['max_uv'].iloc[0]) if current_df['max_uv'].iloc[0] is not None else None,
-                'avg_uv': current_avg_uv,
-                'max_lightning_strikes': int(current_df['max_lightning_strikes'].iloc[0]) if current_df['max_lightning_strikes'].iloc[0] is not None else 0,
-                'total_lightning_strikes': int(current_df['total_lightning_strikes'].iloc[0]) if current_df['total_lightning_strikes'].iloc[0] is not None else 0,
-                'max_pm10': int(current_df['max_pm10'].iloc[0]) if current_df['max_pm10'].iloc[0] is not None else None,
-                'avg_pm10': round(current_df['avg_pm10'].iloc[0], 1) if current_df['avg_pm10'].iloc[0] is not None else None
-            }
-            
-            # Process week 2 data (previous week)
-            week2_data = {
-                'min_temp': round((previous_df['min_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['min_temp'].iloc[0] is not None else None,
-                'max_temp': round((previous_df['max_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['max_temp'].iloc[0] is not None else None,
-                'avg_temp': round((previous_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['avg_temp'].iloc[0] is not None else None,
-                'min_humidity': int(previous_df['min_humidity'].iloc[0]) if previous_df['min_humidity'].iloc[0] is not None else None,
-                'max_humidity': int(previous_df['max_humidity'].iloc[0]) if previous_df['max_humidity'].iloc[0] is not None else None,
-                'avg_humidity': round(previous_df['avg_humidity'].iloc[0], 1) if previous_df['avg_humidity'].iloc[0] is not None else None,
-                'min_pressure': round(previous_df['min_pressure'].iloc[0] * 33.8639, 1) if previous_df['min_pressure'].iloc[0] is not None else None,
-                'max_pressure': round(previous_df['max_pressure'].iloc[0] * 33.8639, 1) if previous_df['max_pressure'].iloc[0] is not None else None,
-                'avg_pressure': round(previous_df['avg_pressure'].iloc[0] * 33.8639, 1) if previous_df['avg_pressure'].iloc[0] is not None else None,
-                'max_wind_gust': round(previous_df['max_wind_gust'].iloc[0] * 1.60934, 1) if previous_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, previous_start_time, previous_end_time),
-                'avg_wind_speed': round(previous_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if previous_df['avg_wind_speed'].iloc[0] is not None else None,
-                'total_rainfall': round(previous_df['total_rainfall'].iloc[0] * 25.4, 1) if previous_df['total_rainfall'].iloc[0] is not None else 0,
-                'max_uv': int(previous_df['max_uv'].iloc[0]) if previous_df['max_uv'].iloc[0] is not None else None,
-                'avg_uv': previous_avg_uv,
-                'max_lightning_strikes': int(previous_df['max_lightning_strikes'].iloc[0]) if previous_df['max_lightning_strikes'].iloc[0] is not None else 0,
-                'total_lightning_strikes': int(previous_df['total_lightning_strikes'].iloc[0]) if previous_df['total_lightning_strikes'].iloc[0] is not None else 0,
-                'max_pm10': int(previous_df['max_pm10'].iloc[0]) if previous_df['max_pm10'].iloc[0] is not None else None,
-                'avg_pm10': round(previous_df['avg_pm10'].iloc[0], 1) if previous_df['avg_pm10'].iloc[0] is not None else None
-            }
-            
-            # Process week 3 data
-            week3_data = {
-                'min_temp': round((week3_df['min_temp'].iloc[0] - 32) * 5/9, 1) if week3_df['min_temp'].iloc[0] is not None else None,
-                'max_temp': round((week3_df['max_temp'].iloc[0] - 32) * 5/9, 1) if week3_df['max_temp'].iloc[0] is not None else None,
-                'avg_temp': round((week3_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if week3_df['avg_temp'].iloc[0] is not None else None,
-                'min_humidity': int(week3_df['min_humidity'].iloc[0]) if week3_df['min_humidity'].iloc[0] is not None else None,
-                'max_humidity': int(week3_df['max_humidity'].iloc[0]) if week3_df['max_humidity'].iloc[0] is not None else None,
-                'avg_humidity': round(week3_df['avg_humidity'].iloc[0], 1) if week3_df['avg_humidity'].iloc[0] is not None else None,
-                'min_pressure': round(week3_df['min_pressure'].iloc[0] * 33.8639, 1) if week3_df['min_pressure'].iloc[0] is not None else None,
-                'max_pressure': round(week3_df['max_pressure'].iloc[0] * 33.8639, 1) if week3_df['max_pressure'].iloc[0] is not None else None,
-                'avg_pressure': round(week3_df['avg_pressure'].iloc[0] * 33.8639, 1) if week3_df['avg_pressure'].iloc[0] is not None else None,
-                'max_wind_gust': round(week3_df['max_wind_gust'].iloc[0] * 1.60934, 1) if week3_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, week3_start_time, week3_end_time),
-                'avg_wind_speed': round(week3_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if week3_df['avg_wind_speed'].iloc[0] is not None else None,
-                'total_rainfall': round(week3_df['total_rainfall'].iloc[0] * 25.4, 1) if week3_df['total_rainfall'].iloc[0] is not None else 0,
-                'max_uv': int(week3_df['max_uv'].iloc[0]) if week3_df['max_uv'].iloc[0] is not None else None,
-                'avg_uv': week3_avg_uv,
-                'max_lightning_strikes': int(week3_df['max_lightning_strikes'].iloc[0]) if week3_df['max_lightning_strikes'].iloc[0] is not None else 0,
-                'total_lightning_strikes': int(week3_df['total_lightning_strikes'].iloc[0]) if week3_df['total_lightning_strikes'].iloc[0] is not None else 0,
-                'max_pm10': int(week3_df['max_pm10'].iloc[0]) if week3_df['max_pm10'].iloc[0] is not None else None,
-                'avg_pm10': round(week3_df['avg_pm10'].iloc[0], 1) if week3_df['avg_pm10'].iloc[0] is not None else None
-            }
-            
-            # Calculate trends
-            def calculate_trend(current, previous, threshold=0.1):
-                if current is None or previous is None or previous == 0:
-                    return 'stable'
-                change = abs(current - previous) / abs(previous)
-                if change < threshold:
-                    return 'stable'
-                return 'up' if current > previous else 'down'
-            
-            trends_data = {
-                'current_week': week1_data,
-                'previous_week': week2_data,
-                'week3': week3_data,
-                'trends': {
-                    'avg_temp': calculate_trend(week1_data['avg_temp'], week2_data['avg_temp']),
-                    'avg_humidity': calculate_trend(week1_data['avg_humidity'], week2_data['avg_humidity']),
-                    'avg_pressure': calculate_trend(week1_data['avg_pressure'], week2_data['avg_pressure']),
-                    'avg_wind_speed': calculate_trend(week1_data['avg_wind_speed'], week2_data['avg_wind_speed']),
-                    'total_rainfall': calculate_trend(week1_data['total_rainfall'], week2_data['total_rainfall']),
-                    'avg_uv': calculate_trend(week1_data['avg_uv'], week2_data['avg_uv']),
-                    'total_lightning_strikes': calculate_trend(week1_data['total_lightning_strikes'], week2_data['total_lightning_strikes']),
-                    'avg_pm10': calculate_trend(week1_data['avg_pm10'], week2_data['avg_pm10'])
-                }
-            }
-        
-        # Create cache data
-        cache_data = {
-            'timestamp': now,
-            'current': current_data,
-            'previous': previous_data,
-            'trends': trends_data,
-            'last_updated': datetime.now().strftime('%d-%m-%Y %H:%M:%S')
-        }
-        
-        # Write to cache file
-        with open(WEEKLY_STATS_CACHE_PATH, 'w') as f:
-            json.dump(cache_data, f)
-        
-        print(f"Weekly stats cache generated successfully at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        return True
-        
-    except Exception as e:
-        print(f"Error generating weekly stats cache: {e}")
-        return False
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        token, _, params = part.strip().partition(';')
+        token = token.strip().lower()
+        if not token:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[token] = quality
+
+    for encoding in available:
+        if encoding == 'br' and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get('*', 0)) > 0:
+            return encoding
+    return None
 
-def get_sunrise_sunset_times(date):
+def get_asset_hash(filename):
     """
     Author:
 	    David Rogers
     Email:		
 	    dave@djrogers.net.au
     Summary:
-	    Get sunrise and sunset times for a specific date using the sunrise-sunset.org API.
+	    Get a short content hash for a file in the static folder.
     Description:
-    	Fetches sunrise and sunset times for the specified date using the sunrise-sunset.org API.
-    	The times are converted to Brisbane timezone and returned as timezone-aware datetime objects.
-    	If the API call fails or returns invalid data, None values are returned for both times.
+    	Computes a SHA-256 digest of the static file and returns the first 12 hex characters.
+    	Hashes are cached in memory and only recomputed when the file's modification time changes,
+    	so deploying a new version of an asset automatically changes its URL.
     Args:
-        date (datetime.date): The date for which to fetch sunrise and sunset times.
+        filename (str): Path of the asset relative to the static folder.
     Returns:
-        tuple: A tuple containing (sunrise_time, sunset_time) as timezone-aware datetime objects, or (None, None) if an error occurs.
+        str: Short content hash of the file, or None if the file does not exist.
     Raises:
-        Exception: When API request fails or data parsing errors occur.
+        None
     """
-    try:
-        url = f"https://api.sunrise-sunset.org/json?lat={MY_LAT}&lng={MY_LNG}&date={date.strftime('%Y-%m-%d')}&tzid=Australia/Brisbane"
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data['status'] == 'OK' and data['results']:
-            # Parse sunrise and sunset times
-            sunrise_str = data['results']['sunrise']
-            sunset_str = data['results']['sunset']
-            
-            # Convert to datetime objects in Brisbane timezone
-            brisbane_tz = pytz.timezone('Australia/Brisbane')
-            
-            # Parse the time strings (format: "6:15:23 AM")
-            def parse_time_string(time_str):
-                # Remove timezone info if present and parse
-                time_str = time_str.split(' ')[0] + ' ' + time_str.split(' ')[1]
-                time_obj = datetime.strptime(time_str, '%I:%M:%S %p')
-                # Combine with the date
-                combined = datetime.combine(date, time_obj.time())
-                return brisbane_tz.localize(combined)
-            
-            sunrise_time = parse_time_string(sunrise_str)
-            sunset_time = parse_time_string(sunset_str)
-            
-            return sunrise_time, sunset_time
-        else:
-            return None, None
-    except Exception as e:
-        print(f"Error fetching sunrise/sunset times for {date}: {e}")
-        return None, None
+    path = safe_join(app.static_folder, filename)
+    if path is None or not os.path.isfile(path):
+        return None
+    mtime = os.path.getmtime(path)
+    cached = asset_hash_cache.get(filename)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    asset_hash = digest.hexdigest()[:12]
+    asset_hash_cache[filename] = (mtime, asset_hash)
+    return asset_hash
 
-def calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, fallback_avg=None):
+@app.context_processor
+def inject_asset_url():
     """
     Author:
 	    David Rogers
     Email:		
 	    dave@djrogers.net.au
     Summary:
-	    Calculate average UV index only during daylight hours for a given week period.
+	    Make the asset_url helper available to templates.
     Description:
-    	Retrieves UV data from the database for the specified time period and filters it to only include
-    	measurements taken during daylight hours (between sunrise and sunset). This provides a more accurate
-    	representation of UV exposure during active hours. If no daylight data is available, falls back to
-    	the provided fallback average or returns None.
+    	Templates call asset_url('js/dashboard.js') to get a content-hashed URL for a static
+    	asset. URLs stay relative so the dashboard keeps working behind a path prefix.
     Args:
-        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
-        start_time (int): Unix timestamp for the start of the time period.
-        end_time (int): Unix timestamp for the end of the time period.
-        week_start (datetime): Start date of the week for sunrise/sunset calculations.
-        week_end (datetime): End date of the week for sunrise/sunset calculations.
-        fallback_avg (float, optional): Fallback average UV value if daylight calculation fails. Defaults to None.
+        None
     Returns:
-        int: Average UV index during daylight hours, rounded to nearest whole number, or None if no data available.
+        dict: Template context containing the asset_url function.
     Raises:
-        Exception: When database query fails or UV calculation errors occur.
+        None
     """
-    try:
-        # Get all UV data for the week with timestamps
-        uv_query = f"""
-            SELECT dateTime, UV
-            FROM archive
-            WHERE dateTime >= {start_time} AND dateTime <= {end_time} AND UV IS NOT NULL
-            ORDER BY dateTime ASC
-        """
-        uv_df = pd.read_sql(uv_query, engine)
-        
-        if not uv_df.empty:
-            # Convert timestamps to datetime
-            uv_df['dateTime'] = pd.to_datetime(uv_df['dateTime'], unit='s', utc=True).dt.tz_convert('Australia/Brisbane')
-            
-            # Filter UV data to only include daylight hours
-            daylight_uv_values = []
-            
-            # Group by date to get sunrise/sunset for each day
-            # Convert week_start and week_end to datetime.date objects for the loop
-            week_start_date = week_start.date() if hasattr(week_start, 'date') else week_start
-            week_end_date = week_end.date() if hasattr(week_end, 'date') else week_end
-            
-            for date in pd.date_range(start=week_start_date, end=week_end_date, freq='D'):
-                sunrise_time, sunset_time = get_sunrise_sunset_times(date.date())
-                
-                if sunrise_time and sunset_time:
-                    # Create timezone-aware datetime objects for day boundaries
-                    brisbane_tz = pytz.timezone('Australia/Brisbane')
-                    day_start = brisbane_tz.localize(datetime.combine(date.date(), datetime.min.time()))
-                    day_end = brisbane_tz.localize(datetime.combine(date.date(), datetime.max.time().replace(microsecond=999999)))
-                    
-                    # Convert sunrise and sunset times to pandas Timestamp for comparison
-                    sunrise_ts = pd.Timestamp(sunrise_time)
-                    sunset_ts = pd.Timestamp(sunset_time)
-                    
-                    day_uv_data = uv_df[
-                        (uv_df['dateTime'] >= day_start) & 
-                        (uv_df['dateTime'] <= day_end) &
-                        (uv_df['dateTime'] >= sunrise_ts) & 
-                        (uv_df['dateTime'] <= sunset_ts)
-                    ]
-                    
-                    if not day_uv_data.empty:
-                        daylight_uv_values.extend(day_uv_data['UV'].tolist())
-            
-            # Calculate average of daylight UV values and round to whole number
-            if daylight_uv_values:
-                return round(sum(daylight_uv_values) / len(daylight_uv_values))
-            else:
-                # Fallback to the original average if no daylight data
-                return round(fallback_avg) if fallback_avg is not None else None
-        else:
-            # Fallback to the original average if no UV data
-            return round(fallback_avg) if fallback_avg is not None else None
-    except Exception as e:
-        print(f"Error calculating daylight UV average: {e}")
-        # Fallback to the original average if calculation fails
-        return round(fallback_avg) if fallback_avg is not None else None
+    def asset_url(filename):
+        asset_hash = get_asset_hash(filename)
+        if asset_hash is None:
+            return f'static/{filename}'
+        return f'static/{filename}?v={asset_hash}'
+    return {'asset_url': asset_url}
 
-def calculate_average_wind_direction(engine, start_time, end_time):
+def send_static_asset(filename):
     """
     Author:
 	    David Rogers
     Email:		
 	    dave@djrogers.net.au
     Summary:
-	    Calculate the average wind direction for a given time period using vector mathematics.
+	    Serve a static file, preferring a precompressed variant and long-lived caching.
     Description:
-    	Retrieves wind direction data from the database and calculates the average direction using vector math.
-    	Wind directions are converted from degrees to x,y components, averaged, then converted back to degrees
-    	and finally to compass direction (N, NNE, NE, etc.). This method properly handles the circular nature
-    	of wind direction data.
+    	Replaces Flask's default static view. If the client accepts brotli or gzip and an up-to-date
+    	.br or .gz file generated by precompress_static.py exists next to the asset, that file is
+    	sent with the matching Content-Encoding. Requests carrying a ?v= content hash that matches
+    	the current file are marked immutable and cacheable for a year; all other requests get a
+    	short max-age so unversioned URLs (e.g. the weather cam image) stay fresh.
     Args:
-        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
-        start_time (int): Unix timestamp for the start of the time period.
-        end_time (int): Unix timestamp for the end of the time period.
+        filename (str): Path of the asset relative to the static folder.
     Returns:
-        str: Average wind direction as a compass direction (N, NNE, NE, ENE, E, ESE, SE, SSE, S, SSW, SW, WSW, W, WNW, NW, NNW), or None if no data available.
+        Response: Flask response object for the static file.
     Raises:
-        Exception: When database query fails or wind direction calculation errors occur.
+        NotFound: When the requested file does not exist.
     """
-    try:
-        # Get all wind direction data for the period
-        wind_query = f"""
-            SELECT windDir
-            FROM archive
-            WHERE dateTime >= {start_time} AND dateTime <= {end_time} AND windDir IS NOT NULL
-        """
-        wind_df = pd.read_sql(wind_query, engine)
-        
-        if not wind_df.empty:
-            # Convert degrees to radians and calculate x,y components
-            wind_df['radians'] = wind_df['windDir'] * (3.14159 / 180)
-            wind_df['x_component'] = wind_df['radians'].apply(lambda x: -1 * math.sin(x))  # Negative because wind direction is "from"
-            wind_df['y_component'] = wind_df['radians'].apply(lambda x: -1 * math.cos(x))  # Negative because wind direction is "from"
-            
-            # Calculate average components
-            avg_x = wind_df['x_component'].mean()
-            avg_y = wind_df['y_component'].mean()
-            
-            # Convert back to degrees
-            avg_degrees = math.atan2(avg_x, avg_y) * (180 / 3.14159)
-            
-            # Normalize to 0-360 range
-            if avg_degrees < 0:
-                avg_degrees += 360
-            
-            # Convert to compass direction
-            directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-            index = round(avg_degrees / 22.5) % 16
-            return directions[index]
-        else:
-            return None
-    except Exception as e:
-        print(f"Error calculating average wind direction: {e}")
-        return None
+    path = safe_join(app.static_folder, filename)
+    encoding = None
+    if path is not None and os.path.isfile(path):
+        available = []
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            variant = path + suffix
+            if os.path.isfile(variant) and os.path.getmtime(variant) >= os.path.getmtime(path):
+                available.append(candidate)
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'), tuple(available))
+
+    if encoding:
+        suffix = '.br' if encoding == 'br' else '.gz'
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(app.static_folder, filename + suffix, mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+        record_compression_stats('/static', os.path.getsize(path), os.path.getsize(path + suffix))
+    else:
+        response = app.send_static_file(filename)
+    response.vary.add('Accept-Encoding')
 
-def get_wind_gust_direction(engine, start_time, end_time):
+    version = request.args.get('v')
+    if version and version == get_asset_hash(filename):
+        response.headers['Cache-Control'] = f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable'
+    else:
+        response.headers['Cache-Control'] = f'public, max-age={STATIC_DEFAULT_MAX_AGE}'
+    return response
+
+app.view_functions['static'] = send_static_asset
+
+@app.after_request
+def compress_response(response):
     """
     Author:
 	    David Rogers
     Email:		
 	    dave@djrogers.net.au
     Summary:
-	    Get the wind direction for the maximum wind gust in a given time period.
+	    Compress JSON responses with brotli or gzip when the client supports it.
     Description:
-    	Queries the database to find the record with the highest wind gust value within the specified
-    	time period and returns the corresponding wind direction. The wind direction is converted from
-    	degrees to compass direction (N, NNE, NE, etc.) for easier interpretation.
+    	Runs after every request. JSON responses larger than COMPRESSION_MIN_SIZE are compressed
+    	using the best encoding the client accepts, and the bytes saved are recorded per route.
+    	Streamed, file-backed and already-encoded responses are left untouched.
     Args:
-        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
-        start_time (int): Unix timestamp for the start of the time period.
-        end_time (int): Unix timestamp for the end of the time period.
+        response (Response): The response generated by the view function.
     Returns:
-        str: Wind direction as a compass direction (N, NNE, NE, ENE, E, ESE, SE, SSE, S, SSW, SW, WSW, W, WNW, NW, NNW), or None if no data available.
+        Response: The original or compressed response.
     Raises:
-        Exception: When database query fails or wind direction calculation errors occur.
+        None
     """
-    try:
-        # Get the wind direction for the maximum wind gust
-        gust_query = f"""
-            SELECT windDir
-            FROM archive
-            WHERE dateTime >= {start_time} AND dateTime <= {end_time} AND windGust IS NOT NULL
-            ORDER BY windGust DESC
-            LIMIT 1
-        """
-        gust_df = pd.read_sql(gust_query, engine)
-        
-        if not gust_df.empty and gust_df['windDir'].iloc[0] is not None:
-            wind_dir_degrees = gust_df['windDir'].iloc[0]
-            directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
-            index = round(wind_dir_degrees / 22.5) % 16
-            return directions[index]
-        else:
-            return None
-    except Exception as e:
-        print(f"Error getting wind gust direction: {e}")
-        return None
+    if (response.direct_passthrough or response.is_streamed or response.status_code != 200
+            or response.mimetype != 'application/json' or 'Content-Encoding' in response.headers):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_SIZE:
+        return response
+
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding == 'br':
+        compressed = brotli.compress(data, quality=COMPRESSION_BROTLI_QUALITY)
+    elif encoding == 'gzip':
+        compressed = gzip.compress(data, compresslevel=COMPRESSION_GZIP_LEVEL)
+    else:
+        return response
+
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    route = request.url_rule.rule if request.url_rule else request.path
+    record_compression_stats(route, len(data), len(compressed))
+    return response
 
 @app.route('/')
 def index():
@@ -782,30 +500,160 @@ def api_forecast():
     Email:		
 	    dave@djrogers.net.au
     Summary:
-	    Retrieve weather forecast data from the local forecasts file.
+	    Retrieve weather forecast data from the local forecast store.
     Description:
-    	Reads weather forecast data from a local JSON file containing pre-generated forecasts.
-    	If today's forecast is not available, returns the most recent available forecast.
+    	Returns today's forecast from the forecast store, or the most recent available forecast
+    	if today's is not available. The forecast is kept in memory and only read from the store
+    	again when a new forecast has been saved or the date changes.
     	The forecast data is generated by external prediction models and stored locally.
     Args:
         None
     Returns:
         json: JSON object containing forecast data for the current or most recent available date.
     Raises:
-        Exception: When forecast file is missing or JSON parsing errors occur.
+        Exception: When the forecast store can't be read.
     """
-    # Get today's date
-    today = datetime.now().date().isoformat()
-    if not os.path.exists(FORECASTS_PATH):
-        return jsonify({})
-    with open(FORECASTS_PATH, 'r') as f:
-        forecasts = json.load(f)
-    forecast = forecasts.get(today)
-    if not forecast and forecasts:
-        # Return the most recent available forecast
-        latest_date = max(forecasts.keys())
-        forecast = forecasts[latest_date]
-    return jsonify(forecast or {})
+    return jsonify(forecast_store.get_current_forecast() or {})
+
+@app.route('/api/ai_forecast/live')
+def api_ai_forecast_live():
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Run the AI forecast on demand for the latest archive record.
+    Description:
+    	Runs the forecast models, held in memory by the model server, on features built from the
+    	most recent archive rows. Results are cached until the next archive record, and the
+    	models are reloaded automatically when the model file is replaced by a retrain.
+    	Returns the same fields as /api/forecast, plus the time of the sample the forecast was
+    	made from and when the models were loaded.
+    Args:
+        None
+    Returns:
+        json: JSON object containing the live forecast, or an error with HTTP status 503 when
+            no models or recent data are available.
+    Raises:
+        None
+    """
+    try:
+        return jsonify(model_server.get_live_forecast(create_engine(DB_URI)))
+    except (FileNotFoundError, ValueError) as e:
+        print(f"Live forecast unavailable: {e}")
+        return jsonify({'error': 'Live forecast unavailable'}), 503
+    except Exception as e:
+        print(f"Error generating live forecast: {e}")
+        return jsonify({'error': 'Failed to generate live forecast'}), 500
+
+@app.route('/api/forecast/skill')
+def api_forecast_skill():
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Get the rolling skill scores of the daily forecasts.
+    Description:
+    	Scores the forecasts issued by each model ('ai' and 'prophet') against the observed
+    	daily rollups over the last 7, 30 and 90 days: temperature MAE and hit rates, and the
+    	Brier score and hit rate of the chance of rain and lightning. The verification store
+    	is brought up to date by the first request of each day.
+    Args:
+        None
+    Returns:
+        json: JSON object with the scores for each model and window, the date the store was
+            last updated and the thresholds used.
+    Raises:
+        None
+    """
+    try:
+        return jsonify(forecast_verification.get_forecast_skill(create_engine(DB_URI)))
+    except Exception as e:
+        print(f"Error getting forecast skill: {e}")
+        return jsonify({'error': 'Failed to get forecast skill'}), 500
+
+@app.route('/api/pressure_tendency')
+def api_pressure_tendency():
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Get the barometric pressure tendency series for charting and alerting.
+    Description:
+    	Returns the barometer and its change over the previous 3, 12 and 36 hours at every
+    	archive record in the period, read with one range query on the archive. The latest
+    	values are also returned with a description of the 3 hour change and a flag when
+    	pressure is falling quickly (RAPID_FALL_HPA or more in 3 hours).
+    Args:
+        hours (int, optional): Hours of series to return, from 1 to 168. Defaults to 24.
+    Returns:
+        json: JSON object containing the series arrays and the latest tendencies in hPa.
+    Raises:
+        None
+    """
+    hours = min(max(request.args.get('hours', 24, type=int), 1), 168)
+    try:
+        df = pressure_tendency.get_tendency_series(create_engine(DB_URI), hours=hours)
+    except Exception as e:
+        print(f"Error getting pressure tendency: {e}")
+        return jsonify({'error': 'Failed to get pressure tendency'}), 500
+
+    def safe_list(col):
+        return [x if pd.notnull(x) else None for x in col]
+
+    columns = [f'tendency_{interval}h' for interval in pressure_tendency.TENDENCY_HOURS]
+    latest = df.iloc[-1] if not df.empty else None
+    latest_3h = float(latest['tendency_3h']) if latest is not None and pd.notnull(latest['tendency_3h']) else None
+    result = {
+        'dateTime': pd.to_datetime(df['dateTime'], unit='s', utc=True).dt.tz_convert('Australia/Brisbane')
+            .dt.strftime('%Y-%m-%d %H:%M:%S').tolist(),
+        'barometer': safe_list(df['barometer'].round(2)),
+        **{column: safe_list(df[column].round(2)) for column in columns},
+        'latest': {
+            'barometer': round(float(latest['barometer']), 2) if latest is not None else None,
+            **{column: round(float(latest[column]), 2) if latest is not None and pd.notnull(latest[column]) else None
+               for column in columns}
+        },
+        'description': pressure_tendency.describe_tendency(latest_3h),
+        'rapid_fall': latest_3h is not None and latest_3h <= -pressure_tendency.RAPID_FALL_HPA
+    }
+    return jsonify(result)
+
+@app.route('/api/conditions/status')
+def api_conditions_status():
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Get the heartbeat and lag metrics of the conditions daemon.
+    Description:
+    	Returns the status written by update_conditions.py --daemon on every poll: its last
+    	heartbeat, the latest archive time and its age, the lag between a record arriving
+    	and its condition being written, and update and error counters, with a healthy
+    	flag for monitoring.
+    Args:
+        None
+    Returns:
+        json: JSON object containing the daemon status, or an error with HTTP status 404 when
+            the daemon has never run.
+    Raises:
+        None
+    """
+    try:
+        status = update_conditions.read_daemon_status()
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error reading conditions daemon status: {e}")
+        return jsonify({'error': 'Failed to read conditions daemon status'}), 500
+    if status is None:
+        return jsonify({'error': 'Conditions daemon has not run'}), 404
+    return jsonify(status)
 
 @app.route('/api/battery')
 def api_battery():
@@ -840,6 +688,13 @@ def api_battery():
             except Exception:
                 pass
 
+    # Selenium is only imported when the cache has expired
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.webdriver.chrome.service import Service
     chrome_options = Options()
     chrome_options.add_argument('--headless')
     chrome_options.add_argument('--no-sandbox')
@@ -1214,6 +1069,7 @@ def api_bom_warnings():
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"} 
         response = requests.get(BOM_WARNINGS_URL, headers=headers, timeout=10)
         response.raise_for_status()
+        import xml.etree.ElementTree as ET
         root = ET.fromstring(response.content)
         
         marine_warnings = []
@@ -1546,11 +1402,11 @@ def api_weekly_stats_current():
     now = time.time()
     
     # Try to load cache first
-    if os.path.exists(WEEKLY_STATS_CACHE_PATH):
-        with open(WEEKLY_STATS_CACHE_PATH, 'r') as f:
+    if os.path.exists(weekly_stats.WEEKLY_STATS_CACHE_PATH):
+        with open(weekly_stats.WEEKLY_STATS_CACHE_PATH, 'r') as f:
             try:
                 cache = json.load(f)
-                if now - cache.get('timestamp', 0) < WEEKLY_STATS_CACHE_TTL:
+                if now - cache.get('timestamp', 0) < weekly_stats.WEEKLY_STATS_CACHE_TTL:
                     if cache.get('current'):
                         return jsonify(cache['current'])
             except Exception:
@@ -1614,7 +1470,7 @@ def api_weekly_stats_current():
             avg_wind_speed = round(df['avg_wind_speed'].iloc[0] * 1.60934, 1) if df['avg_wind_speed'].iloc[0] is not None else None
             
             # Calculate wind directions
-            max_wind_gust_direction = get_wind_gust_direction(engine, start_time, end_time)
+            max_wind_gust_direction = weekly_stats.get_wind_gust_direction(engine, start_time, end_time)
             
             # Convert rainfall from inches to mm
             total_rainfall = round(df['total_rainfall'].iloc[0] * 25.4, 1) if df['total_rainfall'].iloc[0] is not None else 0
@@ -1623,7 +1479,7 @@ def api_weekly_stats_current():
             max_uv = int(df['max_uv'].iloc[0]) if df['max_uv'].iloc[0] is not None else None
             
             # Calculate average UV only during daylight hours
-            avg_uv = calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, df['avg_uv'].iloc[0])
+            avg_uv = weekly_stats.calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, df['avg_uv'].iloc[0])
             
             result = {
                 'week_start': week_start.strftime('%Y-%m-%d'),
@@ -1690,11 +1546,11 @@ def api_weekly_stats_previous():
     now = time.time()
     
     # Try to load cache first
-    if os.path.exists(WEEKLY_STATS_CACHE_PATH):
-        with open(WEEKLY_STATS_CACHE_PATH, 'r') as f:
+    if os.path.exists(weekly_stats.WEEKLY_STATS_CACHE_PATH):
+        with open(weekly_stats.WEEKLY_STATS_CACHE_PATH, 'r') as f:
             try:
                 cache = json.load(f)
-                if now - cache.get('timestamp', 0) < WEEKLY_STATS_CACHE_TTL:
+                if now - cache.get('timestamp', 0) < weekly_stats.WEEKLY_STATS_CACHE_TTL:
                     if cache.get('previous'):
                         return jsonify(cache['previous'])
             except Exception:
@@ -1758,7 +1614,7 @@ def api_weekly_stats_previous():
             avg_wind_speed = round(df['avg_wind_speed'].iloc[0] * 1.60934, 1) if df['avg_wind_speed'].iloc[0] is not None else None
             
             # Calculate wind directions
-            max_wind_gust_direction = get_wind_gust_direction(engine, start_time, end_time)
+            max_wind_gust_direction = weekly_stats.get_wind_gust_direction(engine, start_time, end_time)
             
             # Convert rainfall from inches to mm
             total_rainfall = round(df['total_rainfall'].iloc[0] * 25.4, 1) if df['total_rainfall'].iloc[0] is not None else 0
@@ -1767,7 +1623,7 @@ def api_weekly_stats_previous():
             max_uv = int(df['max_uv'].iloc[0]) if df['max_uv'].iloc[0] is not None else None
             
             # Calculate average UV only during daylight hours
-            avg_uv = calculate_daylight_uv_average(engine, start_time, end_time, previous_week_start, previous_week_end, df['avg_uv'].iloc[0])
+            avg_uv = weekly_stats.calculate_daylight_uv_average(engine, start_time, end_time, previous_week_start, previous_week_end, df['avg_uv'].iloc[0])
             
             result = {
                 'week_start': previous_week_start.strftime('%Y-%m-%d'),
@@ -1834,11 +1690,11 @@ def api_weekly_stats_trends():
     now = time.time()
     
     # Try to load cache first
-    if os.path.exists(WEEKLY_STATS_CACHE_PATH):
-        with open(WEEKLY_STATS_CACHE_PATH, 'r') as f:
+    if os.path.exists(weekly_stats.WEEKLY_STATS_CACHE_PATH):
+        with open(weekly_stats.WEEKLY_STATS_CACHE_PATH, 'r') as f:
             try:
                 cache = json.load(f)
-                if now - cache.get('timestamp', 0) < WEEKLY_STATS_CACHE_TTL:
+                if now - cache.get('timestamp', 0) < weekly_stats.WEEKLY_STATS_CACHE_TTL:
                     if cache.get('trends'):
                         return jsonify(cache['trends'])
             except Exception:
@@ -1955,9 +1811,9 @@ def api_weekly_stats_trends():
         
         if not week1_df.empty and not week2_df.empty and not week3_df.empty:
             # Calculate daylight UV averages for all three weeks
-            week1_avg_uv = calculate_daylight_uv_average(engine, week1_start_time, week1_end_time, week1_start, week1_end, week1_df['avg_uv'].iloc[0])
-            week2_avg_uv = calculate_daylight_uv_average(engine, week2_start_time, week2_end_time, week2_start, week2_end, week2_df['avg_uv'].iloc[0])
-            week3_avg_uv = calculate_daylight_uv_average(engine, week3_start_time, week3_end_time, week3_start, week3_end, week3_df['avg_uv'].iloc[0])
+            week1_avg_uv = weekly_stats.calculate_daylight_uv_average(engine, week1_start_time, week1_end_time, week1_start, week1_end, week1_df['avg_uv'].iloc[0])
+            week2_avg_uv = weekly_stats.calculate_daylight_uv_average(engine, week2_start_time, week2_end_time, week2_start, week2_end, week2_df['avg_uv'].iloc[0])
+            week3_avg_uv = weekly_stats.calculate_daylight_uv_average(engine, week3_start_time, week3_end_time, week3_start, week3_end, week3_df['avg_uv'].iloc[0])
             
             # Process week 1 data
             week1_data = {
@@ -1971,7 +1827,7 @@ def api_weekly_stats_trends():
                 'max_pressure': round(week1_df['max_pressure'].iloc[0] * 33.8639, 1) if week1_df['max_pressure'].iloc[0] is not None else None,
                 'avg_pressure': round(week1_df['avg_pressure'].iloc[0] * 33.8639, 1) if week1_df['avg_pressure'].iloc[0] is not None else None,
                 'max_wind_gust': round(week1_df['max_wind_gust'].iloc[0] * 1.60934, 1) if week1_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, week1_start_time, week1_end_time),
+                'max_wind_gust_direction': weekly_stats.get_wind_gust_direction(engine, week1_start_time, week1_end_time),
                 'avg_wind_speed': round(week1_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if week1_df['avg_wind_speed'].iloc[0] is not None else None,
                 'total_rainfall': round(week1_df['total_rainfall'].iloc[0] * 25.4, 1) if week1_df['total_rainfall'].iloc[0] is not None else 0,
                 'max_uv': int(week1_df['max_uv'].iloc[0]) if week1_df['max_uv'].iloc[0] is not None else None,
@@ -1994,7 +1850,7 @@ def api_weekly_stats_trends():
                 'max_pressure': round(week2_df['max_pressure'].iloc[0] * 33.8639, 1) if week2_df['max_pressure'].iloc[0] is not None else None,
                 'avg_pressure': round(week2_df['avg_pressure'].iloc[0] * 33.8639, 1) if week2_df['avg_pressure'].iloc[0] is not None else None,
                 'max_wind_gust': round(week2_df['max_wind_gust'].iloc[0] * 1.60934, 1) if week2_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, week2_start_time, week2_end_time),
+                'max_wind_gust_direction': weekly_stats.get_wind_gust_direction(engine, week2_start_time, week2_end_time),
                 'avg_wind_speed': round(week2_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if week2_df['avg_wind_speed'].iloc[0] is not None else None,
                 'total_rainfall': round(week2_df['total_rainfall'].iloc[0] * 25.4, 1) if week2_df['total_rainfall'].iloc[0] is not None else 0,
                 'max_uv': int(week2_df['max_uv'].iloc[0]) if week2_df['max_uv'].iloc[0] is not None else None,
@@ -2017,7 +1873,7 @@ def api_weekly_stats_trends():
                 'max_pressure': round(week3_df['max_pressure'].iloc[0] * 33.8639, 1) if week3_df['max_pressure'].iloc[0] is not None else None,
                 'avg_pressure': round(week3_df['avg_pressure'].iloc[0] * 33.8639, 1) if week3_df['avg_pressure'].iloc[0] is not None else None,
                 'max_wind_gust': round(week3_df['max_wind_gust'].iloc[0] * 1.60934, 1) if week3_df['max_wind_gust'].iloc[0] is not None else None,
-                'max_wind_gust_direction': get_wind_gust_direction(engine, week3_start_time, week3_end_time),
+                'max_wind_gust_direction': weekly_stats.get_wind_gust_direction(engine, week3_start_time, week3_end_time),
                 'avg_wind_speed': round(week3_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if week3_df['avg_wind_speed'].iloc[0] is not None else None,
                 'total_rainfall': round(week3_df['total_rainfall'].iloc[0] * 25.4, 1) if week3_df['total_rainfall'].iloc[0] is not None else 0,
                 'max_uv': int(week3_df['max_uv'].iloc[0]) if week3_df['max_uv'].iloc[0] is not None else None,
@@ -2108,7 +1964,7 @@ def api_generate_weekly_cache():
         Exception: When cache generation fails.
     """
     try:
-        success = generate_weekly_stats_cache()
+        success = weekly_stats.generate_weekly_stats_cache()
         if success:
             return jsonify({
                 'success': True,
@@ -2411,6 +2267,13 @@ def api_dam_levels():
     try:
         url = "https://www.seqwater.com.au/dam-levels"
         
+        # Selenium is only imported when the cache has expired
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.chrome.service import Service
         chrome_options = Options()
         chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
@@ -2656,73 +2519,213 @@ def api_download_csv():
     Email:		
 	    dave@djrogers.net.au
     Summary:
-	    Download weather data as a CSV file for a specified period.
+	    Download weather data as a CSV, Parquet or Arrow file for a specified period or date range.
     Description:
-    	Allows users to download historical weather data as a CSV file for the last 7 or 30 days.
-    	Queries the database for the specified period, converts timestamps to local time, and returns
-    	the data as a downloadable CSV file with appropriate headers.
+    	Allows users to download historical weather data for the last 7 or 30 days, or for any
+    	start/end range. CSV rows are streamed from a server-side cursor in chunks and written to
+    	the response as they arrive, so the download starts immediately and memory use stays
+    	constant however long the range is. Parquet and Arrow files are written from Arrow record
+    	batches with zstd compression and a dictionary-encoded conditions column, keeping dtypes
+    	intact for analysis notebooks; fully past months and days are served from an on-disk cache.
+    	Timestamps are converted to local time. An optional column selection, metric unit
+    	conversion and on-the-fly gzip compression (CSV only) are supported.
     Args:
         period (str, optional): Time period for data download. Options: '7d', '30d'. Defaults to '7d'.
+        start (str, optional): Start of range as a Unix timestamp or local ISO date/datetime. Overrides period.
+        end (str, optional): End of range as a Unix timestamp or local ISO date/datetime. Defaults to now.
+        columns (str, optional): Comma-separated list of columns to export. Defaults to all columns.
+        format (str, optional): Output format. Options: 'csv', 'parquet', 'arrow'. Defaults to 'csv'.
+        units (str, optional): Unit system. Options: 'us' (as stored), 'metric'. Defaults to 'us'.
+        compress (str, optional): Set to 'gzip' to download a gzip-compressed CSV.
     Returns:
-        Response: Flask response object containing the CSV file for download.
+        Response: Flask response object containing the export file for download.
     Raises:
-        Exception: When database query fails, CSV generation errors occur, or invalid period is specified.
+        Exception: When database query fails, file generation errors occur, or invalid arguments are specified.
     """
     try:
-        period = request.args.get('period', '7d')
-        
-        # Calculate the date range based on the period
         now = datetime.now()
-        if period == '7d':
-            start_date = now - timedelta(days=7)
-        elif period == '30d':
-            start_date = now - timedelta(days=30)
-        else:
-            return jsonify({'error': 'Invalid period specified'}), 400
-        
-        # Convert to Unix timestamps
-        start_time = int(start_date.timestamp())
-        end_time = int(now.timestamp())
-        
+        try:
+            start_time, end_time, label = archive_export.resolve_export_range(request.args, now)
+            columns = archive_export.resolve_export_columns(request.args.get('columns'))
+            fmt, metric = archive_export.resolve_export_options(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        compress = fmt == 'csv' and request.args.get('compress') == 'gzip'
+        extension, mimetype = archive_export.EXPORT_FORMATS[fmt]
+
         # Create database connection
         engine = create_engine(DB_URI)
-        
-        # Query all data from archive table for the specified period
-        query = f"""
-            SELECT dateTime,appTemp,barometer,cloudbase,co2,dewpoint,heatindex,humidex,inDewpoint,inHumidity,inTemp,lightning_distance,lightning_strike_count,luminosity,maxSolarRad,outHumidity,outTemp,pm10_0,pressure,rain,rainRate,UV,windchill,windDir,windGust,windGustDir,windrun,windSpeed,conditions
-            FROM archive
-            WHERE dateTime >= {start_time} AND dateTime <= {end_time}
-            ORDER BY dateTime ASC
-        """
-        
-        # Execute query and get data as DataFrame
-        df = pd.read_sql(query, engine)
-        
-        if df.empty:
+        if not archive_export.archive_has_rows(engine, start_time, end_time):
             return jsonify({'error': 'No data found for the specified period'}), 404
-        
-        # Convert Unix timestamps to readable datetime
-        df['dateTime'] = pd.to_datetime(df['dateTime'], unit='s', utc=True).dt.tz_convert('Australia/Brisbane')
-        
-        # Generate filename with current date and period
-        filename = f"weather_data_{period}_{now.strftime('%Y%m%d_%H%M%S')}.csv"
-        
-        # Create CSV content
-        csv_content = df.to_csv(index=False)
-        
-        # Create response with CSV content
+
+        # Generate filename with current date and range
+        filename = f"weather_data_{label}_{now.strftime('%Y%m%d_%H%M%S')}{extension}"
+
+        if fmt != 'csv':
+            path, is_temporary = archive_export.build_export_file(engine, start_time, end_time, columns, fmt, metric, now)
+            response = send_file(path, mimetype=mimetype, as_attachment=True, download_name=filename)
+            if is_temporary:
+                response.call_on_close(lambda: os.remove(path))
+            return response
+
+        chunks = archive_export.iter_archive_chunks(engine, start_time, end_time, columns)
+        if metric:
+            chunks = (archive_export.convert_chunk_to_metric(chunk) for chunk in chunks)
+        if compress:
+            filename += '.gz'
+            mimetype = 'application/gzip'
         response = app.response_class(
-            response=csv_content,
+            stream_with_context(archive_export.iter_csv(chunks, columns, compress=compress)),
             status=200,
-            mimetype='text/csv'
+            mimetype=mimetype
         )
         response.headers['Content-Disposition'] = f'attachment; filename={filename}'
-        
+
         return response
-        
+
+    except Exception as e:
+        print(f"Error generating data download: {e}")
+        return jsonify({'error': 'Failed to generate data download'}), 500
+
+def export_job_response(job):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Build the public JSON view of an export job.
+    Description:
+    	Strips internal fields such as the artifact path and adds the status and download URLs.
+    	The download URL is only included once the job has finished successfully.
+    Args:
+        job (dict): Job status dictionary from export_jobs.
+    Returns:
+        dict: JSON-serialisable job status.
+    Raises:
+        None
+    """
+    result = {
+        'job_id': job['job_id'],
+        'status': job['status'],
+        'progress': job.get('progress', 0.0),
+        'rows': job.get('rows', 0),
+        'format': job['format'],
+        'columns': job['columns'],
+        'units': 'metric' if job['metric'] else 'us',
+        'start': datetime.fromtimestamp(job['start_time']).strftime('%Y-%m-%d %H:%M:%S'),
+        'end': datetime.fromtimestamp(job['end_time']).strftime('%Y-%m-%d %H:%M:%S'),
+        'status_url': f"api/export_jobs/{job['job_id']}",
+    }
+    if job['status'] == 'done':
+        result['size'] = job.get('size')
+        result['download_url'] = f"api/export_jobs/{job['job_id']}/download"
+    if job['status'] == 'failed':
+        result['error'] = job.get('error')
+    return result
+
+@app.route('/api/export_jobs', methods=['POST'])
+def api_submit_export_job():
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Submit a background export job for a large date range.
+    Description:
+    	Accepts the same range, column, format and unit arguments as /api/download_csv, either
+    	as a JSON body, form fields or query arguments, and queues the export on a bounded pool
+    	of background workers. Returns immediately with a job ID; the status URL can be polled
+    	for progress and the file downloaded once the job is done. An identical job that is
+    	already in progress is returned instead of starting a new one.
+    Args:
+        start (str, optional): Start of range as a Unix timestamp or local ISO date/datetime.
+        end (str, optional): End of range as a Unix timestamp or local ISO date/datetime.
+        period (str, optional): '7d' or '30d' when no start is given.
+        columns (str, optional): Comma-separated list of columns to export, or a list in a JSON body.
+        format (str, optional): 'csv', 'parquet' or 'arrow'. Defaults to 'csv'.
+        units (str, optional): 'us' or 'metric'. Defaults to 'us'.
+    Returns:
+        json: JSON object with the job ID, status and URLs, with HTTP status 202.
+    Raises:
+        Exception: When invalid arguments are specified or the job can't be queued.
+    """
+    body = request.get_json(silent=True)
+    if body is not None and not isinstance(body, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    if body:
+        # The export helpers take string arguments, as in a query string; columns may also be a list
+        args = {name: ','.join(map(str, value)) if name == 'columns' and isinstance(value, list) else str(value)
+                for name, value in body.items() if value is not None}
+    else:
+        args = request.values
+    try:
+        start_time, end_time, label = archive_export.resolve_export_range(args)
+        columns = archive_export.resolve_export_columns(args.get('columns'))
+        fmt, metric = archive_export.resolve_export_options(args)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        job = export_jobs.submit_export_job(lambda: create_engine(DB_URI), start_time, end_time, columns, fmt, metric, label)
     except Exception as e:
-        print(f"Error generating CSV download: {e}")
-        return jsonify({'error': 'Failed to generate CSV download'}), 500
+        print(f"Error submitting export job: {e}")
+        return jsonify({'error': 'Failed to submit export job'}), 500
+    return jsonify(export_job_response(job)), 202
+
+@app.route('/api/export_jobs/<job_id>')
+def api_export_job_status(job_id):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Get the status and progress of a background export job.
+    Description:
+    	Returns the job's status (queued, running, done or failed), percentage progress through
+    	the requested range, rows written so far and, once finished, the download URL.
+    Args:
+        job_id (str): Job ID returned when the job was submitted.
+    Returns:
+        json: JSON object containing the job status, or an error with HTTP status 404.
+    Raises:
+        None
+    """
+    job = export_jobs.get_export_job(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown export job'}), 404
+    return jsonify(export_job_response(job))
+
+@app.route('/api/export_jobs/<job_id>/download')
+def api_export_job_download(job_id):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Download the file produced by a finished background export job.
+    Description:
+    	Sends the finished export file as an attachment. Returns 409 if the job hasn't finished
+    	yet and 404 if the job or its file no longer exists.
+    Args:
+        job_id (str): Job ID returned when the job was submitted.
+    Returns:
+        Response: Flask response object containing the export file for download.
+    Raises:
+        None
+    """
+    job = export_jobs.get_export_job(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown export job'}), 404
+    if job['status'] != 'done':
+        return jsonify(export_job_response(job)), 409
+    if not os.path.exists(job['path']):
+        return jsonify({'error': 'Export file has expired'}), 404
+    return send_file(job['path'], mimetype=archive_export.EXPORT_FORMATS[job['format']][1],
+                     as_attachment=True, download_name=job['filename'])
 
 @app.route('/api/capital_cities')
 def api_capital_cities():
@@ -2866,5 +2869,39 @@ def api_capital_cities():
             'cities': []
         })
 
+@app.route('/api/compression_stats')
+def api_compression_stats():
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Report the bytes saved by response compression for each route.
+    Description:
+    	Returns the in-memory compression statistics gathered since the app started. For each route
+    	the number of compressed responses, original and sent byte counts, bytes saved and the
+    	overall compression ratio are included. Precompressed static assets are grouped under /static.
+    Args:
+        None
+    Returns:
+        json: JSON object keyed by route with compression statistics.
+    Raises:
+        None
+    """
+    with compression_stats_lock:
+        snapshot = {route: dict(stats) for route, stats in compression_stats.items()}
+    result = {}
+    for route, stats in sorted(snapshot.items()):
+        saved = stats['original_bytes'] - stats['sent_bytes']
+        result[route] = {
+            'responses': stats['responses'],
+            'original_bytes': stats['original_bytes'],
+            'sent_bytes': stats['sent_bytes'],
+            'bytes_saved': saved,
+            'ratio': round(stats['sent_bytes'] / stats['original_bytes'], 3) if stats['original_bytes'] else None
+        }
+    return jsonify(result)
+
 if __name__ == '__main__':
     app.run(debug=False, host='0.0.0.0', port=5000) 
\ No newline at end of file
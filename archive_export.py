@@ -0,0 +1,788 @@
+"""
+Archive Export
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Helpers for exporting rows from the weewx archive table in constant memory. Rows are
+read from a server-side cursor in fixed-size chunks and written out incrementally, so
+the size of the export range only affects how long an export takes, not how much
+memory it needs. Used by the /api/download_csv endpoint in app.py.
+
+Parquet and Arrow exports are built from Arrow record batches. Fully past calendar months
+and days are cached on disk as canonical Parquet chunks (all columns, database units), and
+finished artifacts for ranges entirely in the past are kept so repeat downloads are just
+file sends. Artifacts are copies of data the chunks already hold, so they are pruned
+by age and total size, least recently used first (see prune_export_artifacts).
+"""
+
+import os
+import zlib
+import hashlib
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import pytz
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from sqlalchemy import text
+
+# Columns that may be exported, in their default order
+EXPORT_COLUMNS = [
+    'dateTime', 'appTemp', 'barometer', 'cloudbase', 'co2', 'dewpoint', 'heatindex', 'humidex',
+    'inDewpoint', 'inHumidity', 'inTemp', 'lightning_distance', 'lightning_strike_count',
+    'luminosity', 'maxSolarRad', 'outHumidity', 'outTemp', 'pm10_0', 'pressure', 'rain',
+    'rainRate', 'UV', 'windchill', 'windDir', 'windGust', 'windGustDir', 'windrun', 'windSpeed',
+    'conditions'
+]
+EXPORT_PERIODS = {'7d': timedelta(days=7), '30d': timedelta(days=30)}
+EXPORT_CHUNK_SIZE = 5000  # Rows fetched from the server-side cursor per chunk
+EXPORT_TIMEZONE = 'Australia/Brisbane'
+EXPORT_FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'arrow': ('.arrow', 'application/vnd.apache.arrow.file'),
+}
+EXPORT_UNITS = ('us', 'metric')
+EXPORT_COMPRESSION = 'zstd'
+EXPORT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'export_cache')
+EXPORT_ARTIFACT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB of cached artifacts kept, least recently used removed first
+EXPORT_ARTIFACT_TTL = 604800  # 7 days in seconds since an artifact was last used before it is removed
+EXPORT_ARTIFACT_GRACE = 600  # 10 minutes in seconds after use during which an artifact is never removed
+
+# Locks so threads building the same cached chunk or artifact share the work instead of repeating it
+cache_locks = {}
+cache_locks_lock = threading.Lock()
+
+# WeatherAPI condition codes, used as the fixed dictionary for the conditions column
+CONDITION_CODES = [
+    1000, 1003, 1006, 1009, 1030, 1063, 1066, 1069, 1072, 1087, 1114, 1117, 1135, 1147, 1150, 1153,
+    1168, 1171, 1180, 1183, 1186, 1189, 1192, 1195, 1198, 1201, 1204, 1207, 1210, 1213, 1216, 1219,
+    1222, 1225, 1237, 1240, 1243, 1246, 1249, 1252, 1255, 1258, 1261, 1264, 1273, 1276, 1279, 1282
+]
+
+# Conversion from database (US) units to metric, as (offset, scale): metric = (value + offset) * scale
+METRIC_CONVERSIONS = {
+    'appTemp': (-32, 5/9), 'dewpoint': (-32, 5/9), 'heatindex': (-32, 5/9), 'humidex': (-32, 5/9),
+    'inDewpoint': (-32, 5/9), 'inTemp': (-32, 5/9), 'outTemp': (-32, 5/9), 'windchill': (-32, 5/9),
+    'barometer': (0, 33.8639), 'pressure': (0, 33.8639),  # inHg to hPa
+    'rain': (0, 25.4), 'rainRate': (0, 25.4),  # inches to mm
+    'windSpeed': (0, 1.60934), 'windGust': (0, 1.60934),  # mph to km/h
+    'windrun': (0, 1.60934), 'lightning_distance': (0, 1.60934),  # miles to km
+    'cloudbase': (0, 0.3048),  # feet to meters
+}
+
+def parse_export_time(value, end_of_day=False):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Parse an export range boundary into a Unix timestamp.
+    Description:
+    	Accepts either a Unix timestamp or a local (Australia/Brisbane) date or datetime in
+    	ISO format, e.g. '2024-01-31' or '2024-01-31 18:30'. A bare date used as the end of a
+    	range is taken to mean the end of that day, so start=2024-01-01&end=2024-01-31 covers
+    	the whole of January.
+    Args:
+        value (str): Timestamp or ISO date/datetime string.
+        end_of_day (bool): Whether a bare date should resolve to 23:59:59 rather than 00:00:00.
+    Returns:
+        int: Unix timestamp in seconds.
+    Raises:
+        ValueError: When the value cannot be parsed.
+    """
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    parsed = datetime.fromisoformat(value)
+    if end_of_day and len(value) == 10:
+        parsed = parsed.replace(hour=23, minute=59, second=59)
+    if parsed.tzinfo is None:
+        parsed = pytz.timezone(EXPORT_TIMEZONE).localize(parsed)
+    return int(parsed.timestamp())
+
+def resolve_export_range(args, now=None):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Work out the time range requested for an export.
+    Description:
+    	Uses explicit start/end arguments when given, otherwise falls back to the period
+    	argument ('7d' or '30d', defaulting to '7d') measured back from now. The returned label
+    	is used to build the download filename.
+    Args:
+        args (Mapping): Request arguments containing any of 'start', 'end' and 'period'.
+        now (datetime, optional): Current time, used for period-based and open-ended ranges.
+    Returns:
+        tuple: (start_time, end_time, label) with Unix timestamps and a filename-safe label.
+    Raises:
+        ValueError: When the period is unknown, a boundary can't be parsed or start is after end.
+    """
+    now = now or datetime.now()
+    start_arg = args.get('start')
+    end_arg = args.get('end')
+
+    if start_arg:
+        try:
+            start_time = parse_export_time(start_arg)
+            end_time = parse_export_time(end_arg, end_of_day=True) if end_arg else int(now.timestamp())
+        except ValueError:
+            raise ValueError('Invalid start or end specified')
+        tz = pytz.timezone(EXPORT_TIMEZONE)
+        label = (datetime.fromtimestamp(start_time, tz).strftime('%Y%m%d') + '-' +
+                 datetime.fromtimestamp(end_time, tz).strftime('%Y%m%d'))
+    else:
+        period = args.get('period', '7d')
+        if period not in EXPORT_PERIODS:
+            raise ValueError('Invalid period specified')
+        start_time = int((now - EXPORT_PERIODS[period]).timestamp())
+        end_time = int(now.timestamp())
+        label = period
+
+    if start_time > end_time:
+        raise ValueError('Start must be before end')
+    return start_time, end_time, label
+
+def resolve_export_columns(columns_arg):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Validate a comma-separated column selection for an export.
+    Description:
+    	Returns the full default column list when no selection is given. Otherwise every requested
+    	column must be one of EXPORT_COLUMNS; dateTime is always included as the first column so
+    	exported rows can be placed in time. Duplicates are dropped and the requested order kept.
+    Args:
+        columns_arg (str): Comma-separated column names, or None/empty for all columns.
+    Returns:
+        list: Column names to export.
+    Raises:
+        ValueError: When an unknown column is requested.
+    """
+    if not columns_arg:
+        return list(EXPORT_COLUMNS)
+    requested = [c.strip() for c in columns_arg.split(',') if c.strip()]
+    unknown = [c for c in requested if c not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown column(s): {', '.join(unknown)}")
+    columns = ['dateTime']
+    for column in requested:
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+def resolve_export_options(args):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Validate the output format and unit system requested for an export.
+    Description:
+    	Reads the format ('csv', 'parquet' or 'arrow', default 'csv') and units ('us' for the
+    	database's native units or 'metric', default 'us') arguments.
+    Args:
+        args (Mapping): Request arguments containing any of 'format' and 'units'.
+    Returns:
+        tuple: (fmt, metric) with the format name and whether to convert to metric units.
+    Raises:
+        ValueError: When an unknown format or unit system is requested.
+    """
+    fmt = args.get('format', 'csv')
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError('Invalid format specified')
+    units = args.get('units', 'us')
+    if units not in EXPORT_UNITS:
+        raise ValueError('Invalid units specified')
+    return fmt, units == 'metric'
+
+def archive_has_rows(engine, start_time, end_time):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Check whether any archive rows exist in a time range.
+    Description:
+    	Runs a cheap indexed LIMIT 1 query so an export of an empty range can be rejected
+    	before a streaming response has been started.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the range.
+        end_time (int): Unix timestamp for the end of the range.
+    Returns:
+        bool: True if at least one row exists in the range.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    with engine.connect() as conn:
+        row = conn.execute(
+            text("SELECT 1 FROM archive WHERE dateTime >= :start AND dateTime <= :end LIMIT 1"),
+            {'start': start_time, 'end': end_time}
+        ).first()
+    return row is not None
+
+def iter_archive_chunks(engine, start_time, end_time, columns, chunksize=EXPORT_CHUNK_SIZE):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Stream archive rows for a time range as a sequence of DataFrame chunks.
+    Description:
+    	Executes the export query with stream_results enabled so the MySQL driver uses a
+    	server-side cursor, then yields DataFrames of at most chunksize rows. dateTime is
+    	converted to local Australia/Brisbane time in each chunk. The connection is held
+    	open until the generator is exhausted or closed, e.g. when a client disconnects.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the range.
+        end_time (int): Unix timestamp for the end of the range.
+        columns (list): Validated column names to select (see resolve_export_columns).
+        chunksize (int): Maximum number of rows per chunk.
+    Yields:
+        pandas.DataFrame: Chunk of archive rows in ascending dateTime order.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    query = text(f"""
+        SELECT {','.join(columns)}
+        FROM archive
+        WHERE dateTime >= :start AND dateTime <= :end
+        ORDER BY dateTime ASC
+    """)
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True)
+        for chunk in pd.read_sql(query, conn, params={'start': start_time, 'end': end_time}, chunksize=chunksize):
+            chunk['dateTime'] = pd.to_datetime(chunk['dateTime'], unit='s', utc=True).dt.tz_convert(EXPORT_TIMEZONE)
+            yield chunk
+
+def iter_csv(chunks, columns, compress=False):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Encode a stream of DataFrame chunks as CSV bytes, optionally gzip-compressed.
+    Description:
+    	Writes the header once followed by the rows of each chunk, yielding bytes as soon as
+    	each chunk is encoded. When compress is True the output is a single gzip stream built
+    	incrementally with zlib, so compression also runs in constant memory.
+    Args:
+        chunks (iterable): DataFrame chunks, e.g. from iter_archive_chunks.
+        columns (list): Column names, used for the header if no chunks are produced.
+        compress (bool): Whether to gzip the CSV output.
+    Yields:
+        bytes: Pieces of the (compressed) CSV file.
+    Raises:
+        Exception: When reading a chunk fails.
+    """
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+    header = True
+    for chunk in chunks:
+        data = chunk.to_csv(index=False, header=header).encode('utf-8')
+        header = False
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if header:
+        data = (','.join(columns) + '\n').encode('utf-8')
+        yield compressor.compress(data) if compressor else data
+    if compressor:
+        yield compressor.flush()
+
+def convert_chunk_to_metric(chunk):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Convert a DataFrame chunk of archive rows from database units to metric.
+    Description:
+    	Applies METRIC_CONVERSIONS to every column present in the chunk, using the same
+    	conversions as the dashboard (°F to °C, inHg to hPa, inches to mm, mph to km/h,
+    	miles to km and feet to meters). Columns without a conversion are left as-is.
+    Args:
+        chunk (pandas.DataFrame): Chunk of archive rows in database units.
+    Returns:
+        pandas.DataFrame: The same chunk with converted columns.
+    Raises:
+        None
+    """
+    for column, (offset, scale) in METRIC_CONVERSIONS.items():
+        if column in chunk:
+            chunk[column] = (chunk[column] + offset) * scale
+    return chunk
+
+def export_schema(columns):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Build the Arrow schema for a columnar export.
+    Description:
+    	dateTime is a second-resolution timestamp in local time, conditions is a dictionary-encoded
+    	WeatherAPI condition code (only a few dozen distinct values, so it compresses to almost
+    	nothing) and every other column is float64. Using a fixed schema keeps all record batches
+    	identical even when a chunk happens to contain only NULLs for a column.
+    Args:
+        columns (list): Validated column names to export.
+    Returns:
+        pyarrow.Schema: Schema for the export's record batches.
+    Raises:
+        None
+    """
+    fields = []
+    for column in columns:
+        if column == 'dateTime':
+            fields.append(pa.field(column, pa.timestamp('s', tz=EXPORT_TIMEZONE)))
+        elif column == 'conditions':
+            fields.append(pa.field(column, pa.dictionary(pa.int16(), pa.int32())))
+        else:
+            fields.append(pa.field(column, pa.float64()))
+    return pa.schema(fields)
+
+def conform_array(array, field):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Cast an Arrow array to the type of an export schema field.
+    Description:
+    	Dictionary fields (conditions) are encoded against the fixed CONDITION_CODES dictionary
+    	rather than one built per batch, because an Arrow IPC file only allows a single dictionary
+    	per field across all batches. Codes outside the WeatherAPI list become null.
+    Args:
+        array (pyarrow.Array): Array read from the database or a cached chunk.
+        field (pyarrow.Field): Field from export_schema.
+    Returns:
+        pyarrow.Array: Array of the field's type.
+    Raises:
+        pyarrow.ArrowInvalid: When a value can't be represented in the field's type.
+    """
+    if not pa.types.is_dictionary(field.type):
+        return array.cast(field.type)
+    if pa.types.is_dictionary(array.type):
+        array = array.dictionary_decode()
+    dictionary = pa.array(CONDITION_CODES, type=field.type.value_type)
+    indices = pc.index_in(array.cast(field.type.value_type), value_set=dictionary)
+    return pa.DictionaryArray.from_arrays(indices.cast(field.type.index_type), dictionary)
+
+def chunk_to_record_batch(chunk, schema):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Convert a DataFrame chunk of archive rows into an Arrow record batch.
+    Description:
+    	Builds each column explicitly against the export schema, turning NaN into nulls and
+    	dictionary-encoding the conditions code (stored as a float because it may be NULL).
+    Args:
+        chunk (pandas.DataFrame): Chunk of archive rows, e.g. from iter_archive_chunks.
+        schema (pyarrow.Schema): Export schema from export_schema.
+    Returns:
+        pyarrow.RecordBatch: Record batch matching the schema.
+    Raises:
+        pyarrow.ArrowInvalid: When a value can't be represented in the schema.
+    """
+    arrays = []
+    for field in schema:
+        if field.name == 'dateTime':
+            array = pa.array(chunk['dateTime'], from_pandas=True)
+        else:
+            array = pa.array(chunk[field.name], type=pa.float64(), from_pandas=True)
+        arrays.append(conform_array(array, field))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+def convert_batch_to_metric(batch):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Convert an Arrow record batch of archive rows from database units to metric.
+    Description:
+    	Arrow counterpart of convert_chunk_to_metric, used for batches read back from cached
+    	Parquet chunks so they don't need a round trip through pandas.
+    Args:
+        batch (pyarrow.RecordBatch): Record batch in database units.
+    Returns:
+        pyarrow.RecordBatch: Record batch with converted columns.
+    Raises:
+        None
+    """
+    arrays = []
+    for field, array in zip(batch.schema, batch.columns):
+        if field.name in METRIC_CONVERSIONS:
+            offset, scale = METRIC_CONVERSIONS[field.name]
+            array = pc.multiply(pc.add(array, offset), scale)
+        arrays.append(array)
+    return pa.RecordBatch.from_arrays(arrays, schema=batch.schema)
+
+def local_midnight(dt):
+    """Return the local (Australia/Brisbane) midnight at the start of dt's day."""
+    tz = pytz.timezone(EXPORT_TIMEZONE)
+    return tz.localize(datetime(dt.year, dt.month, dt.day))
+
+def today_start_time(now=None):
+    """Return the Unix timestamp of local midnight today; archive rows before it no longer change."""
+    local_now = datetime.fromtimestamp((now or datetime.now()).timestamp(), pytz.timezone(EXPORT_TIMEZONE))
+    return int(local_midnight(local_now).timestamp())
+
+def split_export_range(start_time, end_time, now=None):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Split an export range into cacheable calendar months/days and live pieces.
+    Description:
+    	Walks the range in local time. Whole calendar months that ended before today become
+    	month pieces keyed 'YYYY-MM', remaining whole days that ended before today become day
+    	pieces keyed 'YYYY-MM-DD', and anything else (partial days and today) becomes a live
+    	piece with a key of None. Adjacent live pieces are merged so each gap costs a single
+    	query. Archive rows for past days no longer change, so the keyed pieces can be cached.
+    Args:
+        start_time (int): Unix timestamp for the start of the range (inclusive).
+        end_time (int): Unix timestamp for the end of the range (inclusive).
+        now (datetime, optional): Current time, used to decide which days are fully past.
+    Returns:
+        list: (start_time, end_time, key) tuples covering the range in order.
+    Raises:
+        None
+    """
+    tz = pytz.timezone(EXPORT_TIMEZONE)
+    today_start = today_start_time(now)
+
+    pieces = []
+    cursor = start_time
+    while cursor <= end_time:
+        local = datetime.fromtimestamp(cursor, tz)
+        day_start = local_midnight(local)
+        next_day = int(local_midnight(day_start + timedelta(days=1)).timestamp())
+        month_start = tz.localize(datetime(local.year, local.month, 1))
+        if local.month == 12:
+            next_month = int(tz.localize(datetime(local.year + 1, 1, 1)).timestamp())
+        else:
+            next_month = int(tz.localize(datetime(local.year, local.month + 1, 1)).timestamp())
+
+        if cursor == int(month_start.timestamp()) and next_month - 1 <= end_time and next_month <= today_start:
+            pieces.append((cursor, next_month - 1, local.strftime('%Y-%m')))
+            cursor = next_month
+        elif cursor == int(day_start.timestamp()) and next_day - 1 <= end_time and next_day <= today_start:
+            pieces.append((cursor, next_day - 1, local.strftime('%Y-%m-%d')))
+            cursor = next_day
+        else:
+            piece_end = min(end_time, next_day - 1)
+            if pieces and pieces[-1][2] is None:
+                pieces[-1] = (pieces[-1][0], piece_end, None)
+            else:
+                pieces.append((cursor, piece_end, None))
+            cursor = piece_end + 1
+    return pieces
+
+def get_cache_lock(key):
+    """Return the lock guarding creation of the cache file with the given key."""
+    with cache_locks_lock:
+        return cache_locks.setdefault(key, threading.Lock())
+
+def get_chunk_cache_path(key):
+    """Return the path of the cached canonical Parquet chunk for a 'YYYY-MM' or 'YYYY-MM-DD' key."""
+    return os.path.join(EXPORT_CACHE_DIR, 'chunks', f'{key}.parquet')
+
+def invalidate_export_cache(start_time, end_time):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Remove cached exports that may hold archive rows changed after they were cached.
+    Description:
+    	Cached chunks are only built for fully past months and days, on the assumption that
+    	those rows don't change. When past rows are updated (such as by the conditions
+    	backfill in update_conditions.py), the chunks overlapping the changed range are
+    	deleted so they are rebuilt from the database, along with every cached artifact,
+    	as artifact keys don't record which chunks they were built from.
+    Args:
+        start_time (int): Unix timestamp of the first changed row.
+        end_time (int): Unix timestamp of the last changed row.
+    Returns:
+        int: Number of cached files removed.
+    Raises:
+        OSError: When a cached file can't be removed.
+    """
+    tz = pytz.timezone(EXPORT_TIMEZONE)
+    removed = 0
+    chunks_dir = os.path.join(EXPORT_CACHE_DIR, 'chunks')
+    for name in (os.listdir(chunks_dir) if os.path.isdir(chunks_dir) else []):
+        key = name[:-len('.parquet')] if name.endswith('.parquet') else None
+        try:
+            period_start = tz.localize(datetime.strptime(key, '%Y-%m-%d' if len(key) == 10 else '%Y-%m'))
+        except (TypeError, ValueError):
+            continue
+        if len(key) == 10:
+            period_end = period_start + timedelta(days=1)
+        else:
+            period_end = tz.localize((period_start.replace(tzinfo=None) + timedelta(days=32)).replace(day=1))
+        if period_start.timestamp() <= end_time and period_end.timestamp() > start_time:
+            os.remove(os.path.join(chunks_dir, name))
+            removed += 1
+    artifacts_dir = os.path.join(EXPORT_CACHE_DIR, 'artifacts')
+    for name in (os.listdir(artifacts_dir) if os.path.isdir(artifacts_dir) else []):
+        os.remove(os.path.join(artifacts_dir, name))
+        removed += 1
+    return removed
+
+def prune_export_artifacts(keep=(), max_bytes=EXPORT_ARTIFACT_MAX_BYTES, max_age=EXPORT_ARTIFACT_TTL):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Remove cached artifacts that are unused or over the size limit.
+    Description:
+    	An artifact's modification time is its last use, as build_export_file touches it on
+    	every cache hit. Artifacts not used for max_age seconds are removed, then the least
+    	recently used are removed until the rest fit in max_bytes. Artifacts in keep (such as
+    	the files of export jobs waiting to be downloaded), artifacts used in the last
+    	EXPORT_ARTIFACT_GRACE seconds and files still being written are never removed.
+    Args:
+        keep (iterable): Paths of artifacts to keep.
+        max_bytes (int): Maximum total size of the artifacts kept.
+        max_age (int): Seconds since last use after which an artifact is removed.
+    Returns:
+        int: Number of artifacts removed.
+    Raises:
+        None
+    """
+    artifacts_dir = os.path.join(EXPORT_CACHE_DIR, 'artifacts')
+    keep = {os.path.abspath(path) for path in keep}
+    now = time.time()
+    artifacts = []
+    for name in (os.listdir(artifacts_dir) if os.path.isdir(artifacts_dir) else []):
+        path = os.path.join(artifacts_dir, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        if not name.endswith('.tmp'):
+            artifacts.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in artifacts)
+    removed = 0
+    for used, size, path in sorted(artifacts):
+        if now - used < max_age and total <= max_bytes:
+            break
+        if now - used < EXPORT_ARTIFACT_GRACE or os.path.abspath(path) in keep:
+            continue
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    return removed
+
+def write_export_file(batches, schema, fmt, path):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Write a stream of record batches to a compressed Parquet or Arrow file, or a CSV file.
+    Description:
+    	Writes each batch as it arrives (one Parquet row group or Arrow IPC batch per chunk)
+    	using zstd compression, or appends it to a CSV file with a single header. The file is written under a temporary name and renamed into
+    	place, so a concurrent reader never sees a partial file and a failed export leaves
+    	nothing behind.
+    Args:
+        batches (iterable): Record batches matching the schema.
+        schema (pyarrow.Schema): Schema of the file.
+        fmt (str): 'csv', 'parquet' or 'arrow'.
+        path (str): Destination file path.
+    Returns:
+        int: Number of rows written.
+    Raises:
+        Exception: When reading a batch or writing the file fails.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    rows = 0
+    try:
+        if fmt == 'csv':
+            with open(tmp_path, 'w', newline='') as f:
+                f.write(','.join(schema.names) + '\n')
+                for batch in batches:
+                    batch.to_pandas().to_csv(f, index=False, header=False)
+                    rows += batch.num_rows
+        else:
+            if fmt == 'parquet':
+                writer = pq.ParquetWriter(tmp_path, schema, compression=EXPORT_COMPRESSION)
+            else:
+                writer = pa.ipc.new_file(tmp_path, schema,
+                                         options=pa.ipc.IpcWriteOptions(compression=EXPORT_COMPRESSION))
+            with writer:
+                for batch in batches:
+                    writer.write_batch(batch)
+                    rows += batch.num_rows
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return rows
+
+def ensure_cached_chunk(engine, start_time, end_time, key):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Make sure the canonical Parquet chunk for a fully past month or day exists.
+    Description:
+    	Cached chunks hold every export column in database units, so a single file serves any
+    	column selection, unit system and output format. Missing chunks are built by streaming
+    	the period from the database. Concurrent exports needing the same chunk wait for the
+    	first one to build it rather than querying the database again.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the period.
+        end_time (int): Unix timestamp for the end of the period.
+        key (str): 'YYYY-MM' or 'YYYY-MM-DD' cache key from split_export_range.
+    Returns:
+        str: Path of the cached chunk.
+    Raises:
+        Exception: When database query or file writing fails.
+    """
+    path = get_chunk_cache_path(key)
+    with get_cache_lock(path):
+        if not os.path.exists(path):
+            schema = export_schema(EXPORT_COLUMNS)
+            batches = (chunk_to_record_batch(chunk, schema)
+                       for chunk in iter_archive_chunks(engine, start_time, end_time, EXPORT_COLUMNS))
+            write_export_file(batches, schema, 'parquet', path)
+    return path
+
+def iter_export_batches(engine, start_time, end_time, columns, metric=False, now=None):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Stream an export range as Arrow record batches, using cached chunks where possible.
+    Description:
+    	Splits the range with split_export_range. Fully past months and days are read back from
+    	their cached Parquet chunks (building them first if needed), projecting only the requested
+    	columns; the remaining pieces are streamed straight from the database. Batches are
+    	optionally converted to metric units.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the range.
+        end_time (int): Unix timestamp for the end of the range.
+        columns (list): Validated column names to export.
+        metric (bool): Whether to convert values to metric units.
+        now (datetime, optional): Current time, used to decide which days are fully past.
+    Yields:
+        pyarrow.RecordBatch: Batches matching export_schema(columns), in dateTime order.
+    Raises:
+        Exception: When database query or file reading fails.
+    """
+    schema = export_schema(columns)
+    for piece_start, piece_end, key in split_export_range(start_time, end_time, now):
+        if key:
+            parquet_file = pq.ParquetFile(ensure_cached_chunk(engine, piece_start, piece_end, key))
+            batches = (pa.RecordBatch.from_arrays([conform_array(batch.column(f.name), f) for f in schema],
+                                                  schema=schema)
+                       for batch in parquet_file.iter_batches(batch_size=EXPORT_CHUNK_SIZE, columns=columns))
+        else:
+            batches = (chunk_to_record_batch(chunk, schema)
+                       for chunk in iter_archive_chunks(engine, piece_start, piece_end, columns))
+        for batch in batches:
+            yield convert_batch_to_metric(batch) if metric else batch
+
+def get_export_key(start_time, end_time, columns, fmt, metric):
+    """Return a stable key identifying an export's range, columns, format and units."""
+    return hashlib.sha1(
+        f"{start_time}|{end_time}|{','.join(columns)}|{metric}|{fmt}".encode('utf-8')
+    ).hexdigest()
+
+def build_export_file(engine, start_time, end_time, columns, fmt, metric=False, now=None, progress=None):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Produce an export file for a range, reusing cached artifacts.
+    Description:
+    	When the whole range lies before today the finished file is cached under a key derived
+    	from the range, columns, units and format, so repeat downloads are just file sends. Other
+    	ranges are written to a temporary file that the caller should delete or move once it has
+    	been used. An optional progress callback is called with each record batch after it has
+    	been written.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the range.
+        end_time (int): Unix timestamp for the end of the range.
+        columns (list): Validated column names to export.
+        fmt (str): 'csv', 'parquet' or 'arrow'.
+        metric (bool): Whether to convert values to metric units.
+        now (datetime, optional): Current time, used to decide which days are fully past.
+        progress (callable, optional): Called with each pyarrow.RecordBatch as it is written.
+    Returns:
+        tuple: (path, is_temporary) for the export file.
+    Raises:
+        Exception: When database query or file writing fails.
+    """
+    extension = EXPORT_FORMATS[fmt][0]
+
+    def batches():
+        for batch in iter_export_batches(engine, start_time, end_time, columns, metric, now):
+            yield batch
+            if progress:
+                progress(batch)
+
+    if end_time < today_start_time(now):
+        key = get_export_key(start_time, end_time, columns, fmt, metric)
+        path = os.path.join(EXPORT_CACHE_DIR, 'artifacts', key + extension)
+        with get_cache_lock(path):
+            if os.path.exists(path):
+                os.utime(path)  # Record the use, for prune_export_artifacts
+            else:
+                write_export_file(batches(), export_schema(columns), fmt, path)
+        return path, False
+
+    os.makedirs(EXPORT_CACHE_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=EXPORT_CACHE_DIR, suffix=extension)
+    os.close(fd)
+    write_export_file(batches(), export_schema(columns), fmt, path)
+    return path, True
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Forecast Model Backtester
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Walk-forward backtest for the AI forecast models. For each of the last --folds days,
+and for each combination of training window length and model size, the weather, wind
+and temperature models are trained on the window of stored features ending 24 hours
+before that day (so no training target overlaps it) and scored on that day's rows.
+Folds run in parallel worker processes.
+
+The output is a skill-versus-cost table with one row per configuration: accuracy of
+the condition labels, MAE of the temperature extremes and their skill against a
+persistence forecast (the last 24 hours' extremes), alongside mean training time,
+peak memory and total tree nodes. This shows what longer --days windows and larger
+forests actually buy, without the optimism of evaluating on neighbouring 5-minute rows.
+
+Usage:
+    python3 backtest.py --windows 14,30,60 --trees 50,150 --folds 14
+"""
+
+import os
+import sys
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from ai_forecaster import (
+    FEATURES, FORECAST_HOURS, MIN_RECORDS_REQUIRED, update_feature_store, load_features, label_weather,
+    measure_training
+)
+
+PERSISTENCE_ROWS = FORECAST_HOURS * 12  # Trailing rows whose extremes make the persistence forecast
+
+# Labeled history shared with each worker process by init_worker
+history = None
+
+def init_worker(df):
+    """Store the labeled history in a worker process."""
+    global history
+    history = df
+
+def parse_list(value, cast=int):
+    """Parse a comma-separated argument, treating 'none' as None."""
+    return [None if item.strip().lower() == 'none' else cast(item) for item in value.split(',')]
+
+def run_fold(window_days, n_estimators, max_depth, test_day):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Train the forecast models for one configuration and score them on one day.
+    Description:
+        Trains on the window_days of labeled rows ending FORECAST_HOURS before test_day
+        and scores on test_day's rows. Each forest is built single-threaded, as folds
+        already run one per worker process.
+    Args:
+        window_days (int): Length of the training window in days.
+        n_estimators (int): Trees per forest.
+        max_depth (int): Maximum tree depth, or None for unlimited.
+        test_day (pandas.Timestamp): Start of the day to score.
+    Returns:
+        dict: Scores and cost for the fold, or None when there isn't enough data.
+    Raises:
+        None
+    """
+    train_end = test_day - pd.Timedelta(hours=FORECAST_HOURS)
+    train = history[(history.index >= train_end - pd.Timedelta(days=window_days)) & (history.index < train_end)]
+    test = history[(history.index >= test_day) & (history.index < test_day + pd.Timedelta(days=1))]
+    if len(train) < MIN_RECORDS_REQUIRED or test.empty:
+        return None
+
+    X_train, X_test = train[FEATURES], test[FEATURES]
+    report = []
+    models = {}
+    with measure_training('fold', report):
+        for name, target in (('weather', 'label'), ('wind', 'wind_label')):
+            models[name] = RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42,
+                                                  class_weight='balanced', n_jobs=1)
+            models[name].fit(X_train, train[target])
+        for name in ('max_temp', 'min_temp'):
+            models[name] = RandomForestRegressor(n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=1)
+            models[name].fit(X_train, train[f'{name}_future'])
+
+    result = {
+        'weather_acc': np.mean(models['weather'].predict(X_test) == test['label'].to_numpy()),
+        'wind_acc': np.mean(models['wind'].predict(X_test) == test['wind_label'].astype(str).to_numpy()),
+        'seconds': report[0]['seconds'],
+        'peak_rss_mb': report[0]['peak_rss_mb'],
+        'nodes': sum(estimator.tree_.node_count for model in models.values() for estimator in model.estimators_)
+    }
+    for name, persistence in (('max_temp', 'persist_max'), ('min_temp', 'persist_min')):
+        result[f'{name}_mae'] = np.mean(np.abs(models[name].predict(X_test) - test[f'{name}_future'])) * 5/9
+        result[f'{name}_persist_mae'] = np.mean(np.abs(test[persistence] - test[f'{name}_future'])) * 5/9
+    return result
+
+def summarise(results):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Combine fold results into one row per configuration.
+    Description:
+        Averages scores and costs over each configuration's folds. Temperature skill is
+        1 - MAE / persistence MAE, so 0 is no better than repeating the last 24 hours'
+        extremes and 1 is perfect.
+    Args:
+        results (list): (window_days, n_estimators, max_depth, fold result) tuples.
+    Returns:
+        pandas.DataFrame: Skill-versus-cost table.
+    Raises:
+        None
+    """
+    rows = pd.DataFrame([
+        {'window_days': window, 'trees': trees, 'max_depth': depth if depth is not None else 'none', **result}
+        for window, trees, depth, result in results if result is not None
+    ])
+    table = rows.groupby(['window_days', 'trees', 'max_depth'], sort=False).agg(
+        folds=('seconds', 'size'),
+        weather_acc=('weather_acc', 'mean'),
+        wind_acc=('wind_acc', 'mean'),
+        max_temp_mae=('max_temp_mae', 'mean'),
+        max_temp_persist_mae=('max_temp_persist_mae', 'mean'),
+        min_temp_mae=('min_temp_mae', 'mean'),
+        min_temp_persist_mae=('min_temp_persist_mae', 'mean'),
+        train_seconds=('seconds', 'mean'),
+        peak_rss_mb=('peak_rss_mb', 'max'),
+        nodes=('nodes', 'mean')
+    ).reset_index()
+    table['max_temp_skill'] = 1 - table['max_temp_mae'] / table['max_temp_persist_mae']
+    table['min_temp_skill'] = 1 - table['min_temp_mae'] / table['min_temp_persist_mae']
+    return table
+
+def print_table(table):
+    """Print the skill-versus-cost table."""
+    print(f"\n{'Window':>6} {'Trees':>5} {'Depth':>5} {'Folds':>5} {'Weather':>7} {'Wind':>5} "
+          f"{'Max MAE':>7} {'Skill':>6} {'Min MAE':>7} {'Skill':>6} {'Train s':>7} {'RSS MB':>7} {'Nodes k':>7}")
+    for row in table.itertuples():
+        rss = f"{row.peak_rss_mb:.0f}" if pd.notna(row.peak_rss_mb) else 'n/a'
+        print(f"{row.window_days:>5}d {row.trees:>5} {row.max_depth:>5} {row.folds:>5} {row.weather_acc:>7.3f} "
+              f"{row.wind_acc:>5.3f} {row.max_temp_mae:>7.2f} {row.max_temp_skill:>6.2f} {row.min_temp_mae:>7.2f} "
+              f"{row.min_temp_skill:>6.2f} {row.train_seconds:>7.2f} {rss:>7} {row.nodes / 1000:>7.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Walk-forward backtest of the AI forecast models')
+    parser.add_argument('--windows', default='14,30,60', help='Comma-separated training window lengths in days (default: 14,30,60)')
+    parser.add_argument('--trees', default='50,150', help='Comma-separated trees per forest (default: 50,150)')
+    parser.add_argument('--max-depth', default='none', help="Comma-separated maximum tree depths, 'none' for unlimited (default: none)")
+    parser.add_argument('--folds', type=int, default=14, help='Number of most recent days to score (default: 14)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: all cores)')
+    parser.add_argument('--output', help='Optional CSV file to write the table to')
+    args = parser.parse_args()
+
+    windows = parse_list(args.windows)
+    tree_counts = parse_list(args.trees)
+    depths = parse_list(args.max_depth)
+    days = max(windows) + args.folds + 2 + FORECAST_HOURS // 24
+
+    print(f"Updating feature store with last {days} days of data...")
+    update_feature_store(days)
+    df = load_features(days=days)
+    df['persist_max'] = df['outTemp'].rolling(window=PERSISTENCE_ROWS).max()
+    df['persist_min'] = df['outTemp'].rolling(window=PERSISTENCE_ROWS).min()
+    df = label_weather(df).dropna(subset=['persist_max', 'persist_min'])
+
+    last_day = df.index.max().floor('D')
+    test_days = [last_day - pd.Timedelta(days=k) for k in range(1, args.folds + 1)]
+    configs = list(itertools.product(windows, tree_counts, depths))
+    tasks = [config + (day,) for config in configs for day in test_days]
+    print(f"Running {len(tasks)} folds ({len(configs)} configurations x {len(test_days)} days) on {args.workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(df,)) as executor:
+        futures = [executor.submit(run_fold, *task) for task in tasks]
+        results = [task[:3] + (future.result(),) for task, future in zip(tasks, futures)]
+
+    if all(result is None for *_, result in results):
+        print("\U0001F6D1 Not enough data for any fold.")
+        sys.exit(1)
+    table = summarise(results)
+    print_table(table)
+    if args.output:
+        table.to_csv(args.output, index=False)
+        print(f"\nTable written to {args.output}")
+
+if __name__ == "__main__":
+    main()
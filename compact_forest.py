@@ -0,0 +1,240 @@
+"""
+Compact Forest
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Compact, memory-mappable copies of the trained random forests. scikit-learn keeps
+each tree as a separate object with 64-bit node arrays, so a pickle of several
+150-tree forests grown without depth limits is large and slow to load. A
+CompactForest holds every tree of a forest in a few flat arrays (int32 children and
+features, float32 thresholds and values), optionally keeping fewer trees and pruning
+them to a maximum depth. Saved with joblib, the arrays can be loaded with
+mmap_mode='r' so loading is nearly instant and pages are only read when used.
+
+Pruning cuts each tree at max_depth and uses the stored value of the node it was
+cut at, which scikit-learn keeps for internal nodes as well as leaves. Thresholds are
+rounded down to the nearest float32, so on the float32 inputs scikit-learn itself
+uses, unpruned compact trees route every row exactly as the originals.
+"""
+
+import time
+import numpy as np
+import joblib
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+class CompactForest:
+    """
+    Flat-array random forest with the prediction interface of the scikit-learn forests.
+
+    Nodes of all trees are stored back to back, with node_offsets[i] the index of tree
+    i's root, and can stand in for RandomForestClassifier and RandomForestRegressor in
+    the forecaster and in forest_uncertainty. Built with compact_forest. Rows are routed
+    through all trees at once, one tree level per numpy step.
+    """
+
+    def predict(self, X):
+        """Predict class labels or regression outputs, averaging over the trees."""
+        values = self.value[self.apply(X) + self.node_offsets[np.newaxis, :-1]].mean(axis=1, dtype=np.float64)
+        if self.classes_ is not None:
+            return self.classes_[values.argmax(axis=1)]
+        return values[:, 0] if self.n_outputs_ == 1 else values
+
+    def predict_proba(self, X):
+        """Predict class probabilities, averaging over the trees."""
+        return self.value[self.apply(X) + self.node_offsets[np.newaxis, :-1]].mean(axis=1, dtype=np.float64)
+
+    def apply(self, X):
+        """Return the leaf index, within its tree, of every row in every tree."""
+        X = np.asarray(X[self.feature_names_in_] if hasattr(X, 'columns') else X, dtype=np.float32)
+        rows = np.arange(len(X))[:, np.newaxis]
+        nodes = np.repeat(self.node_offsets[np.newaxis, :-1], len(X), axis=0)
+        for _ in range(self.max_depth):
+            left = self.children_left[nodes]
+            internal = left >= 0
+            if not internal.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(internal, np.where(go_left, left, self.children_right[nodes]), nodes)
+        return nodes - self.node_offsets[np.newaxis, :-1]
+
+def get_node_depths(children_left, children_right):
+    """Return the depth of every node in a tree, working down one level at a time."""
+    depth = np.zeros(len(children_left), dtype=np.int32)
+    level = np.array([0])
+    while len(level):
+        level = level[children_left[level] >= 0]
+        children = np.concatenate([children_left[level], children_right[level]])
+        depth[children] = np.concatenate([depth[level], depth[level]]) + 1
+        level = children
+    return depth
+
+def prune_tree(tree, max_depth=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Convert one scikit-learn tree to compact arrays, pruned to max_depth.
+    Description:
+        Nodes deeper than max_depth are dropped and nodes at max_depth become leaves. Kept
+        nodes are renumbered in their original order. Thresholds are rounded down to
+        float32 so comparisons with float32 inputs are unchanged.
+    Args:
+        tree (sklearn.tree._tree.Tree): Fitted tree structure (estimator.tree_).
+        max_depth (int, optional): Maximum depth to keep. None keeps the whole tree.
+    Returns:
+        tuple: (arrays, node_map, depth) with a dictionary of the pruned node arrays, an
+            array mapping every original node to its pruned node (descendants of a cut
+            node map to it), and the depth of the pruned tree.
+    Raises:
+        None
+    """
+    children_left = tree.children_left
+    children_right = tree.children_right
+    depth = get_node_depths(children_left, children_right)
+    max_depth = depth.max() if max_depth is None else min(max_depth, depth.max())
+
+    keep = depth <= max_depth
+    new_ids = np.cumsum(keep) - 1
+    parent = np.arange(len(depth))
+    internal = children_left >= 0
+    parent[children_left[internal]] = np.flatnonzero(internal)
+    parent[children_right[internal]] = np.flatnonzero(internal)
+    ancestor = np.arange(len(depth))
+    while (depth[ancestor] > max_depth).any():
+        ancestor = np.where(depth[ancestor] > max_depth, parent[ancestor], ancestor)
+    node_map = new_ids[ancestor].astype(np.int32)
+
+    leaf = ~internal[keep] | (depth[keep] == max_depth)
+    threshold = tree.threshold[keep].astype(np.float32)
+    rounded_up = threshold > tree.threshold[keep]
+    threshold[rounded_up] = np.nextafter(threshold[rounded_up], np.float32(-np.inf))
+    arrays = {
+        'children_left': np.where(leaf, -1, new_ids[np.maximum(children_left[keep], 0)]).astype(np.int32),
+        'children_right': np.where(leaf, -1, new_ids[np.maximum(children_right[keep], 0)]).astype(np.int32),
+        'feature': np.where(leaf, 0, tree.feature[keep]).astype(np.int32),
+        'threshold': np.where(leaf, 0, threshold).astype(np.float32),
+        'value': tree.value[keep]
+    }
+    return arrays, node_map, int(max_depth)
+
+def compact_forest(forest, max_depth=None, max_trees=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Build a CompactForest from a fitted random forest.
+    Description:
+        Keeps the first max_trees trees (the trees of a random forest are independent,
+        so any subset is an unbiased smaller forest), prunes each to max_depth and
+        concatenates their node arrays. Child indexes are stored as global node indexes.
+        Classifier values are stored as normalized class probabilities and regressor
+        values as one column per output, both as float32.
+    Args:
+        forest (RandomForestClassifier or RandomForestRegressor): Fitted forest.
+        max_depth (int, optional): Maximum tree depth to keep.
+        max_trees (int, optional): Maximum number of trees to keep.
+    Returns:
+        tuple: (CompactForest, node_maps) where node_maps has one array per kept tree
+            mapping original node indexes to pruned ones.
+    Raises:
+        None
+    """
+    estimators = forest.estimators_[:max_trees]
+    pruned = [prune_tree(estimator.tree_, max_depth) for estimator in estimators]
+    offsets = np.concatenate([[0], np.cumsum([len(arrays['feature']) for arrays, _, _ in pruned])]).astype(np.int32)
+
+    compact = CompactForest()
+    compact.node_offsets = offsets
+    compact.max_depth = max(depth for _, _, depth in pruned)
+    compact.n_estimators = len(estimators)
+    compact.n_outputs_ = forest.n_outputs_
+    compact.feature_names_in_ = forest.feature_names_in_
+    compact.n_features_in_ = forest.n_features_in_
+    for name in ('children_left', 'children_right'):
+        setattr(compact, name, np.concatenate([
+            np.where(arrays[name] >= 0, arrays[name] + offset, -1) for (arrays, _, _), offset in zip(pruned, offsets)
+        ]).astype(np.int32))
+    compact.feature = np.concatenate([arrays['feature'] for arrays, _, _ in pruned])
+    compact.threshold = np.concatenate([arrays['threshold'] for arrays, _, _ in pruned])
+
+    values = np.concatenate([arrays['value'] for arrays, _, _ in pruned])
+    if isinstance(forest, RandomForestClassifier):
+        values = values[:, 0, :]
+        values = values / values.sum(axis=1, keepdims=True)
+        compact.classes_ = forest.classes_
+    else:
+        values = values[:, :, 0]
+        compact.classes_ = None
+    compact.value = np.ascontiguousarray(values, dtype=np.float32)
+    return compact, [node_map for _, node_map, _ in pruned]
+
+def compact_quantile_index(quantile_index, node_maps):
+    """Remap a quantile regression forest index to the nodes of a compacted forest."""
+    train_leaves = quantile_index['train_leaves']
+    return {
+        'train_leaves': np.column_stack([node_map[train_leaves[:, i]] for i, node_map in enumerate(node_maps)]).astype(np.int32),
+        'y': quantile_index['y'].astype(np.float32)
+    }
+
+def compact_models(models, max_depth=None, max_trees=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Compact every random forest in a model dictionary.
+    Description:
+        Replaces each RandomForestClassifier and RandomForestRegressor with a
+        CompactForest and remaps any matching quantile regression forest index
+        ('<name>_qrf') to the pruned trees. Other entries are kept as they are.
+    Args:
+        models (dict): Dictionary of trained models.
+        max_depth (int, optional): Maximum tree depth to keep.
+        max_trees (int, optional): Maximum number of trees to keep per forest.
+    Returns:
+        dict: Dictionary of compacted models.
+    Raises:
+        None
+    """
+    compacted = dict(models)
+    for name, model in models.items():
+        if isinstance(model, (RandomForestClassifier, RandomForestRegressor)):
+            compacted[name], node_maps = compact_forest(model, max_depth, max_trees)
+            if f'{name}_qrf' in models:
+                compacted[f'{name}_qrf'] = compact_quantile_index(models[f'{name}_qrf'], node_maps)
+    return compacted
+
+def measure_model_load(path, mmap_mode=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Measure how long a model file takes to load and how much memory it occupies.
+    Description:
+        Meant to run in a fresh child process, so the resident memory increase reflects
+        only this model file. With mmap_mode, arrays are mapped rather than read, so
+        their pages only count towards resident memory once used.
+    Args:
+        path (str): Path of the model file.
+        mmap_mode (str, optional): joblib mmap_mode, e.g. 'r'.
+    Returns:
+        tuple: (load seconds, resident memory increase in MB, or None without /proc).
+    Raises:
+        Exception: When the model file can't be loaded.
+    """
+    from ai_forecaster import get_rss_bytes
+    start_rss = get_rss_bytes()
+    start = time.perf_counter()
+    models = joblib.load(path, mmap_mode=mmap_mode)
+    elapsed = time.perf_counter() - start
+    end_rss = get_rss_bytes()
+    del models
+    return elapsed, (end_rss - start_rss) / 2**20 if start_rss is not None else None
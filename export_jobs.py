@@ -0,0 +1,234 @@
+"""
+Background Export Jobs
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Runs large archive exports in a bounded pool of background threads so multi-year
+extracts don't tie up a web worker. A job is submitted with a range, format, unit
+system and column set, and gets back a job ID that can be polled for progress and
+used to download the finished file.
+
+Job status is kept in small JSON files under export_cache/jobs, so any web worker
+process can answer a poll. Exports are built with archive_export.build_export_file,
+which reuses the cached monthly and daily Parquet chunks; identical jobs that are
+already queued or running are shared rather than started again.
+"""
+
+import os
+import json
+import uuid
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import pyarrow.compute as pc
+from archive_export import EXPORT_CACHE_DIR, EXPORT_FORMATS, build_export_file, get_export_key, prune_export_artifacts
+
+EXPORT_JOB_WORKERS = 2  # Maximum number of exports running at once
+EXPORT_JOB_TTL = 86400  # 24 hours in seconds before finished jobs and their files are removed
+EXPORT_JOBS_DIR = os.path.join(EXPORT_CACHE_DIR, 'jobs')
+
+export_job_executor = ThreadPoolExecutor(max_workers=EXPORT_JOB_WORKERS, thread_name_prefix='export-job')
+
+# Jobs queued or running in this process, keyed by export key, so identical requests share one job
+active_export_jobs = {}
+active_export_jobs_lock = threading.Lock()
+
+def get_job_path(job_id):
+    """Return the path of the status file for a job."""
+    return os.path.join(EXPORT_JOBS_DIR, f'{job_id}.json')
+
+def save_job(job):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Write a job's status file.
+    Description:
+    	Writes the job dictionary to a temporary file and renames it into place, so a poll
+    	from another process never reads a half-written status.
+    Args:
+        job (dict): Job status dictionary.
+    Returns:
+        None
+    Raises:
+        OSError: When the status file can't be written.
+    """
+    os.makedirs(EXPORT_JOBS_DIR, exist_ok=True)
+    path = get_job_path(job['job_id'])
+    tmp_path = f'{path}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(job, f)
+    os.replace(tmp_path, path)
+
+def get_export_job(job_id):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Look up the status of an export job.
+    Description:
+    	Reads the job's status file. Job IDs are validated as UUIDs so they can't be used to
+    	read arbitrary files.
+    Args:
+        job_id (str): Job ID returned by submit_export_job.
+    Returns:
+        dict: Job status dictionary, or None if the job doesn't exist.
+    Raises:
+        None
+    """
+    try:
+        job_id = uuid.UUID(job_id).hex
+    except ValueError:
+        return None
+    try:
+        with open(get_job_path(job_id), 'r') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+def purge_expired_jobs():
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Remove finished jobs older than EXPORT_JOB_TTL, and prune the artifact cache.
+    Description:
+    	Deletes the status file of each expired job along with its export file when that file
+    	belongs to the job. Cached artifacts for fully past ranges are shared, so they are left
+    	to prune_export_artifacts, which keeps the artifacts of jobs that haven't expired.
+    Args:
+        None
+    Returns:
+        None
+    Raises:
+        None
+    """
+    now = time.time()
+    keep = []
+    for name in (os.listdir(EXPORT_JOBS_DIR) if os.path.isdir(EXPORT_JOBS_DIR) else []):
+        if not name.endswith('.json'):
+            continue
+        job = get_export_job(name[:-5])
+        if not job:
+            continue
+        if job['status'] not in ('done', 'failed') or now - job.get('finished', now) < EXPORT_JOB_TTL:
+            if job.get('path'):
+                keep.append(job['path'])
+            continue
+        try:
+            if job.get('path', '').startswith(EXPORT_JOBS_DIR):
+                os.remove(job['path'])
+            os.remove(get_job_path(job['job_id']))
+        except OSError:
+            pass
+    prune_export_artifacts(keep)
+
+def run_export_job(job, engine_factory):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Build the export file for a job, recording progress as it goes.
+    Description:
+    	Runs on a worker thread. Progress is estimated from how far through the requested time
+    	range the latest written batch reaches. Exports that end today are written to a temporary
+    	file which is moved into the jobs directory; fully past exports use the shared artifact
+    	cache. Any failure is recorded in the job rather than raised.
+    Args:
+        job (dict): Job status dictionary created by submit_export_job.
+        engine_factory (callable): Returns a SQLAlchemy engine for the weewx database.
+    Returns:
+        None
+    Raises:
+        None
+    """
+    job['status'] = 'running'
+    job['started'] = time.time()
+    save_job(job)
+    span = max(job['end_time'] - job['start_time'], 1)
+
+    def progress(batch):
+        job['rows'] += batch.num_rows
+        latest = pc.max(batch.column('dateTime')).as_py()
+        if latest is not None:
+            job['progress'] = round(min(100.0, 100.0 * (latest.timestamp() - job['start_time']) / span), 1)
+        save_job(job)
+
+    try:
+        path, is_temporary = build_export_file(
+            engine_factory(), job['start_time'], job['end_time'], job['columns'], job['format'],
+            job['metric'], progress=progress
+        )
+        if is_temporary:
+            final_path = os.path.join(EXPORT_JOBS_DIR, job['job_id'] + EXPORT_FORMATS[job['format']][0])
+            os.replace(path, final_path)
+            path = final_path
+        job.update({'status': 'done', 'progress': 100.0, 'path': path, 'size': os.path.getsize(path)})
+    except Exception as e:
+        print(f"Error running export job {job['job_id']}: {e}")
+        job.update({'status': 'failed', 'error': str(e)})
+    finally:
+        job['finished'] = time.time()
+        save_job(job)
+        with active_export_jobs_lock:
+            active_export_jobs.pop(job['key'], None)
+
+def submit_export_job(engine_factory, start_time, end_time, columns, fmt, metric, label):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Queue a background export job, sharing an identical job if one is already active.
+    Description:
+    	Creates a job for the given export and submits it to the bounded worker pool. If an
+    	identical export (same range, columns, format and units) is already queued or running
+    	in this process, that job is returned instead so the work is only done once. Expired
+    	jobs are purged on each submission.
+    Args:
+        engine_factory (callable): Returns a SQLAlchemy engine for the weewx database.
+        start_time (int): Unix timestamp for the start of the range.
+        end_time (int): Unix timestamp for the end of the range.
+        columns (list): Validated column names to export.
+        fmt (str): 'csv', 'parquet' or 'arrow'.
+        metric (bool): Whether to convert values to metric units.
+        label (str): Range label used to build the download filename.
+    Returns:
+        dict: Job status dictionary.
+    Raises:
+        OSError: When the job's status file can't be written.
+    """
+    purge_expired_jobs()
+    key = get_export_key(start_time, end_time, columns, fmt, metric)
+    with active_export_jobs_lock:
+        if key in active_export_jobs:
+            return active_export_jobs[key]
+        job = {
+            'job_id': uuid.uuid4().hex,
+            'key': key,
+            'status': 'queued',
+            'start_time': start_time,
+            'end_time': end_time,
+            'columns': columns,
+            'format': fmt,
+            'metric': metric,
+            'filename': f"weather_data_{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{EXPORT_FORMATS[fmt][0]}",
+            'progress': 0.0,
+            'rows': 0,
+            'submitted': time.time(),
+        }
+        save_job(job)
+        active_export_jobs[key] = job
+    export_job_executor.submit(run_export_job, job, engine_factory)
+    return job
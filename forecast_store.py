@@ -0,0 +1,202 @@
+"""
+Forecast Store
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+SQLite store for the daily forecasts shown on the dashboard, replacing forecasts.json.
+Each date is one row keyed by date, holding the forecast dictionary as JSON, so saving
+a forecast is a single upsert instead of loading, changing and rewriting the whole
+file. Writes run in transactions (writers wait for each other rather than overwriting
+each other's changes) and the database uses write-ahead logging, so the web app can
+read while ai_forecaster or predictor writes.
+
+Every write also increments a revision number in the same transaction. The web app
+keeps the current forecast in memory and only reads it again when the revision, or
+the date, changes.
+
+On first use the entries in forecasts.json are imported.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from sqlalchemy import create_engine, text
+
+FORECAST_STORE_PATH = "/home/dave/projects/weather_predictor/forecasts/forecasts.db"
+FORECASTS_JSON_PATH = "/home/dave/projects/weather_predictor/forecasts/forecasts.json"
+STORE_BUSY_TIMEOUT = 30  # Seconds a writer waits for another writer's transaction to finish
+
+# Forecast served by the web app, valid while the store revision and date are unchanged
+forecast_cache = {'store': None, 'revision': None, 'date': None, 'forecast': None}
+forecast_cache_lock = threading.Lock()
+
+def open_forecast_store(path=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Open the forecast store, creating it if needed.
+    Description:
+        Creates a SQLAlchemy engine for the store, switches it to write-ahead logging and
+        creates its tables. When the store is empty, the forecasts saved to forecasts.json
+        before the store existed are imported.
+    Args:
+        path (str, optional): Path of the store. Defaults to FORECAST_STORE_PATH.
+    Returns:
+        sqlalchemy.engine.Engine: Engine for the store.
+    Raises:
+        Exception: When the store can't be created.
+    """
+    path = path or FORECAST_STORE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    store = create_engine(f'sqlite:///{path}', connect_args={'timeout': STORE_BUSY_TIMEOUT})
+    with store.connect() as conn:
+        conn.exec_driver_sql("PRAGMA journal_mode=WAL")
+    with store.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS forecasts (
+                date TEXT PRIMARY KEY, forecast TEXT NOT NULL, updated INTEGER NOT NULL
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS store_revision (
+                id INTEGER PRIMARY KEY CHECK (id = 0), revision INTEGER NOT NULL
+            )
+        """))
+        conn.execute(text("INSERT OR IGNORE INTO store_revision (id, revision) VALUES (0, 0)"))
+        empty = conn.execute(text("SELECT NOT EXISTS (SELECT 1 FROM forecasts)")).scalar()
+    if empty:
+        import_forecasts_json(store)
+    return store
+
+def bump_revision(conn):
+    """Increment the store revision inside a write transaction."""
+    conn.execute(text("UPDATE store_revision SET revision = revision + 1 WHERE id = 0"))
+
+def import_forecasts_json(store, path=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Import the forecasts saved to forecasts.json before the store existed.
+    Description:
+        Inserts every date in the file in one transaction, keeping any forecast already in
+        the store for that date. A missing or unreadable file imports nothing.
+    Args:
+        store (sqlalchemy.engine.Engine): Forecast store from open_forecast_store.
+        path (str, optional): Path of forecasts.json. Defaults to FORECASTS_JSON_PATH.
+    Returns:
+        int: Number of forecasts imported.
+    Raises:
+        Exception: When the store can't be written.
+    """
+    path = path or FORECASTS_JSON_PATH
+    if not os.path.exists(path):
+        return 0
+    try:
+        with open(path, 'r') as f:
+            forecasts = json.load(f)
+    except json.JSONDecodeError:
+        return 0
+    rows = [{'date': date, 'forecast': json.dumps(forecast), 'updated': int(os.path.getmtime(path))}
+            for date, forecast in forecasts.items() if isinstance(forecast, dict)]
+    if not rows:
+        return 0
+    with store.begin() as conn:
+        imported = conn.execute(text("""
+            INSERT OR IGNORE INTO forecasts (date, forecast, updated) VALUES (:date, :forecast, :updated)
+        """), rows).rowcount
+        bump_revision(conn)
+    return imported
+
+def save_forecast(date, forecast, store=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Save the forecast for a date, replacing any forecast already saved for it.
+    Description:
+        Upserts the date's row and increments the store revision in one transaction, so
+        readers see either the old forecast or the new one and concurrent writers can't
+        lose each other's dates.
+    Args:
+        date (str): Forecast date in YYYY-MM-DD format.
+        forecast (dict): JSON-serialisable forecast dictionary.
+        store (sqlalchemy.engine.Engine, optional): Forecast store. Defaults to the store
+            at FORECAST_STORE_PATH.
+    Returns:
+        None
+    Raises:
+        Exception: When the store can't be written.
+    """
+    with (store or open_forecast_store()).begin() as conn:
+        conn.execute(text("""
+            INSERT INTO forecasts (date, forecast, updated) VALUES (:date, :forecast, :updated)
+            ON CONFLICT (date) DO UPDATE SET forecast = excluded.forecast, updated = excluded.updated
+        """), {'date': date, 'forecast': json.dumps(forecast), 'updated': int(time.time())})
+        bump_revision(conn)
+
+def get_forecast(date, store=None):
+    """Return the forecast saved for a YYYY-MM-DD date, or None."""
+    with (store or open_forecast_store()).connect() as conn:
+        value = conn.execute(text("SELECT forecast FROM forecasts WHERE date = :date"), {'date': date}).scalar()
+    return json.loads(value) if value is not None else None
+
+def get_latest_forecast(on_or_before=None, store=None):
+    """Return the forecast with the latest date (no later than on_or_before, if given), or None."""
+    query = "SELECT forecast FROM forecasts" + (" WHERE date <= :date" if on_or_before else "")
+    with (store or open_forecast_store()).connect() as conn:
+        value = conn.execute(text(query + " ORDER BY date DESC LIMIT 1"), {'date': on_or_before}).scalar()
+    return json.loads(value) if value is not None else None
+
+def get_forecasts(start=None, end=None, store=None):
+    """Return {date: forecast} for dates from start up to (not including) end, oldest first."""
+    conditions = [condition for condition, value in (("date >= :start", start), ("date < :end", end)) if value]
+    query = "SELECT date, forecast FROM forecasts" + (" WHERE " + " AND ".join(conditions) if conditions else "")
+    with (store or open_forecast_store()).connect() as conn:
+        rows = conn.execute(text(query + " ORDER BY date"), {'start': start, 'end': end}).all()
+    return {date: json.loads(forecast) for date, forecast in rows}
+
+def get_revision(store):
+    """Return the store revision, which changes with every write."""
+    with store.connect() as conn:
+        return conn.execute(text("SELECT revision FROM store_revision WHERE id = 0")).scalar()
+
+def get_current_forecast():
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get today's forecast, or the most recent one, from memory.
+    Description:
+        Returns the cached forecast while the store revision and today's date are
+        unchanged, which costs one primary key lookup. Otherwise today's forecast is read
+        again, falling back to the forecast with the latest date.
+    Args:
+        None
+    Returns:
+        dict: The forecast, or None when the store is empty.
+    Raises:
+        Exception: When the store can't be read.
+    """
+    with forecast_cache_lock:
+        cache = forecast_cache
+        if cache['store'] is None:
+            cache['store'] = open_forecast_store()
+        today = datetime.now().date().isoformat()
+        revision = get_revision(cache['store'])
+        if cache['revision'] != revision or cache['date'] != today:
+            forecast = get_forecast(today, cache['store']) or get_latest_forecast(store=cache['store'])
+            cache.update({'revision': revision, 'date': today, 'forecast': forecast})
+        return cache['forecast']
@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Forecast Verification
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Checks the daily forecasts against what actually happened. Forecasts are recorded
+in a local SQLite store when they are issued, by ai_forecaster.save_predictions
+('ai') and by predictor's daily Prophet run ('prophet'). Forecasts already in
+the forecast store are imported too, so earlier history can be verified. Only the first
+forecast issued for each date and model is kept, so repeated runs later in the day
+can't improve the score with hindsight.
+
+Observations come from a daily rollup in the weewx database: one GROUP BY query
+returns each local day's min and max temperature, rainfall and lightning strikes,
+instead of fetching the raw 5-minute rows. Days are rolled up once, after they end,
+so each update only queries the days that aren't in the store yet.
+
+Skill is computed over rolling windows ending yesterday:
+- mean absolute error of the max and min temperatures
+- the share of days within TEMP_HIT_TOLERANCE of the observed temperature
+- Brier score and hit rate of the chance of rain (a rain day has at least
+  RAIN_DAY_MM) and of the chance of lightning (any strike)
+
+Usage:
+    python3 forecast_verification.py
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+from forecast_store import get_forecasts
+
+load_dotenv()
+
+DB_USER = 'weewx'
+DB_PASSWORD = os.getenv('WEEWX_DB_PASSWORD')
+DB_HOST = '10.1.1.126'
+DB_NAME = 'weewx'
+
+VERIFICATION_STORE_PATH = "/home/dave/projects/weather_predictor/forecast_verification.db"
+LOCAL_UTC_OFFSET = 10 * 3600  # Australia/Brisbane is UTC+10 with no daylight saving
+MIN_DAY_RECORDS = 240  # 5-minute records (of 288) a day needs to be verified
+RAIN_DAY_MM = 0.2  # Rainfall that counts as a rain day, as used by the Bureau of Meteorology
+TEMP_HIT_TOLERANCE = 2.0  # °C within which a temperature forecast counts as a hit
+SKILL_WINDOWS = (7, 30, 90)  # Days in each rolling window reported by get_skill
+
+# Day the store was last brought up to date, shared by web app requests
+verification_state = {'updated': None}
+verification_lock = threading.Lock()
+
+def get_engine():
+    """Create a SQLAlchemy engine for the weewx database."""
+    return create_engine(f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}')
+
+def open_verification_store(path=None):
+    """Create a SQLAlchemy engine for the verification store, creating its tables if needed."""
+    path = path or VERIFICATION_STORE_PATH
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    store = create_engine(f'sqlite:///{path}')
+    with store.begin() as conn:
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS issued_forecasts (
+                date TEXT, model TEXT, issued INTEGER, min_temp REAL, max_temp REAL,
+                chance_of_rain REAL, chance_of_lightning REAL, condition TEXT,
+                PRIMARY KEY (date, model)
+            )
+        """))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS daily_observations (
+                date TEXT PRIMARY KEY, min_temp REAL, max_temp REAL, rain_mm REAL,
+                lightning_strikes INTEGER, records INTEGER
+            )
+        """))
+    return store
+
+def get_local_today():
+    """Return today's local date as YYYY-MM-DD."""
+    return time.strftime('%Y-%m-%d', time.gmtime(time.time() + LOCAL_UTC_OFFSET))
+
+def get_day_start(date):
+    """Return the Unix time of local midnight at the start of a YYYY-MM-DD date."""
+    return int(pd.Timestamp(date).timestamp()) - LOCAL_UTC_OFFSET
+
+def get_forecast_model(forecast):
+    """Return the model a forecast store entry was written by."""
+    return 'ai' if 'ai_forecast' in forecast else 'prophet'
+
+def record_forecast(model, date, forecast, issued=None, store=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Record an issued forecast in the verification store.
+    Description:
+        Stores the verifiable fields of a forecast dictionary, as saved to the forecast store,
+        for a date and model. If a forecast for that date and model is already stored it
+        is kept, so the score reflects the first forecast issued for each day.
+    Args:
+        model (str): Name of the model that issued the forecast, e.g. 'ai' or 'prophet'.
+        date (str): Forecast date in YYYY-MM-DD format.
+        forecast (dict): Forecast dictionary with predicted_min_temp, predicted_max_temp
+            and, for AI forecasts, chance_of_rain, chance_of_lightning and ai_forecast.
+        issued (int, optional): Unix time the forecast was issued. Defaults to now.
+        store (sqlalchemy.engine.Engine, optional): Verification store. Defaults to the
+            store at VERIFICATION_STORE_PATH.
+    Returns:
+        bool: True when the forecast was recorded, False when one was already stored.
+    Raises:
+        Exception: When the store can't be written.
+    """
+    row = {
+        'date': date,
+        'model': model,
+        'issued': int(issued if issued is not None else time.time()),
+        'min_temp': forecast.get('predicted_min_temp'),
+        'max_temp': forecast.get('predicted_max_temp'),
+        'chance_of_rain': forecast.get('chance_of_rain'),
+        'chance_of_lightning': forecast.get('chance_of_lightning'),
+        'condition': forecast.get('ai_forecast')
+    }
+    with (store or open_verification_store()).begin() as conn:
+        result = conn.execute(text("""
+            INSERT OR IGNORE INTO issued_forecasts
+                (date, model, issued, min_temp, max_temp, chance_of_rain, chance_of_lightning, condition)
+            VALUES (:date, :model, :issued, :min_temp, :max_temp, :chance_of_rain, :chance_of_lightning, :condition)
+        """), row)
+    return result.rowcount > 0
+
+def import_stored_forecasts(store, forecast_store=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Import past forecasts from the forecast store into the verification store.
+    Description:
+        The forecast store holds one forecast per date, from whichever model saved last, so
+        each entry is recorded under the model that wrote it. Only dates before today are
+        imported: a forecast for today may still be replaced. The issue time is unknown
+        and recorded as the start of the forecast date.
+    Args:
+        store (sqlalchemy.engine.Engine): Verification store from open_verification_store.
+        forecast_store (sqlalchemy.engine.Engine, optional): Forecast store. Defaults to the
+            store at forecast_store.FORECAST_STORE_PATH.
+    Returns:
+        int: Number of forecasts imported.
+    Raises:
+        Exception: When the store can't be written.
+    """
+    imported = 0
+    for date, forecast in get_forecasts(end=get_local_today(), store=forecast_store).items():
+        if isinstance(forecast, dict):
+            imported += record_forecast(get_forecast_model(forecast), date, forecast, issued=get_day_start(date),
+                                        store=store)
+    return imported
+
+def rollup_days(engine, first_date, end_date):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the observed daily min/max temperature, rainfall and lightning from the archive.
+    Description:
+        Groups archive rows by local day in the database, so only one row per day is
+        returned however many 5-minute records the range holds. Temperatures are
+        converted to Celsius and rainfall to millimetres. Prophet forecasts are for the
+        same local days, as predictor.fetch_daily_data groups its history the same way.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for the weewx database.
+        first_date (str): First local date to roll up, YYYY-MM-DD.
+        end_date (str): Local date to stop before, YYYY-MM-DD.
+    Returns:
+        pandas.DataFrame: One row per day with records, with date, min_temp, max_temp,
+            rain_mm, lightning_strikes and records columns.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    query = text("""
+        SELECT FLOOR((dateTime + :offset) / 86400) AS day,
+               MIN(outTemp) AS min_temp,
+               MAX(outTemp) AS max_temp,
+               SUM(rain) AS rain,
+               SUM(lightning_strike_count) AS lightning_strikes,
+               COUNT(*) AS records
+        FROM archive
+        WHERE dateTime >= :start AND dateTime < :end
+        GROUP BY day
+    """)
+    with engine.connect() as conn:
+        df = pd.read_sql(query, conn, params={
+            'offset': LOCAL_UTC_OFFSET, 'start': get_day_start(first_date), 'end': get_day_start(end_date)
+        })
+    return pd.DataFrame({
+        'date': pd.to_datetime(df['day'].astype('int64') * 86400, unit='s').dt.strftime('%Y-%m-%d'),
+        'min_temp': (df['min_temp'] - 32) * 5/9,
+        'max_temp': (df['max_temp'] - 32) * 5/9,
+        'rain_mm': df['rain'].fillna(0) * 25.4,
+        'lightning_strikes': df['lightning_strikes'].fillna(0).astype(int),
+        'records': df['records'].astype(int)
+    })
+
+def update_observations(store, engine):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Roll up the observations for forecast days that haven't been observed yet.
+    Description:
+        Finds the past forecast dates with no observation row and rolls up the archive
+        from the earliest of them to the start of today. Days without any archive records
+        are stored with a record count of zero, so they aren't queried again; days with
+        fewer than MIN_DAY_RECORDS records are stored but left out of the skill scores.
+    Args:
+        store (sqlalchemy.engine.Engine): Verification store from open_verification_store.
+        engine (sqlalchemy.engine.Engine): Database engine for the weewx database.
+    Returns:
+        int: Number of days added.
+    Raises:
+        Exception: When database or store operations fail.
+    """
+    today = get_local_today()
+    with store.connect() as conn:
+        missing = [row[0] for row in conn.execute(text("""
+            SELECT DISTINCT f.date FROM issued_forecasts f
+            LEFT JOIN daily_observations o ON o.date = f.date
+            WHERE o.date IS NULL AND f.date < :today
+            ORDER BY f.date
+        """), {'today': today})]
+    if not missing:
+        return 0
+
+    days = rollup_days(engine, missing[0], today).set_index('date')
+    rows = [
+        {'date': date, 'min_temp': None, 'max_temp': None, 'rain_mm': None, 'lightning_strikes': None, 'records': 0}
+        if date not in days.index else {'date': date, **days.loc[date].to_dict()}
+        for date in missing
+    ]
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, np.generic):
+                row[key] = value.item()
+    with store.begin() as conn:
+        conn.execute(text("""
+            INSERT OR REPLACE INTO daily_observations (date, min_temp, max_temp, rain_mm, lightning_strikes, records)
+            VALUES (:date, :min_temp, :max_temp, :rain_mm, :lightning_strikes, :records)
+        """), rows)
+    return len(rows)
+
+def update_verification(engine=None, store=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Bring the verification store up to date.
+    Description:
+        Imports any new past forecasts from the forecast store and rolls up the observations
+        for days that have ended since the last update.
+    Args:
+        engine (sqlalchemy.engine.Engine, optional): Engine for the weewx database.
+            Defaults to a new engine from get_engine.
+        store (sqlalchemy.engine.Engine, optional): Verification store. Defaults to the
+            store at VERIFICATION_STORE_PATH.
+    Returns:
+        tuple: (forecasts imported, days observed).
+    Raises:
+        Exception: When database or store operations fail.
+    """
+    store = store or open_verification_store()
+    imported = import_stored_forecasts(store)
+    observed = update_observations(store, engine or get_engine())
+    verification_state['updated'] = get_local_today()
+    return imported, observed
+
+def score_forecasts(df):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Score verified forecasts for one model and window.
+    Description:
+        Computes temperature MAE and hit rates, and the Brier score and hit rate of the
+        rain and lightning chances (a chance of 50% or more counts as forecasting the
+        event). Each score only uses the days where that forecast was made, and is None
+        when there are none, e.g. rain scores for the Prophet model.
+    Args:
+        df (pandas.DataFrame): Joined forecast and observation rows.
+    Returns:
+        dict: Scores rounded to 3 decimal places, with the number of days verified.
+    Raises:
+        None
+    """
+    scores = {'days': len(df)}
+    for name in ('max_temp', 'min_temp'):
+        errors = (df[f'{name}_forecast'] - df[f'{name}_observed']).abs().dropna()
+        scores[f'{name}_mae'] = errors.mean() if len(errors) else None
+        scores[f'{name}_hit_rate'] = (errors <= TEMP_HIT_TOLERANCE).mean() if len(errors) else None
+    events = {'rain': df['rain_mm'] >= RAIN_DAY_MM, 'lightning': df['lightning_strikes'] > 0}
+    for name, happened in events.items():
+        chance = df[f'chance_of_{name}'] / 100
+        made = chance.notna()
+        scores[f'{name}_brier'] = ((chance[made] - happened[made]) ** 2).mean() if made.any() else None
+        scores[f'{name}_hit_rate'] = ((chance[made] >= 0.5) == happened[made]).mean() if made.any() else None
+    return {key: round(float(value), 3) if value is not None and key != 'days' else value for key, value in scores.items()}
+
+def get_skill(windows=SKILL_WINDOWS, store=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the rolling skill scores of each forecast model.
+    Description:
+        Joins the issued forecasts with the observed daily rollups (days with at least
+        MIN_DAY_RECORDS records) and scores each model over each window of days ending
+        yesterday.
+    Args:
+        windows (tuple): Window lengths in days.
+        store (sqlalchemy.engine.Engine, optional): Verification store. Defaults to the
+            store at VERIFICATION_STORE_PATH.
+    Returns:
+        dict: Scores keyed by model, then by window ('7d', '30d', ...).
+    Raises:
+        Exception: When the store can't be read.
+    """
+    query = text("""
+        SELECT f.model, f.date,
+               f.max_temp AS max_temp_forecast, o.max_temp AS max_temp_observed,
+               f.min_temp AS min_temp_forecast, o.min_temp AS min_temp_observed,
+               f.chance_of_rain, f.chance_of_lightning, o.rain_mm, o.lightning_strikes
+        FROM issued_forecasts f
+        JOIN daily_observations o ON o.date = f.date
+        WHERE o.records >= :min_records AND f.date >= :since
+        ORDER BY f.date
+    """)
+    today = get_local_today()
+    since = (datetime.strptime(today, '%Y-%m-%d') - timedelta(days=max(windows))).strftime('%Y-%m-%d')
+    with (store or open_verification_store()).connect() as conn:
+        df = pd.read_sql(query, conn, params={'min_records': MIN_DAY_RECORDS, 'since': since})
+
+    skill = {}
+    for model, rows in df.groupby('model'):
+        skill[model] = {}
+        for window in windows:
+            start = (datetime.strptime(today, '%Y-%m-%d') - timedelta(days=window)).strftime('%Y-%m-%d')
+            skill[model][f'{window}d'] = score_forecasts(rows[rows['date'] >= start])
+    return skill
+
+def get_forecast_skill(engine):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the rolling skill scores for the web app, updating the store once a day.
+    Description:
+        The first request of each day brings the verification store up to date before
+        scoring; later requests just read the store. If the update fails, for example
+        because the database is unreachable, the scores already stored are returned.
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine for the weewx database.
+    Returns:
+        dict: Scores from get_skill with the thresholds they were computed with.
+    Raises:
+        Exception: When the store can't be read.
+    """
+    store = open_verification_store()
+    with verification_lock:
+        if verification_state['updated'] != get_local_today():
+            try:
+                update_verification(engine, store)
+            except Exception as e:
+                print(f"Error updating forecast verification: {e}")
+    return {
+        'models': get_skill(store=store),
+        'updated': verification_state['updated'],
+        'rain_day_mm': RAIN_DAY_MM,
+        'temp_hit_tolerance': TEMP_HIT_TOLERANCE
+    }
+
+def main():
+    imported, observed = update_verification()
+    print(f"Imported {imported} forecasts and observed {observed} days.")
+    print(json.dumps(get_skill(), indent=4))
+
+if __name__ == "__main__":
+    main()
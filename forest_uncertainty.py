@@ -0,0 +1,201 @@
+"""
+Forest Uncertainty
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Batched uncertainty estimates for the random forest temperature models. Rather than
+calling predict on each of the forest's trees in turn, the leaf every row lands in is
+found for all trees at once with forest.apply (which runs across the forest's n_jobs),
+and the per-tree outputs are gathered from a precomputed table of leaf values. This
+gives the spread of the individual trees for any number of rows in a few numpy
+operations.
+
+Quantile regression forest intervals (Meinshausen, 2006) are also supported. The
+training rows sharing a leaf with a query row are weighted by 1 / leaf size in each
+tree, and quantiles are read from the weighted distribution of their targets. The
+leaf membership of the training rows is stored alongside the models by
+build_quantile_index.
+"""
+
+import weakref
+import numpy as np
+from scipy import sparse
+
+QUANTILE_CHUNK_ROWS = 256  # Query rows per dense weight matrix, bounds memory to rows x training rows
+
+# Leaf value tables, built once per fitted forest
+leaf_value_tables = weakref.WeakKeyDictionary()
+
+def get_leaf_value_table(forest):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Build a padded table of every tree's node values for a fitted regression forest.
+    Description:
+        Stacks tree_.value from each tree into an array of shape (n_trees, max_nodes,
+        n_outputs), padding smaller trees with zeros, so the output of every tree for
+        every row can be looked up with a single fancy-indexing operation. Tables are
+        cached per forest object and rebuilt when its trees change.
+    Args:
+        forest (sklearn.ensemble.RandomForestRegressor): Fitted regression forest.
+    Returns:
+        numpy.ndarray: Node value table of shape (n_trees, max_nodes, n_outputs).
+    Raises:
+        None
+    """
+    cached = leaf_value_tables.get(forest)
+    # Forests refreshed with warm start gain and lose trees, so check the cached table still matches
+    if cached is not None and cached[0] == [id(estimator) for estimator in forest.estimators_]:
+        return cached[1]
+    trees = [estimator.tree_ for estimator in forest.estimators_]
+    max_nodes = max(tree.node_count for tree in trees)
+    table = np.zeros((len(trees), max_nodes, forest.n_outputs_), dtype=np.float64)
+    for i, tree in enumerate(trees):
+        table[i, :tree.node_count, :] = tree.value[:, :, 0]
+    leaf_value_tables[forest] = ([id(estimator) for estimator in forest.estimators_], table)
+    return table
+
+def per_tree_predictions(forest, X):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the prediction of every tree in a regression forest for many rows at once.
+    Description:
+        Uses forest.apply to find each row's leaf in every tree, then gathers the leaf
+        values from the forest's leaf value table.
+    Args:
+        forest (sklearn.ensemble.RandomForestRegressor): Fitted regression forest, or a
+            compact_forest.CompactForest made from one.
+        X (pandas.DataFrame): Feature rows, with the columns the forest was trained on.
+    Returns:
+        numpy.ndarray: Per-tree predictions of shape (n_rows, n_trees, n_outputs).
+    Raises:
+        None
+    """
+    leaves = forest.apply(X)
+    if hasattr(forest, 'node_offsets'):
+        # CompactForest: node values are already stored back to back
+        return forest.value[leaves + forest.node_offsets[np.newaxis, :-1]]
+    table = get_leaf_value_table(forest)
+    return table[np.arange(table.shape[0])[np.newaxis, :], leaves]
+
+def forest_mean_std(forest, X):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the mean and spread of a regression forest's trees for many rows.
+    Description:
+        The mean equals forest.predict; the standard deviation across trees is the
+        uncertainty estimate used for the forecast error margins.
+    Args:
+        forest (sklearn.ensemble.RandomForestRegressor): Fitted regression forest.
+        X (pandas.DataFrame): Feature rows.
+    Returns:
+        tuple: (mean, std) arrays of shape (n_rows, n_outputs).
+    Raises:
+        None
+    """
+    preds = per_tree_predictions(forest, X)
+    return preds.mean(axis=1, dtype=np.float64), preds.std(axis=1, dtype=np.float64)
+
+def get_node_counts(forest):
+    """Return the number of nodes in each tree of a forest or CompactForest."""
+    if hasattr(forest, 'node_offsets'):
+        return np.diff(forest.node_offsets)
+    return np.array([estimator.tree_.node_count for estimator in forest.estimators_])
+
+def build_quantile_index(forest, X_train, y_train):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Record the leaf membership of the training rows for quantile regression forest intervals.
+    Description:
+        Stores the leaf of every training row in every tree (as int32) along with the
+        training targets. This is everything forest_quantiles needs to weight the training
+        targets for a query row; it is saved with the models.
+    Args:
+        forest (sklearn.ensemble.RandomForestRegressor): Forest fitted on X_train.
+        X_train (pandas.DataFrame): Training feature rows.
+        y_train (array-like): Training targets, of shape (n_rows,) or (n_rows, n_outputs).
+    Returns:
+        dict: Quantile index with 'train_leaves' and 'y' arrays.
+    Raises:
+        None
+    """
+    y = np.asarray(y_train, dtype=np.float64)
+    if y.ndim == 1:
+        y = y[:, np.newaxis]
+    return {'train_leaves': forest.apply(X_train).astype(np.int32), 'y': y}
+
+def forest_quantiles(forest, quantile_index, X, quantiles=(0.05, 0.5, 0.95)):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Compute quantile regression forest quantiles for many rows at once.
+    Description:
+        Builds a sparse matrix mapping every (tree, leaf) to the training rows in it,
+        weighted by 1 / leaf size. Multiplying the query rows' one-hot leaf matrix by it
+        gives the Meinshausen weight of every training row for every query row in one
+        sparse product. Each output's weighted CDF is then read off over the sorted
+        training targets. Query rows are processed in chunks of QUANTILE_CHUNK_ROWS to
+        bound memory.
+    Args:
+        forest (sklearn.ensemble.RandomForestRegressor): Fitted regression forest.
+        quantile_index (dict): Index from build_quantile_index for the same forest.
+        X (pandas.DataFrame): Feature rows.
+        quantiles (tuple): Quantiles to compute, between 0 and 1.
+    Returns:
+        numpy.ndarray: Quantiles of shape (n_rows, len(quantiles), n_outputs).
+    Raises:
+        None
+    """
+    train_leaves = quantile_index['train_leaves']
+    y = quantile_index['y']
+    n_train, n_trees = train_leaves.shape
+    node_counts = get_node_counts(forest)
+    offsets = np.concatenate([[0], np.cumsum(node_counts)[:-1]])
+
+    # (total nodes x training rows) matrix of 1 / leaf size for the rows in each leaf
+    global_leaves = train_leaves + offsets[np.newaxis, :]
+    leaf_sizes = np.bincount(global_leaves.ravel(), minlength=node_counts.sum())
+    leaf_matrix = sparse.csr_matrix(
+        (1.0 / leaf_sizes[global_leaves.ravel()],
+         (global_leaves.ravel(), np.repeat(np.arange(n_train), n_trees))),
+        shape=(node_counts.sum(), n_train)
+    )
+
+    query_leaves = forest.apply(X) + offsets[np.newaxis, :]
+    orders = [np.argsort(y[:, k], kind='stable') for k in range(y.shape[1])]
+    result = np.empty((len(query_leaves), len(quantiles), y.shape[1]))
+    levels = np.asarray(quantiles)[np.newaxis, :]
+
+    for start in range(0, len(query_leaves), QUANTILE_CHUNK_ROWS):
+        chunk = query_leaves[start:start + QUANTILE_CHUNK_ROWS]
+        query_matrix = sparse.csr_matrix(
+            (np.full(chunk.size, 1.0 / n_trees), (np.repeat(np.arange(len(chunk)), n_trees), chunk.ravel())),
+            shape=(len(chunk), leaf_matrix.shape[0])
+        )
+        weights = (query_matrix @ leaf_matrix).toarray()
+        for k, order in enumerate(orders):
+            cdf = np.cumsum(weights[:, order], axis=1)
+            # Index of the first sorted target where the CDF reaches each quantile
+            positions = (cdf[:, np.newaxis, :] < levels[:, :, np.newaxis]).sum(axis=2)
+            positions = np.minimum(positions, n_train - 1)
+            result[start:start + len(chunk), :, k] = y[order[positions], k]
+    return result
@@ -18,21 +18,17 @@ Cron example:
 
 import os
 import sys
-import json
-import time
-from datetime import datetime, timedelta
-import pandas as pd
-from sqlalchemy import create_engine
+from datetime import datetime
 
-# Add the current directory to the Python path so we can import from app.py
+# Add the current directory to the Python path so we can import from weekly_stats.py
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-# Import the cache generation function from app.py
+# Import the cache generation function from weekly_stats.py, which doesn't need Flask or Selenium
 try:
-    from app import generate_weekly_stats_cache
+    from weekly_stats import generate_weekly_stats_cache
 except ImportError:
-    print("Error: Could not import generate_weekly_stats_cache from app.py")
-    print("Make sure this script is in the same directory as app.py")
+    print("Error: Could not import generate_weekly_stats_cache from weekly_stats.py")
+    print("Make sure this script is in the same directory as weekly_stats.py")
     sys.exit(1)
 
 def main():
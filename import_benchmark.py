@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Import Time Benchmark
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Measures the cold start cost of each entry point. Every module is imported in a fresh
+interpreter with python -X importtime, and the total import time is checked against
+a budget, along with the heavy modules the entry point must not load at startup (the
+web app shouldn't load Selenium or the forecasting models until a request needs
+them). The heaviest imports are listed so a regression is easy to trace.
+
+Exits with status 1 when an entry point is over budget, loads a module it shouldn't
+or fails to import, so it can run as a check after changing imports.
+
+Usage:
+    python3 import_benchmark.py
+    python3 import_benchmark.py --modules app,generate_weekly_cache --top 5
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+
+# Import time budget in milliseconds, and modules that mustn't be imported, per entry point
+IMPORT_BUDGETS = {
+    'app': {'budget_ms': 600, 'forbidden': ('selenium', 'sklearn', 'pandas', 'pyarrow', 'sqlalchemy')},
+    'generate_weekly_cache': {'budget_ms': 1500, 'forbidden': ('flask', 'selenium', 'sklearn')},
+    'update_conditions': {'budget_ms': 1000, 'forbidden': ('pandas', 'sklearn')},
+    'forecast_verification': {'budget_ms': 1500, 'forbidden': ('sklearn',)},
+    'model_server': {'budget_ms': 4000, 'forbidden': ('flask', 'selenium')},
+    'ai_forecaster': {'budget_ms': 4000, 'forbidden': ('flask', 'selenium')},
+    'predictor': {'budget_ms': 4000, 'forbidden': ('flask', 'selenium')},
+}
+IMPORT_TOP = 10  # Heaviest imports listed per entry point
+
+def measure_imports(module=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Import a module in a fresh interpreter and measure the time taken by every import.
+    Description:
+        Runs python -X importtime -c "import <module>" from this directory and parses the
+        timings it writes to stderr. Each line gives the time spent in a module itself and
+        in total including the modules it imported. Without a module, only the modules the
+        interpreter imports at startup are measured.
+    Args:
+        module (str, optional): Name of the module to import.
+    Returns:
+        tuple: (timings, error) where timings is a list of (name, self_ms, cumulative_ms)
+            in import order and error is the last line of stderr when the import failed,
+            otherwise None.
+    Raises:
+        OSError: When the interpreter can't be started.
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}' if module else 'pass'],
+                            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    timings = []
+    other = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            other.append(line)
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # The column header
+        timings.append((fields[2].strip(), int(fields[0]) / 1000, int(fields[1]) / 1000))
+    error = None
+    if result.returncode != 0:
+        error = other[-1] if other else f'exit status {result.returncode}'
+    return timings, error
+
+def check_module(module, budget_ms, forbidden, top=IMPORT_TOP, startup=()):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Measure one entry point, print its heaviest imports and check it against its budget.
+    Description:
+        The total is the cumulative time of the module itself. A forbidden module counts
+        as loaded when it or any of its submodules was imported.
+    Args:
+        module (str): Name of the module to import.
+        budget_ms (float): Maximum total import time in milliseconds.
+        forbidden (tuple): Top-level modules that mustn't be imported.
+        top (int): Number of heaviest imports to print.
+        startup (set): Modules the interpreter imports at startup, left out of the list.
+    Returns:
+        list: Problems found, empty when the module is within budget.
+    Raises:
+        OSError: When the interpreter can't be started.
+    """
+    timings, error = measure_imports(module)
+    total_ms = next((cumulative for name, _, cumulative in reversed(timings) if name == module), None)
+    problems = []
+    if error:
+        problems.append(f'import failed: {error}')
+    elif total_ms is not None and total_ms > budget_ms:
+        problems.append(f'{total_ms:.0f} ms is over the {budget_ms} ms budget')
+    loaded = {name.split('.')[0] for name, _, _ in timings}
+    problems.extend(f'imports {name} at startup' for name in forbidden if name in loaded)
+
+    status = 'FAIL' if problems else 'OK'
+    total = f'{total_ms:.0f} ms' if total_ms is not None else 'n/a'
+    print(f"{module}: {total} (budget {budget_ms} ms, {len(timings)} modules) {status}")
+    # Only top-level packages, so a package and its submodules aren't listed twice
+    packages = {}
+    for name, _, cumulative in timings:
+        package = name.split('.')[0]
+        if name == package and package != module and package not in startup:
+            packages[package] = max(packages.get(package, 0), cumulative)
+    for name, cumulative in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"    {cumulative:9.1f} ms  {name}")
+    for problem in problems:
+        print(f"    {problem}")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import time of each entry point against its budget')
+    parser.add_argument('--modules', help=f"Comma-separated entry points to check (default: {','.join(IMPORT_BUDGETS)})")
+    parser.add_argument('--top', type=int, default=IMPORT_TOP, help=f'Heaviest imports to list per entry point (default: {IMPORT_TOP})')
+    args = parser.parse_args()
+
+    modules = args.modules.split(',') if args.modules else list(IMPORT_BUDGETS)
+    startup = {name for name, _, _ in measure_imports()[0]}
+    failed = []
+    for module in modules:
+        limits = IMPORT_BUDGETS.get(module, {'budget_ms': float('inf'), 'forbidden': ()})
+        if check_module(module, limits['budget_ms'], limits['forbidden'], args.top, startup):
+            failed.append(module)
+
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("All entry points within budget")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Model Engines
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Model backends for the AI forecaster. The 'forest' engine builds the random forests
+the forecaster has always used. The 'hgb' engine uses scikit-learn's histogram
+gradient boosting instead: features are binned into at most 255 levels and a few
+hundred small trees are grown one after another, so it trains much faster than 150
+full-depth trees and predicts through far fewer nodes.
+
+Gradient boosting has no spread across independent trees to use as an error margin,
+so for the temperature models extra regressors are trained with the quantile loss at
+each interval bound. The error margin is then the standard deviation of a normal
+distribution with the same interval.
+"""
+
+import numpy as np
+from scipy.stats import norm
+from sklearn.ensemble import (
+    RandomForestClassifier, RandomForestRegressor, HistGradientBoostingClassifier, HistGradientBoostingRegressor
+)
+
+ENGINES = ('forest', 'hgb')
+FOREST_TREES = 150  # Trees per random forest
+HGB_MAX_ITER = 300  # Boosting iterations (trees per class for classifiers)
+HGB_LEARNING_RATE = 0.1
+HGB_MAX_LEAF_NODES = 31
+
+def make_classifier(engine, n_jobs=-1):
+    """Return an unfitted condition classifier for the engine, with balanced class weights."""
+    if engine == 'hgb':
+        return HistGradientBoostingClassifier(max_iter=HGB_MAX_ITER, learning_rate=HGB_LEARNING_RATE,
+                                              max_leaf_nodes=HGB_MAX_LEAF_NODES, class_weight='balanced',
+                                              early_stopping=False, random_state=42)
+    return RandomForestClassifier(n_estimators=FOREST_TREES, random_state=42, class_weight='balanced', n_jobs=n_jobs)
+
+def make_regressor(engine, n_jobs=-1, quantile=None):
+    """Return an unfitted regressor for the engine, using the quantile loss when a quantile is given (hgb only)."""
+    if engine == 'hgb':
+        loss = {'loss': 'quantile', 'quantile': quantile} if quantile is not None else {}
+        return HistGradientBoostingRegressor(max_iter=HGB_MAX_ITER, learning_rate=HGB_LEARNING_RATE,
+                                             max_leaf_nodes=HGB_MAX_LEAF_NODES, early_stopping=False,
+                                             random_state=42, **loss)
+    return RandomForestRegressor(n_estimators=FOREST_TREES, random_state=42, n_jobs=n_jobs)
+
+def get_model_engine(models):
+    """Return the engine a model dictionary was trained with."""
+    return 'hgb' if isinstance(models['weather'], HistGradientBoostingClassifier) else 'forest'
+
+def train_quantile_models(X, y, quantiles):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Train one gradient boosting regressor per quantile for temperature intervals.
+    Description:
+        Each regressor is fitted with the quantile (pinball) loss, so its predictions
+        estimate that quantile of the target given the features. They are saved with the
+        models under '<name>_quantiles' and used by boosting_quantiles and
+        boosting_mean_std.
+    Args:
+        X (pandas.DataFrame): Training feature rows.
+        y (array-like): Training targets.
+        quantiles (tuple): Quantiles to fit, between 0 and 1.
+    Returns:
+        dict: Fitted regressor for each quantile.
+    Raises:
+        Exception: When model training fails.
+    """
+    return {q: make_regressor('hgb', quantile=q).fit(X, y) for q in quantiles}
+
+def boosting_quantiles(quantile_models, X, quantiles):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Predict temperature quantiles for many rows with the quantile regressors.
+    Description:
+        Independently fitted quantile regressors can occasionally cross, so each row's
+        predictions are sorted to keep the bounds in order. The result has the same
+        shape as forest_uncertainty.forest_quantiles for a single-output forest.
+    Args:
+        quantile_models (dict): Regressors from train_quantile_models.
+        X (pandas.DataFrame): Feature rows.
+        quantiles (tuple): Quantiles to predict; each needs a fitted regressor.
+    Returns:
+        numpy.ndarray: Quantiles of shape (n_rows, len(quantiles), 1).
+    Raises:
+        KeyError: When no regressor was fitted for one of the quantiles.
+    """
+    bounds = np.column_stack([quantile_models[q].predict(X) for q in quantiles])
+    return np.sort(bounds, axis=1)[:, :, np.newaxis]
+
+def boosting_mean_std(model, quantile_models, X):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the prediction and error margin of a gradient boosting temperature model.
+    Description:
+        The standard deviation is the width of the outermost quantile interval divided by
+        the width of the same interval of a standard normal distribution (3.29 for 5% to
+        95%), so it plays the same part as the spread across a forest's trees.
+    Args:
+        model (sklearn.ensemble.HistGradientBoostingRegressor): Fitted regressor.
+        quantile_models (dict): Regressors from train_quantile_models.
+        X (pandas.DataFrame): Feature rows.
+    Returns:
+        tuple: (mean, std) arrays of shape (n_rows, 1).
+    Raises:
+        None
+    """
+    low, high = min(quantile_models), max(quantile_models)
+    bounds = boosting_quantiles(quantile_models, X, (low, high))
+    std = (bounds[:, 1] - bounds[:, 0]) / (norm.ppf(high) - norm.ppf(low))
+    return model.predict(X)[:, np.newaxis], std
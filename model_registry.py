@@ -0,0 +1,323 @@
+"""
+Model Registry
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Versioned storage for the trained forecast models. Every retrain or refresh is saved
+as a new version directory under MODEL_REGISTRY_DIR/versions, holding the models
+(models.pkl), optionally their compact copy (compact.pkl), and metadata.json with the
+training window, features, metrics, training time and file sizes. A version is
+written to a hidden staging directory and renamed into place, so it either appears
+complete or not at all.
+
+The version being served is chosen by the 'current' symlink, which is replaced
+atomically with os.replace when a version is promoted. Readers resolve the link when
+they open a model file, so they always get one complete version, and the model
+server sees the new file on its next request and reloads. Every promotion is logged
+to promotions.jsonl with the version it replaced, so rolling back is just promoting
+that version again.
+"""
+
+import os
+import json
+import time
+import shutil
+from datetime import datetime
+import joblib
+
+MODEL_REGISTRY_DIR = "/home/dave/projects/weather_predictor/model_registry"
+MODEL_FILE = 'models.pkl'
+COMPACT_FILE = 'compact.pkl'
+METADATA_FILE = 'metadata.json'
+CURRENT_LINK = 'current'
+PROMOTION_LOG = 'promotions.jsonl'
+REGISTRY_KEEP_VERSIONS = 5  # Newest versions kept by prune_versions, besides the current and rollback versions
+
+def get_versions_dir():
+    """Return the directory holding every registered version."""
+    return os.path.join(MODEL_REGISTRY_DIR, 'versions')
+
+def get_version_dir(version):
+    """Return the directory of a registered version."""
+    return os.path.join(get_versions_dir(), version)
+
+def write_json_atomic(path, data):
+    """Write JSON to a temporary file and rename it into place."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+def read_metadata(version):
+    """Return the metadata of a registered version."""
+    with open(os.path.join(get_version_dir(version), METADATA_FILE), 'r') as f:
+        return json.load(f)
+
+def get_current_version():
+    """Return the promoted version, or None when nothing has been promoted."""
+    try:
+        return os.path.basename(os.readlink(os.path.join(MODEL_REGISTRY_DIR, CURRENT_LINK)))
+    except OSError:
+        return None
+
+def get_current_path(name=MODEL_FILE):
+    """Return the path of a file in the promoted version (resolved, not through the link), or None."""
+    version = get_current_version()
+    return os.path.join(get_version_dir(version), name) if version else None
+
+def get_path_version(path):
+    """Return the version a model file belongs to, or None when it isn't in the registry."""
+    directory = os.path.dirname(os.path.abspath(path))
+    return os.path.basename(directory) if os.path.dirname(directory) == os.path.abspath(get_versions_dir()) else None
+
+def new_version_id():
+    """Return a new version name from the current time, e.g. 20250101-020000."""
+    version = time.strftime('%Y%m%d-%H%M%S')
+    suffix = 1
+    while os.path.exists(get_version_dir(version if suffix == 1 else f'{version}-{suffix}')):
+        suffix += 1
+    return version if suffix == 1 else f'{version}-{suffix}'
+
+def stage_version(write_files, metadata):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Create a new version directory atomically.
+    Description:
+        Calls write_files with a hidden staging directory, records the size of every file
+        written in the metadata, writes metadata.json and renames the staging directory
+        to its version name. If anything fails, the staging directory is removed and no
+        version is created.
+    Args:
+        write_files (callable): Writes the version's files into the directory it's given.
+        metadata (dict): Metadata to store with the version.
+    Returns:
+        str: The new version name.
+    Raises:
+        Exception: When the files can't be written.
+    """
+    os.makedirs(get_versions_dir(), exist_ok=True)
+    version = new_version_id()
+    staging = os.path.join(get_versions_dir(), f'.{version}.{os.getpid()}.tmp')
+    os.makedirs(staging)
+    try:
+        write_files(staging)
+        metadata = {
+            'version': version,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            **metadata,
+            'size_bytes': {name: os.path.getsize(os.path.join(staging, name)) for name in (MODEL_FILE, COMPACT_FILE)
+                           if os.path.exists(os.path.join(staging, name))}
+        }
+        write_json_atomic(os.path.join(staging, METADATA_FILE), metadata)
+        os.rename(staging, get_version_dir(version))
+    except Exception:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return version
+
+def register_models(models, metadata):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Save trained models as a new registry version.
+    Description:
+        Dumps the model dictionary into a new version directory (see stage_version) along
+        with its metadata. The version isn't served until it is promoted.
+    Args:
+        models (dict): Dictionary of trained models.
+        metadata (dict): Training window, features, metrics and other details to store.
+    Returns:
+        str: The new version name.
+    Raises:
+        Exception: When the version can't be written.
+    """
+    return stage_version(lambda directory: joblib.dump(models, os.path.join(directory, MODEL_FILE)), metadata)
+
+def import_model_files(model_path, compact_path=None, metadata=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Register existing model files as a new version.
+    Description:
+        Used to bring models saved before the registry existed into it. Files are
+        hard-linked into the version directory where possible (so no extra space is used)
+        and copied otherwise.
+    Args:
+        model_path (str): Path of the full model file.
+        compact_path (str, optional): Path of a compact model file made from it.
+        metadata (dict, optional): Metadata to store with the version.
+    Returns:
+        str: The new version name.
+    Raises:
+        Exception: When the files can't be linked or copied.
+    """
+    def write_files(directory):
+        for source, name in ((model_path, MODEL_FILE), (compact_path, COMPACT_FILE)):
+            if source is None:
+                continue
+            try:
+                os.link(source, os.path.join(directory, name))
+            except OSError:
+                shutil.copy2(source, os.path.join(directory, name))
+    return stage_version(write_files, metadata or {})
+
+def add_version_file(version, name, obj, metadata_updates=None):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Add a file, such as the compact models, to an existing version.
+    Description:
+        Dumps obj to a temporary file in the version directory and renames it into place,
+        then updates the version's metadata with the file size and any other updates.
+    Args:
+        version (str): Registered version.
+        name (str): File name within the version, e.g. COMPACT_FILE.
+        obj (object): Object to dump with joblib.
+        metadata_updates (dict, optional): Extra metadata fields to set.
+    Returns:
+        str: Path of the new file.
+    Raises:
+        Exception: When the file or metadata can't be written.
+    """
+    path = os.path.join(get_version_dir(version), name)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        joblib.dump(obj, tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    metadata = read_metadata(version)
+    metadata.update(metadata_updates or {})
+    metadata.setdefault('size_bytes', {})[name] = os.path.getsize(path)
+    write_json_atomic(os.path.join(get_version_dir(version), METADATA_FILE), metadata)
+    return path
+
+def read_promotions():
+    """Return the promotion log, oldest first."""
+    try:
+        with open(os.path.join(MODEL_REGISTRY_DIR, PROMOTION_LOG), 'r') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def promote(version, action='promote'):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Make a registered version the one being served.
+    Description:
+        Points a temporary symlink at the version and renames it over the 'current' link,
+        which replaces it atomically: every reader sees either the old version or the new
+        one. The promotion, and the version it replaced, is appended to the promotion log.
+    Args:
+        version (str): Registered version to promote.
+        action (str): Action recorded in the promotion log ('promote' or 'rollback').
+    Returns:
+        str: The version that was current before, or None.
+    Raises:
+        ValueError: When the version doesn't exist.
+    """
+    if not os.path.exists(os.path.join(get_version_dir(version), MODEL_FILE)):
+        raise ValueError(f"Model version {version} doesn't exist")
+    previous = get_current_version()
+    link = os.path.join(MODEL_REGISTRY_DIR, CURRENT_LINK)
+    tmp_link = f"{link}.{os.getpid()}.tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.join('versions', version), tmp_link)
+    os.replace(tmp_link, link)
+    with open(os.path.join(MODEL_REGISTRY_DIR, PROMOTION_LOG), 'a') as f:
+        f.write(json.dumps({'time': datetime.now().isoformat(timespec='seconds'), 'action': action,
+                            'version': version, 'previous': previous}) + '\n')
+    return previous
+
+def get_rollback_version():
+    """Return the version that was current before the current version was last promoted, or None."""
+    current = get_current_version()
+    for entry in reversed(read_promotions()):
+        if entry['version'] == current:
+            previous = entry.get('previous')
+            return previous if previous and os.path.exists(get_version_dir(previous)) else None
+    return None
+
+def rollback():
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Return to the version that was served before the last promotion.
+    Description:
+        Promotes the version the current one replaced, as recorded in the promotion log.
+        Rolling back twice returns to where it started.
+    Args:
+        None
+    Returns:
+        str: The version now being served.
+    Raises:
+        ValueError: When there is no earlier version to roll back to.
+    """
+    version = get_rollback_version()
+    if version is None:
+        raise ValueError("No earlier model version to roll back to")
+    promote(version, action='rollback')
+    return version
+
+def list_versions():
+    """Return the metadata of every registered version, oldest first."""
+    if not os.path.isdir(get_versions_dir()):
+        return []
+    versions = []
+    for version in sorted(os.listdir(get_versions_dir())):
+        if version.startswith('.'):
+            continue
+        try:
+            versions.append(read_metadata(version))
+        except (OSError, ValueError):
+            versions.append({'version': version})
+    return versions
+
+def prune_versions(keep=REGISTRY_KEEP_VERSIONS):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Delete old versions so the registry doesn't grow without limit.
+    Description:
+        Keeps the newest keep versions, plus the current version and the version it would
+        roll back to. Processes still using a deleted version's memory-mapped files keep
+        working, as the files are only freed once closed.
+    Args:
+        keep (int): Number of newest versions to keep.
+    Returns:
+        list: Versions deleted.
+    Raises:
+        OSError: When a version can't be deleted.
+    """
+    versions = [entry['version'] for entry in list_versions()]
+    protected = set(versions[-keep:]) | {get_current_version(), get_rollback_version()}
+    deleted = [version for version in versions if version not in protected]
+    for version in deleted:
+        shutil.rmtree(get_version_dir(version))
+    return deleted
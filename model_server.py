@@ -0,0 +1,144 @@
+"""
+Model Server
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Serves AI forecasts from inside the web app. The trained models are loaded once and
+kept in memory; the model file is checked on each request and reloaded when it has
+been replaced. Promoting a model registry version (or rolling back) changes the path
+of the served file, and ai_forecaster.save_models writes a new file and renames it
+into place, so either way the file's signature changes.
+
+Live forecasts are computed from the latest archive rows on demand and cached until
+the next archive interval, so repeated requests between archive records don't touch
+the database or run inference again.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from sqlalchemy import text
+from ai_forecaster import (
+    get_model_path, load_models, get_latest_rows, engineer_latest_features, predict_future, predict_hourly,
+    format_predictions
+)
+from model_registry import get_path_version
+
+ARCHIVE_INTERVAL = 300  # 5 minutes in seconds between weewx archive records
+LIVE_RECHECK_INTERVAL = 30  # Seconds between checks for a new archive record once one is due
+
+# Models currently being served and the model file they were loaded from
+served_models = {'models': None, 'signature': None, 'loaded': None}
+served_models_lock = threading.Lock()
+
+# Latest live forecast, valid until next_check
+live_forecast_cache = {'forecast': None, 'archive_time': None, 'signature': None, 'next_check': 0}
+live_forecast_lock = threading.Lock()
+
+def get_model_signature(path):
+    """Return (path, inode, size, mtime) identifying a model file."""
+    st = os.stat(path)
+    return (path, st.st_ino, st.st_size, st.st_mtime_ns)
+
+def get_served_models():
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Return the in-memory models, reloading them if the model file has been replaced.
+    Description:
+    	Stats the model file chosen by ai_forecaster.get_model_path (the compact models when
+    	they are current) and compares it with the file the served models were loaded from.
+    	When it has changed, the new file is loaded and swapped in. If loading the
+    	replacement fails, the previous models keep being served.
+    Args:
+        None
+    Returns:
+        tuple: (models, signature, loaded) with the model dictionary, the model file
+            signature and the Unix time the models were loaded.
+    Raises:
+        FileNotFoundError: When no model file exists and no models have been loaded.
+        Exception: When the model file can't be loaded and no models have been loaded.
+    """
+    with served_models_lock:
+        try:
+            signature = get_model_signature(get_model_path())
+        except FileNotFoundError:
+            if served_models['models'] is None:
+                raise
+            signature = served_models['signature']
+        if signature != served_models['signature']:
+            try:
+                models = load_models(signature[0])
+                served_models.update({'models': models, 'signature': signature, 'loaded': time.time()})
+                print(f"Loaded forecast models from {signature[0]}")
+            except Exception as e:
+                if served_models['models'] is None:
+                    raise
+                print(f"Error reloading forecast models, keeping previous models: {e}")
+        return served_models['models'], served_models['signature'], served_models['loaded']
+
+def get_latest_archive_time(engine):
+    """Return the dateTime of the most recent archive record."""
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT MAX(dateTime) FROM archive")).scalar()
+
+def get_live_forecast(engine):
+    """
+    Author:
+	    David Rogers
+    Email:
+	    dave@djrogers.net.au
+    Summary:
+	    Get the AI forecast for the latest archive record, cached per archive interval.
+    Description:
+    	Returns the cached forecast while it's still current: until the next archive record
+    	is due and the model file is unchanged. After that, the latest archive time is checked
+    	(every LIVE_RECHECK_INTERVAL seconds while a record is overdue) and inference is only
+    	run again when a new record has arrived or new models have been loaded. Requests
+    	arriving during inference wait for it and share the result.
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine for the weewx database.
+    Returns:
+        dict: Forecast dictionary, as saved by ai_forecaster (with hourly forecasts when the
+            models include them), plus feature_time, generated, model_loaded and model_version fields.
+    Raises:
+        FileNotFoundError: When no model file exists.
+        ValueError: When there isn't enough recent data to build features.
+        Exception: When database queries or inference fail.
+    """
+    with live_forecast_lock:
+        models, signature, loaded = get_served_models()
+        now = time.time()
+        cache = live_forecast_cache
+        if cache['forecast'] is not None and cache['signature'] == signature and now < cache['next_check']:
+            return cache['forecast']
+
+        archive_time = get_latest_archive_time(engine)
+        if cache['forecast'] is not None and cache['signature'] == signature and cache['archive_time'] == archive_time:
+            cache['next_check'] = now + LIVE_RECHECK_INTERVAL
+            return cache['forecast']
+
+        latest = engineer_latest_features(get_latest_rows(engine=engine))
+        if latest.empty:
+            raise ValueError("Not enough recent data to build forecast features")
+        feature_time = int(latest['dateTime'].iloc[-1])
+        forecast = format_predictions(datetime.fromtimestamp(feature_time).strftime("%Y-%m-%d"),
+                                      *predict_future(latest, models), hourly=predict_hourly(latest, models))
+        forecast.update({
+            'feature_time': datetime.fromtimestamp(feature_time).isoformat(),
+            'generated': datetime.fromtimestamp(now).isoformat(timespec='seconds'),
+            'model_loaded': datetime.fromtimestamp(loaded).isoformat(timespec='seconds'),
+            'model_version': get_path_version(signature[0])
+        })
+        cache.update({
+            'forecast': forecast,
+            'archive_time': archive_time,
+            'signature': signature,
+            'next_check': max(archive_time + ARCHIVE_INTERVAL, now + LIVE_RECHECK_INTERVAL)
+        })
+        return forecast
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Static Asset Precompressor
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+This script writes gzip (.gz) and, when the brotli module is installed, brotli (.br)
+versions of the compressible files in the static folder. app.py serves these variants
+directly to clients that accept them, so large assets like dashboard.js are compressed
+once at deploy time rather than on every request. Variants are only rewritten when the
+source file is newer, and the bytes saved per file are reported.
+
+Usage:
+    python3 precompress_static.py
+"""
+
+import os
+import sys
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+COMPRESSIBLE_EXTENSIONS = ('.js', '.css', '.svg', '.json', '.html', '.ico', '.txt')
+MIN_SIZE = 1024  # Files smaller than 1 KB aren't worth compressing
+
+def write_if_stale(source_path, variant_path, compress):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Write a compressed variant of a file if it is missing or out of date.
+    Description:
+    	Compares modification times of the source file and its compressed variant and only
+    	recompresses when the source is newer. The variant is written to a temporary file and
+    	renamed into place so the web server never sees a partially written file.
+    Args:
+        source_path (str): Path of the original static file.
+        variant_path (str): Path of the compressed variant (.gz or .br).
+        compress (callable): Function taking the original bytes and returning compressed bytes.
+    Returns:
+        int: Size of the compressed variant in bytes.
+    Raises:
+        OSError: When the file cannot be read or written.
+    """
+    if os.path.exists(variant_path) and os.path.getmtime(variant_path) >= os.path.getmtime(source_path):
+        return os.path.getsize(variant_path)
+    with open(source_path, 'rb') as f:
+        data = f.read()
+    tmp_path = variant_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(compress(data))
+    os.replace(tmp_path, variant_path)
+    return os.path.getsize(variant_path)
+
+def main():
+    """Precompress all compressible static assets and report the bytes saved."""
+    total_original = 0
+    total_gzip = 0
+    total_brotli = 0
+
+    for root, _, files in os.walk(STATIC_DIR):
+        for name in sorted(files):
+            if not name.lower().endswith(COMPRESSIBLE_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            size = os.path.getsize(path)
+            if size < MIN_SIZE:
+                continue
+
+            gzip_size = write_if_stale(path, path + '.gz', lambda data: gzip.compress(data, compresslevel=9))
+            line = f"{os.path.relpath(path, STATIC_DIR)}: {size} bytes, gzip {gzip_size} bytes"
+            total_original += size
+            total_gzip += gzip_size
+
+            if brotli is not None:
+                brotli_size = write_if_stale(path, path + '.br', lambda data: brotli.compress(data, quality=11))
+                line += f", brotli {brotli_size} bytes"
+                total_brotli += brotli_size
+            print(line)
+
+    print(f"Total: {total_original} bytes, gzip saves {total_original - total_gzip} bytes", end='')
+    if brotli is not None:
+        print(f", brotli saves {total_original - total_brotli} bytes")
+    else:
+        print(" (install brotli for .br variants)")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except OSError as e:
+        print(f"Error precompressing static assets: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -1,46 +1,110 @@
 import pandas as pd
+import numpy as np
 import mysql.connector
 from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
 import subprocess
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 import tempfile
-from sqlalchemy import create_engine
-import json
+from sqlalchemy import create_engine, text
 import os
 from dotenv import load_dotenv
 import pytz
+from forecast_verification import LOCAL_UTC_OFFSET, record_forecast, get_local_today, get_day_start
+from forecast_store import save_forecast as store_forecast, get_latest_forecast
+from pressure_tendency import get_pressure_tendency
 
 load_dotenv()
 
-# 1. Connect to MySQL and query temperature and pressure data
-def fetch_data():
+PROPHET_MODEL_PATH = "/home/dave/projects/weather_predictor/prophet_model.json"
+PROPHET_HISTORY_DAYS = int(os.getenv('PROPHET_HISTORY_DAYS', 60))  # Days of daily means Prophet is trained on
+
+# 1. Connect to MySQL
+def get_engine():
     DB_USER = 'weewx'
     DB_PASSWORD = os.getenv('WEEWX_DB_PASSWORD')
     DB_HOST = '10.1.1.126'
     DB_NAME = 'weewx'
-    engine = create_engine(f'mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}')
-    
-    # Fetch 60 days of temperature and pressure
-    query = """
-    SELECT dateTime, outTemp, barometer
+    return create_engine(f'mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}')
+
+# 2. Query daily mean temperature, grouped by day in the database so years of
+# history come back as one row per day, and prepare it for Prophet. Days are local
+# (Brisbane) midnight to midnight, the same days forecast_verification.rollup_days
+# scores the forecast against, and the incomplete current day is left out, so the
+# forecast date is the local day the forecast covers
+def fetch_daily_data(engine, days=PROPHET_HISTORY_DAYS):
+    query = text("""
+    SELECT FLOOR((dateTime + :offset) / 86400) AS day, AVG(outTemp) AS outTemp
     FROM archive
-    WHERE dateTime >= UNIX_TIMESTAMP(DATE_SUB(NOW(), INTERVAL 60 DAY))
-    """
-    df = pd.read_sql(query, engine)
-    df['dateTime'] = pd.to_datetime(df['dateTime'], unit='s')
-    return df
+    WHERE dateTime >= :start AND dateTime < :end
+    GROUP BY day
+    ORDER BY day
+    """)
+    end = get_day_start(get_local_today())
+    with engine.connect() as conn:
+        df = pd.read_sql(query, conn, params={'offset': LOCAL_UTC_OFFSET, 'start': end - days * 86400, 'end': end})
+    df['dateTime'] = pd.to_datetime(df['day'].astype('int64') * 86400, unit='s')
+    return df[['dateTime', 'outTemp']]
 
-# 2. Prepare data for Prophet (temp only)
 def prepare_data(df):
     df['outTemp'] = (df['outTemp'] - 32) * 5/9
-    df = df.resample('D', on='dateTime').mean().reset_index()
     df = df.rename(columns={'dateTime': 'ds', 'outTemp': 'y'})
     return df.dropna()
 
-# 3. Train model and forecast
+# 3. Load and save the fitted Prophet model, so runs without new data don't fit again
+def load_prophet_model(path=PROPHET_MODEL_PATH):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as f:
+            return model_from_json(f.read())
+    except Exception as e:
+        print(f"Error loading cached Prophet model, fitting from scratch: {e}")
+        return None
+
+def save_prophet_model(model, path=PROPHET_MODEL_PATH):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(model_to_json(model))
+    os.replace(tmp_path, path)
+
+# Fitted parameters of a previous model, used as the starting point of the next fit
+def warm_start_params(model):
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = model.params[name][0][0] if model.mcmc_samples == 0 else np.mean(model.params[name])
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0] if model.mcmc_samples == 0 else np.mean(model.params[name], axis=0)
+    return params
+
+# 4. Train model (warm-started from the cached one when there's a new day of data) and forecast
+def fit_model(df, previous=None):
+    start = time.perf_counter()
+    model = None
+    if previous is not None:
+        try:
+            model = Prophet().fit(df, init=warm_start_params(previous))
+        except Exception as e:
+            # The parameter shapes change when Prophet adds a seasonality or changepoints as the history grows
+            print(f"Warm start failed, fitting from scratch: {e}")
+            model = None
+    warm = model is not None
+    if model is None:
+        model = Prophet().fit(df)
+    print(f"Prophet fit on {len(df)} days in {time.perf_counter() - start:.2f}s ({'warm start' if warm else 'cold start'})")
+    return model
+
 def make_forecast(df):
-    model = Prophet()
-    model.fit(df)
+    model = load_prophet_model()
+    if model is not None and model.history['ds'].max() >= df['ds'].max():
+        print(f"Predicting from cached Prophet model fitted to {model.history['ds'].max().date()}")
+    else:
+        model = fit_model(df, previous=model)
+        try:
+            save_prophet_model(model)
+        except Exception as e:
+            print(f"Error saving Prophet model: {e}")
     future = model.make_future_dataframe(periods=1)
     forecast = model.predict(future)
     last_forecast = forecast.iloc[-1]
@@ -51,16 +115,14 @@ def make_forecast(df):
         'max_temp': last_forecast['yhat_upper']
     }
 
-# 🆕 4. Barometric pressure trend-based forecast
-def pressure_forecast(df):
-    # Get the most recent barometer reading (last 5 minutes)
-    max_date = df['dateTime'].max()
-    five_mins_ago = max_date - timedelta(minutes=5)
-    thirtysix_hours_ago = max_date - timedelta(hours=36)
-    
-    recent = df[(df['dateTime'] > five_mins_ago) & (df['dateTime'] <= max_date)]['barometer'].mean() * 33.8639  # Convert inHg to hPa
-    previous = df[(df['dateTime'] > thirtysix_hours_ago - timedelta(minutes=5)) & (df['dateTime'] <= thirtysix_hours_ago)]['barometer'].mean() * 33.8639  # Convert inHg to hPa
-    
+# 🆕 5. Barometric pressure trend-based forecast
+def pressure_forecast(engine):
+    # Mean barometer (hPa) over the last 5 minutes and the same 5 minutes 36 hours ago
+    tendency = get_pressure_tendency(engine, hours=36)
+    max_date = pd.to_datetime(tendency['time'], unit='s')
+    recent = tendency['recent'] if tendency['recent'] is not None else float('nan')
+    previous = tendency['previous'] if tendency['previous'] is not None else float('nan')
+
     delta = recent - previous
     
     print ('+++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++++')
@@ -88,7 +150,7 @@ def pressure_forecast(df):
         print ("Mixed or stable weather")
         return "Mixed or stable weather"
 
-# 5. Send email using msmtp
+# 6. Send email using msmtp
 def send_email(forecast, pressure_outlook, to_email="dave@djrogers.net.au", from_email="dave@djrogers.net.au"):
     subject = f"Daily Weather Forecast for {forecast['ds'].date()}"
     body = (
@@ -109,67 +171,52 @@ Subject: {subject}
     process = subprocess.Popen(['msmtp', '-a', 'default', to_email], stdin=subprocess.PIPE)
     process.communicate(input=email_content.encode())
 
-# 6. Save forecast and pressure outlook to JSON
-def save_forecast_to_json(forecast, pressure_outlook, output_dir="/home/dave/projects/weather_predictor/forecasts"):
-    os.makedirs(output_dir, exist_ok=True)
-    file_path = os.path.join(output_dir, "forecasts.json")
+# 7. Save forecast and pressure outlook to the forecast store
+def save_forecast(forecast, pressure_outlook):
     forecast_date = forecast['ds'].date().isoformat()
-
-    if os.path.exists(file_path):
-        with open(file_path, 'r') as f:
-            all_forecasts = json.load(f)
-    else:
-        all_forecasts = {}
-
-    all_forecasts[forecast_date] = {
+    entry = {
         'date': forecast_date,
         'predicted_min_temp': round(forecast['min_temp'], 1),
         'predicted_max_temp': round(forecast['max_temp'], 1),
         'predicted_mean_temp': round(forecast['yhat'], 1),
         'pressure_forecast': pressure_outlook
     }
+    store_forecast(forecast_date, entry)
+    return entry
 
-    with open(file_path, 'w') as f:
-        json.dump(all_forecasts, f, indent=4)
-
-# 7. Main routine
+# 8. Main routine
 def main():
     # Use local time for scheduling
     tz = pytz.timezone('Australia/Brisbane')
     now = datetime.now(tz)
     run_make_forecast = now.hour == 2 and now.minute < 10  # Run between 01:00 and 01:09
 
-    raw_data = fetch_data()
-    pressure_outlook = pressure_forecast(raw_data)
+    engine = get_engine()
+    pressure_outlook = pressure_forecast(engine)
 
     if run_make_forecast:
-        prepared = prepare_data(raw_data)
+        prepared = prepare_data(fetch_daily_data(engine))
         forecast = make_forecast(prepared)
-        save_forecast_to_json(forecast, pressure_outlook)
+        saved = save_forecast(forecast, pressure_outlook)
+        # Only the daily Prophet run is a new forecast; other runs re-save the latest one
+        try:
+            record_forecast('prophet', saved['date'], saved)
+        except Exception as e:
+            print(f"Error recording forecast for verification: {e}")
         send_email(forecast, pressure_outlook)
     else:
-        # Load the most recent forecast from forecasts.json
-        output_dir = "/home/dave/projects/weather_predictor/forecasts"
-        file_path = os.path.join(output_dir, "forecasts.json")
-        forecast_date = now.date().isoformat()
-        if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
-                all_forecasts = json.load(f)
-            # Use the most recent forecast (latest date)
-            if all_forecasts:
-                latest_date = max(all_forecasts.keys())
-                latest = all_forecasts[latest_date]
-                forecast = {
-                    'ds': now,
-                    'yhat': latest.get('predicted_mean_temp'),
-                    'min_temp': latest.get('predicted_min_temp'),
-                    'max_temp': latest.get('predicted_max_temp')
-                }
-            else:
-                forecast = {'ds': now, 'yhat': None, 'min_temp': None, 'max_temp': None}
+        # Use the most recent forecast (latest date) from the forecast store
+        latest = get_latest_forecast()
+        if latest:
+            forecast = {
+                'ds': now,
+                'yhat': latest.get('predicted_mean_temp'),
+                'min_temp': latest.get('predicted_min_temp'),
+                'max_temp': latest.get('predicted_max_temp')
+            }
         else:
             forecast = {'ds': now, 'yhat': None, 'min_temp': None, 'max_temp': None}
-        save_forecast_to_json(forecast, pressure_outlook)
+        save_forecast(forecast, pressure_outlook)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,114 @@
+"""
+Pressure Tendency
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Barometric tendency from the weewx archive. The pressure outlook compares the mean
+barometer over the latest 5-minute slot with the same slot 36 hours earlier; both
+slots are read with small range queries on the archive's dateTime key, so the
+outlook no longer needs days of archive rows.
+
+get_tendency_series returns the 3, 12 and 36 hour change at every archive record
+over a period, from one range query covering the period plus the longest interval,
+for charting and for alerting on rapid falls.
+"""
+
+import pandas as pd
+from sqlalchemy import text
+
+INHG_TO_HPA = 33.8639
+SLOT_SECONDS = 300  # Width of the slots compared, one archive interval
+TENDENCY_HOURS = (3, 12, 36)  # Intervals of the tendency series
+OUTLOOK_HOURS = 36  # Interval the pressure outlook is based on
+# Met Office descriptions of the 3 hour change, by largest absolute change in hPa
+TENDENCY_DESCRIPTIONS = ((0.1, 'steady'), (1.5, 'slowly'), (3.5, ''), (6.0, 'quickly'), (float('inf'), 'very rapidly'))
+RAPID_FALL_HPA = 3.6  # 3 hour fall flagged as an alert ('falling quickly' or faster)
+
+def get_slot_mean(conn, end):
+    """Return the mean barometer (hPa) of the archive records in the slot ending at end, or None."""
+    value = conn.execute(text("""
+        SELECT AVG(barometer) FROM archive WHERE dateTime > :start AND dateTime <= :end
+    """), {'start': end - SLOT_SECONDS, 'end': end}).scalar()
+    return float(value) * INHG_TO_HPA if value is not None else None
+
+def get_pressure_tendency(engine, hours=OUTLOOK_HOURS):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the change in barometric pressure over an interval, ending at the latest record.
+    Description:
+        Averages the barometer over the 5-minute slot ending at the latest archive record
+        and over the slot ending the given number of hours earlier. Each is a range query
+        on dateTime touching one or two rows.
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine for the weewx database.
+        hours (int): Interval in hours.
+    Returns:
+        dict: time (latest record as a Unix time), recent and previous pressure and their
+            delta in hPa. Values are None when a slot has no readings.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    with engine.connect() as conn:
+        latest = conn.execute(text("SELECT MAX(dateTime) FROM archive")).scalar()
+        if latest is None:
+            return {'time': None, 'recent': None, 'previous': None, 'delta': None}
+        recent = get_slot_mean(conn, latest)
+        previous = get_slot_mean(conn, latest - hours * 3600)
+    delta = recent - previous if recent is not None and previous is not None else None
+    return {'time': int(latest), 'recent': recent, 'previous': previous, 'delta': delta}
+
+def describe_tendency(delta):
+    """Describe a 3 hour pressure change, e.g. 'falling quickly', or return None when unknown."""
+    if delta is None or pd.isna(delta):
+        return None
+    for limit, description in TENDENCY_DESCRIPTIONS:
+        if abs(delta) <= limit:
+            break
+    if description == 'steady':
+        return description
+    return f"{'rising' if delta > 0 else 'falling'} {description}".strip()
+
+def get_tendency_series(engine, hours=24, intervals=TENDENCY_HOURS):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Get the pressure tendency over several intervals at every archive record in a period.
+    Description:
+        Reads dateTime and barometer for the period plus the longest interval in one range
+        query, then finds the reading each interval earlier for every record with an
+        as-of join. A reading more than one archive interval away doesn't count, so gaps
+        in the archive give missing values rather than tendencies over the wrong interval.
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine for the weewx database.
+        hours (int): Hours of series to return, ending at the latest record.
+        intervals (tuple): Tendency intervals in hours.
+    Returns:
+        pandas.DataFrame: dateTime (Unix time), barometer (hPa) and a tendency_<n>h column
+            (change in hPa) for each interval, oldest first.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    query = text("""
+        SELECT dateTime, barometer FROM archive
+        WHERE dateTime >= (SELECT MAX(dateTime) FROM archive) - :seconds AND barometer IS NOT NULL
+        ORDER BY dateTime ASC
+    """)
+    with engine.connect() as conn:
+        df = pd.read_sql(query, conn, params={'seconds': (hours + max(intervals)) * 3600})
+    df['dateTime'] = df['dateTime'].astype('int64')
+    df['barometer'] = df['barometer'] * INHG_TO_HPA
+    series = df[df['dateTime'] >= df['dateTime'].max() - hours * 3600] if not df.empty else df
+    for interval in intervals:
+        lookup = series[['dateTime']].assign(target=series['dateTime'] - interval * 3600)
+        earlier = pd.merge_asof(lookup, df.rename(columns={'dateTime': 'target', 'barometer': 'earlier'}),
+                                on='target', direction='nearest', tolerance=SLOT_SECONDS)
+        series = series.assign(**{f'tendency_{interval}h': series['barometer'].to_numpy() - earlier['earlier'].to_numpy()})
+    return series.reset_index(drop=True)
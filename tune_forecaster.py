@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Forecast Model Tuner
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Hyperparameter search for the AI forecast models. Every combination of forest size
+(--trees), maximum depth (--max-depth), minimum leaf size (--min-leaf) and feature
+window (--feature-windows, the samples used for the diffs and rolling windows in
+engineer_features) is scored with time-series cross-validation: each fold trains on
+all rows before a point and tests on the block after it, with a 24 hour gap so no
+training target overlaps the test rows.
+
+Feature matrices are engineered and labeled once per feature window and cached on
+disk under tune_cache, so trials (and later runs over the same data) share them.
+Trials run on a process pool, one (configuration, fold) per task. The output ranks
+configurations by the chosen objective and reports each one's training time,
+single-row inference time and size, ending with the best configuration.
+
+Usage:
+    python3 tune_forecaster.py --days 60 --trees 50,100,150 --max-depth none,20 --feature-windows 6,12,24
+"""
+
+import os
+import json
+import time
+import hashlib
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.model_selection import TimeSeriesSplit
+from ai_forecaster import (
+    FEATURES, FEATURE_WINDOW, FEATURE_STORE_VERSION, TRAIN_GAP_ROWS, get_data, engineer_features, label_weather
+)
+
+TUNE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tune_cache')
+TARGET_COLUMNS = ['label', 'wind_label', 'max_temp_future', 'min_temp_future']
+INFERENCE_REPEATS = 20  # Single-row predictions timed per fold
+OBJECTIVES = {
+    # name: (table column, True when higher is better)
+    'temp_mae': ('temp_mae', False),
+    'weather_acc': ('weather_acc', True),
+    'wind_acc': ('wind_acc', True),
+}
+
+# Feature matrices already loaded by this worker process, keyed by cache path
+loaded_matrices = {}
+
+def parse_list(value, cast=int):
+    """Parse a comma-separated argument, treating 'none' as None."""
+    return [None if item.strip().lower() == 'none' else cast(item) for item in value.split(',')]
+
+def build_feature_matrices(raw, windows):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Engineer, label and cache a feature matrix for each feature window.
+    Description:
+        Matrices are cached as pickles named by a hash of the window, the feature store
+        version and the raw data's time span, so they are reused by every trial and by
+        later runs over the same data. All matrices are trimmed to the timestamps they
+        have in common, so every window is scored on exactly the same rows.
+    Args:
+        raw (pandas.DataFrame): Raw archive data from get_data.
+        windows (list): Feature windows in samples.
+    Returns:
+        dict: Cache path of the matrix for each window.
+    Raises:
+        OSError: When the cache can't be written.
+    """
+    os.makedirs(TUNE_CACHE_DIR, exist_ok=True)
+    span = f"{raw['dateTime'].iloc[0]}-{raw['dateTime'].iloc[-1]}-{len(raw)}"
+    paths = {}
+    matrices = {}
+    for window in windows:
+        key = hashlib.sha1(f"{window}:{FEATURE_STORE_VERSION}:{span}".encode()).hexdigest()[:16]
+        paths[window] = os.path.join(TUNE_CACHE_DIR, f'features_w{window}_{key}.pkl')
+        if os.path.exists(paths[window]):
+            matrices[window] = pd.read_pickle(paths[window])
+        else:
+            matrices[window] = label_weather(engineer_features(raw, window=window))[FEATURES + TARGET_COLUMNS]
+
+    common = None
+    for matrix in matrices.values():
+        common = matrix.index if common is None else common.intersection(matrix.index)
+    for window, matrix in matrices.items():
+        if len(matrix) != len(common) or not os.path.exists(paths[window]):
+            tmp_path = f'{paths[window]}.{os.getpid()}.tmp'
+            matrix.loc[common].to_pickle(tmp_path)
+            os.replace(tmp_path, paths[window])
+    return paths
+
+def load_matrix(path):
+    """Return a cached feature matrix, loading it once per worker process."""
+    if path not in loaded_matrices:
+        loaded_matrices[path] = pd.read_pickle(path)
+    return loaded_matrices[path]
+
+def run_trial(path, n_estimators, max_depth, min_samples_leaf, n_splits, fold):
+    """
+    Author:
+        David Rogers
+    Email:
+        dave@djrogers.net.au
+    Summary:
+        Train and score the forecast models for one configuration on one fold.
+    Description:
+        Splits the cached matrix with TimeSeriesSplit (with a TRAIN_GAP_ROWS gap), trains
+        the weather, wind and max/min temperature forests single-threaded on the training
+        rows and scores them on the test rows. Inference cost is the mean time to predict
+        one row with all four models, as the forecaster does.
+    Args:
+        path (str): Cache path of the feature matrix.
+        n_estimators (int): Trees per forest.
+        max_depth (int): Maximum tree depth, or None for unlimited.
+        min_samples_leaf (int): Minimum rows per leaf.
+        n_splits (int): Number of time-series folds.
+        fold (int): Fold to run.
+    Returns:
+        dict: Scores and costs for the fold.
+    Raises:
+        None
+    """
+    df = load_matrix(path)
+    train_idx, test_idx = list(TimeSeriesSplit(n_splits=n_splits, gap=TRAIN_GAP_ROWS).split(df))[fold]
+    train, test = df.iloc[train_idx], df.iloc[test_idx]
+    X_train, X_test = train[FEATURES], test[FEATURES]
+    params = {'n_estimators': n_estimators, 'max_depth': max_depth, 'min_samples_leaf': min_samples_leaf,
+              'random_state': 42, 'n_jobs': 1}
+
+    start = time.perf_counter()
+    models = {
+        'weather': RandomForestClassifier(class_weight='balanced', **params).fit(X_train, train['label']),
+        'wind': RandomForestClassifier(class_weight='balanced', **params).fit(X_train, train['wind_label'].astype(str)),
+        'max_temp': RandomForestRegressor(**params).fit(X_train, train['max_temp_future']),
+        'min_temp': RandomForestRegressor(**params).fit(X_train, train['min_temp_future']),
+    }
+    train_seconds = time.perf_counter() - start
+
+    latest = X_test.tail(1)
+    start = time.perf_counter()
+    for _ in range(INFERENCE_REPEATS):
+        for model in models.values():
+            model.predict(latest)
+    inference_ms = 1000 * (time.perf_counter() - start) / INFERENCE_REPEATS
+
+    max_mae = np.mean(np.abs(models['max_temp'].predict(X_test) - test['max_temp_future'])) * 5/9
+    min_mae = np.mean(np.abs(models['min_temp'].predict(X_test) - test['min_temp_future'])) * 5/9
+    return {
+        'weather_acc': np.mean(models['weather'].predict(X_test) == test['label'].to_numpy()),
+        'wind_acc': np.mean(models['wind'].predict(X_test) == test['wind_label'].astype(str).to_numpy()),
+        'max_temp_mae': max_mae,
+        'min_temp_mae': min_mae,
+        'temp_mae': (max_mae + min_mae) / 2,
+        'train_seconds': train_seconds,
+        'inference_ms': inference_ms,
+        'nodes': sum(estimator.tree_.node_count for model in models.values() for estimator in model.estimators_)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Time-series hyperparameter search for the AI forecast models')
+    parser.add_argument('--days', type=int, default=60, help='Days of archive data to search over (default: 60)')
+    parser.add_argument('--trees', default='50,100,150', help='Comma-separated trees per forest (default: 50,100,150)')
+    parser.add_argument('--max-depth', default='none,20', help="Comma-separated maximum depths, 'none' for unlimited (default: none,20)")
+    parser.add_argument('--min-leaf', default='1,5', help='Comma-separated minimum rows per leaf (default: 1,5)')
+    parser.add_argument('--feature-windows', default=f'6,{FEATURE_WINDOW},24',
+                        help=f'Comma-separated feature windows in 5-minute samples (default: 6,{FEATURE_WINDOW},24)')
+    parser.add_argument('--folds', type=int, default=4, help='Time-series cross-validation folds (default: 4)')
+    parser.add_argument('--objective', choices=sorted(OBJECTIVES), default='temp_mae',
+                        help='Score used to rank configurations (default: temp_mae)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Worker processes (default: all cores)')
+    parser.add_argument('--output', help='Optional JSON file to write the best configuration to')
+    args = parser.parse_args()
+
+    print(f"Fetching last {args.days} days of data...")
+    raw = get_data(args.days)
+    windows = parse_list(args.feature_windows)
+    paths = build_feature_matrices(raw, windows)
+    configs = list(itertools.product(windows, parse_list(args.trees), parse_list(args.max_depth), parse_list(args.min_leaf)))
+    tasks = [config + (fold,) for config in configs for fold in range(args.folds)]
+    print(f"Running {len(tasks)} trials ({len(configs)} configurations x {args.folds} folds) on {args.workers} workers...")
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [
+            executor.submit(run_trial, paths[window], trees, depth, leaf, args.folds, fold)
+            for window, trees, depth, leaf, fold in tasks
+        ]
+        results = [
+            {'feature_window': window, 'trees': trees, 'max_depth': depth if depth is not None else 'none',
+             'min_leaf': leaf, **future.result()}
+            for (window, trees, depth, leaf, _), future in zip(tasks, futures)
+        ]
+
+    column, higher_is_better = OBJECTIVES[args.objective]
+    table = (pd.DataFrame(results)
+             .groupby(['feature_window', 'trees', 'max_depth', 'min_leaf'], sort=False).mean()
+             .reset_index()
+             .sort_values(column, ascending=not higher_is_better))
+
+    print(f"\n{'Window':>6} {'Trees':>5} {'Depth':>5} {'Leaf':>4} {'Weather':>7} {'Wind':>5} {'Max MAE':>7} "
+          f"{'Min MAE':>7} {'Train s':>7} {'Infer ms':>8} {'Nodes k':>7}")
+    for row in table.itertuples():
+        print(f"{row.feature_window:>6} {row.trees:>5} {row.max_depth:>5} {row.min_leaf:>4} {row.weather_acc:>7.3f} "
+              f"{row.wind_acc:>5.3f} {row.max_temp_mae:>7.2f} {row.min_temp_mae:>7.2f} {row.train_seconds:>7.2f} "
+              f"{row.inference_ms:>8.1f} {row.nodes / 1000:>7.0f}")
+
+    best = table.iloc[0]
+    config = {
+        'objective': args.objective,
+        'feature_window': int(best['feature_window']),
+        'n_estimators': int(best['trees']),
+        'max_depth': None if best['max_depth'] == 'none' else int(best['max_depth']),
+        'min_samples_leaf': int(best['min_leaf']),
+        'scores': {name: round(float(best[name]), 4) for name in ('weather_acc', 'wind_acc', 'max_temp_mae', 'min_temp_mae')},
+        'train_seconds': round(float(best['train_seconds']), 2),
+        'inference_ms': round(float(best['inference_ms']), 2),
+    }
+    print(f"\nBest configuration by {args.objective}:")
+    print(json.dumps(config, indent=4))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(config, f, indent=4)
+        print(f"Best configuration written to {args.output}")
+
+if __name__ == "__main__":
+    main()
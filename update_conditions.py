@@ -2,6 +2,12 @@
 
 import os
 import sys
+import json
+import time
+import signal
+import argparse
+import threading
+from datetime import datetime
 import requests
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
@@ -19,6 +25,19 @@ DB_URI = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'
 # WeatherAPI configuration
 WAPI_KEY = os.getenv('WAPI_KEY')
 LOCATION = 'Samford'  # Using Samford as the location
+HISTORY_URL = 'http://api.weatherapi.com/v1/history.json'
+
+# Backfill configuration
+LOCAL_UTC_OFFSET = 10 * 3600  # Samford (Australia/Brisbane) is UTC+10 with no daylight saving
+ARCHIVE_INTERVAL = 300  # 5 minutes in seconds between weewx archive records
+BACKFILL_DAYS = 7  # Days searched for missing conditions (WeatherAPI's free plan keeps 7 days of history)
+BACKFILL_CHUNK_HOURS = 24  # Hourly updates written per transaction
+
+# Daemon configuration
+DAEMON_POLL_SECONDS = 10  # Seconds between checks for a new archive record
+DAEMON_RETRY_SECONDS = 60  # Seconds to wait after a failed WeatherAPI request before trying again
+CONDITION_MAX_LAG = 900  # Records older than this (seconds) aren't given the current condition; --backfill fills them
+DAEMON_STATUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conditions_daemon.json')
 
 def get_weather_condition():
     """
@@ -46,17 +65,7 @@ def get_weather_condition():
         SystemExit: When any error occurs, the program exits with status code 1.
     """
     try:
-        response = requests.get(
-            f'http://api.weatherapi.com/v1/current.json',
-            params={
-                'key': WAPI_KEY,
-                'q': LOCATION,
-                'aqi': 'no'
-            }
-        )
-        response.raise_for_status()  # Raise an exception for bad status codes
-        data = response.json()
-        return data['current']['condition']['code']
+        return fetch_weather_condition()
     except requests.exceptions.RequestException as e:
         print(f"Error fetching weather data: {e}", file=sys.stderr)
         sys.exit(1)
@@ -64,6 +73,21 @@ def get_weather_condition():
         print(f"Error parsing weather data: {e}", file=sys.stderr)
         sys.exit(1)
 
+def fetch_weather_condition(session=None):
+    """Return the current condition code from WeatherAPI.com, using the given requests session if any."""
+    response = (session or requests).get(
+        f'http://api.weatherapi.com/v1/current.json',
+        params={
+            'key': WAPI_KEY,
+            'q': LOCATION,
+            'aqi': 'no'
+        },
+        timeout=30
+    )
+    response.raise_for_status()  # Raise an exception for bad status codes
+    data = response.json()
+    return data['current']['condition']['code']
+
 def update_database(condition_code):
     """
     Author:
@@ -110,6 +134,283 @@ def update_database(condition_code):
         print(f"Error updating database: {e}", file=sys.stderr)
         sys.exit(1)
 
+def find_missing_ranges(engine, since):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Find the ranges of archive records with no weather condition.
+    Description:
+    	Reads the dateTime of every record since the given time whose conditions column is
+    	NULL (a range query on the archive's primary key) and joins consecutive records, no
+    	more than one archive interval apart, into ranges.
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine for the weewx database.
+        since (int): Unix time to search from.
+    Returns:
+        list: (first, last) dateTime of each range, oldest first.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    with engine.connect() as conn:
+        times = conn.execute(
+            text("SELECT dateTime FROM archive WHERE dateTime >= :since AND conditions IS NULL ORDER BY dateTime"),
+            {"since": int(since)}
+        ).scalars().all()
+    ranges = []
+    for t in times:
+        if ranges and t - ranges[-1][1] <= ARCHIVE_INTERVAL:
+            ranges[-1][1] = t
+        else:
+            ranges.append([t, t])
+    return [tuple(r) for r in ranges]
+
+def parse_history(data):
+    """Return {hour start: condition code} from a WeatherAPI history response."""
+    return {
+        hour['time_epoch']: hour['condition']['code']
+        for day in data['forecast']['forecastday'] for hour in day['hour']
+    }
+
+def fetch_history(session, date):
+    """Return {hour start: condition code} for a local date from the WeatherAPI history endpoint."""
+    response = session.get(HISTORY_URL, params={'key': WAPI_KEY, 'q': LOCATION, 'dt': date}, timeout=30)
+    response.raise_for_status()
+    return parse_history(response.json())
+
+def load_stub_history(directory, date):
+    """Return {hour start: condition code} for a local date from a saved history response (<directory>/<date>.json)."""
+    with open(os.path.join(directory, f'{date}.json'), 'r') as f:
+        return parse_history(json.load(f))
+
+def write_conditions(engine, hour_codes, chunk_hours=BACKFILL_CHUNK_HOURS):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Write hourly condition codes to the archive records that have none.
+    Description:
+    	Each hour's code is written to the records in that hour with one ranged UPDATE, and
+    	the updates are sent with executemany, chunk_hours at a time, one transaction per
+    	chunk. Records that already have a condition are left alone.
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine for the weewx database.
+        hour_codes (dict): Condition code for each hour, keyed by the hour's start as a Unix time.
+        chunk_hours (int): Hours written per transaction.
+    Returns:
+        int: Number of records updated.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    params = [{"code": code, "start": hour, "end": hour + 3600} for hour, code in sorted(hour_codes.items())]
+    updated = 0
+    for i in range(0, len(params), chunk_hours):
+        with engine.begin() as conn:
+            result = conn.execute(
+                text("UPDATE archive SET conditions = :code "
+                     "WHERE dateTime >= :start AND dateTime < :end AND conditions IS NULL"),
+                params[i:i + chunk_hours]
+            )
+            updated += max(result.rowcount, 0)
+    return updated
+
+def backfill_conditions(days=BACKFILL_DAYS, stub_dir=None):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Fill in the weather conditions of archive records missed by earlier runs.
+    Description:
+    	Finds the ranges of records without a condition over the last days, then fetches the
+    	hourly conditions for each local date they cover with one WeatherAPI history request
+    	per date (over a single HTTP session), or from saved responses in stub_dir for testing.
+    	Each record gets the condition of the hour it falls in. A date whose history can't be
+    	fetched is skipped and tried again on the next backfill. Cached archive exports and
+    	AI forecaster features from the first filled record on are discarded, so they are
+    	rebuilt with the new conditions.
+    Args:
+        days (int): Days to search for missing conditions.
+        stub_dir (str, optional): Directory of saved history responses named YYYY-MM-DD.json
+            to use instead of the WeatherAPI.
+    Returns:
+        int: Number of records updated.
+    Raises:
+        Exception: When database connection fails or query execution errors occur.
+    """
+    engine = create_engine(DB_URI)
+    ranges = find_missing_ranges(engine, time.time() - days * 86400)
+    if not ranges:
+        print(f"No records without conditions in the last {days} days")
+        return 0
+    hours = sorted({hour for first, last in ranges for hour in range(first - first % 3600, last + 1, 3600)})
+    dates = sorted({time.strftime('%Y-%m-%d', time.gmtime(hour + LOCAL_UTC_OFFSET)) for hour in hours})
+    print(f"Found {len(ranges)} ranges without conditions covering {len(hours)} hours on {len(dates)} days")
+
+    hour_codes = {}
+    session = requests.Session()
+    for date in dates:
+        try:
+            history = load_stub_history(stub_dir, date) if stub_dir else fetch_history(session, date)
+        except (requests.exceptions.RequestException, OSError, KeyError, ValueError) as e:
+            print(f"Error fetching conditions for {date}, skipping: {e}", file=sys.stderr)
+            continue
+        hour_codes.update({hour: history[hour] for hour in hours if hour in history})
+
+    updated = write_conditions(engine, hour_codes)
+    print(f"Backfilled conditions for {updated} records")
+    if updated:
+        first, last = min(hour_codes), max(hour_codes) + 3599
+        # Imported here so the 5-minute update doesn't pay for pyarrow and scikit-learn
+        from archive_export import invalidate_export_cache
+        from ai_forecaster import discard_features_since
+        print(f"Removed {invalidate_export_cache(first, last)} cached export files")
+        print(f"Discarded {discard_features_since(first)} feature store rows to be engineered again")
+    return updated
+
+def write_daemon_status(status, path=None):
+    """Write the daemon's status to a temporary file and rename it into place."""
+    path = path or DAEMON_STATUS_PATH
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f, indent=4)
+    os.replace(tmp_path, path)
+
+def read_daemon_status(path=None):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Read the heartbeat and lag metrics written by the conditions daemon.
+    Description:
+    	Adds how long ago the last heartbeat was, and whether the daemon is healthy: it has
+    	beaten within three poll intervals and its last update didn't fail.
+    Args:
+        path (str, optional): Status file path. Defaults to DAEMON_STATUS_PATH.
+    Returns:
+        dict: The daemon's status, or None when it has never run.
+    Raises:
+        ValueError: When the status file can't be parsed.
+    """
+    path = path or DAEMON_STATUS_PATH
+    try:
+        with open(path, 'r') as f:
+            status = json.load(f)
+    except FileNotFoundError:
+        return None
+    age = time.time() - status['heartbeat']
+    status['heartbeat_age_seconds'] = round(age, 1)
+    status['healthy'] = age <= 3 * status.get('poll_seconds', DAEMON_POLL_SECONDS) and not status.get('failing')
+    return status
+
+def stamp_new_records(conn, since, latest, condition_code):
+    """Set the condition of the records after since, up to latest, that don't have one yet."""
+    return conn.execute(
+        text("UPDATE archive SET conditions = :code "
+             "WHERE dateTime > :since AND dateTime <= :latest AND conditions IS NULL"),
+        {"code": condition_code, "since": since, "latest": latest}
+    ).rowcount
+
+def run_daemon(poll_seconds=DAEMON_POLL_SECONDS, status_path=None):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Keep the archive's conditions up to date as a long-running process.
+    Description:
+    	Keeps one database connection and one HTTP session open, and checks for a new
+    	archive record every poll_seconds (a primary key lookup). When new records
+    	appear, the current condition is fetched once and written to all of them with a
+    	single UPDATE, in its own transaction. Records more than CONDITION_MAX_LAG behind
+    	are left for --backfill rather than being given a condition that may no longer
+    	apply. A failed API request is retried after DAEMON_RETRY_SECONDS. A lost database
+    	connection is reopened on the next poll.
+
+    	Every poll writes a heartbeat to the status file, along with:
+    	- the latest archive time and how far behind it is
+    	- the lag between a record's dateTime and when its condition was written
+    	- counters of records updated and errors
+    	Stops cleanly on SIGTERM or SIGINT.
+    Args:
+        poll_seconds (int): Seconds between checks for a new archive record.
+        status_path (str, optional): Status file path. Defaults to DAEMON_STATUS_PATH.
+    Returns:
+        None
+    Raises:
+        None
+    """
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    engine = create_engine(DB_URI, pool_size=1, pool_pre_ping=True, pool_recycle=3600)
+    session = requests.Session()
+    conn = None
+    last_stamped = None
+    retry_at = 0
+    status = {
+        'pid': os.getpid(), 'started': time.time(), 'poll_seconds': poll_seconds, 'heartbeat': None,
+        'latest_archive_time': None, 'archive_age_seconds': None, 'last_update': None, 'lag_seconds': None,
+        'last_condition': None, 'records_updated': 0, 'updates': 0, 'api_errors': 0, 'db_errors': 0,
+        'failing': False, 'last_error': None
+    }
+    print(f"Conditions daemon started, polling every {poll_seconds}s")
+    while not stop.is_set():
+        now = time.time()
+        try:
+            if conn is None:
+                conn = engine.connect()
+            # Each poll is its own transaction, so MAX(dateTime) isn't read from a stale snapshot
+            with conn.begin():
+                latest = conn.execute(text("SELECT MAX(dateTime) FROM archive")).scalar()
+            status.update({
+                'latest_archive_time': latest,
+                'archive_age_seconds': round(now - latest, 1) if latest is not None else None
+            })
+            if latest is not None and (last_stamped is None or latest > last_stamped) and now >= retry_at:
+                since = max(last_stamped or 0, int(now) - CONDITION_MAX_LAG)
+                try:
+                    condition_code = fetch_weather_condition(session)
+                except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+                    status.update({'api_errors': status['api_errors'] + 1, 'failing': True, 'last_error': f"API: {e}"})
+                    retry_at = now + DAEMON_RETRY_SECONDS
+                    print(f"Error fetching weather data: {e}", file=sys.stderr)
+                else:
+                    with conn.begin():
+                        updated = stamp_new_records(conn, since, latest, condition_code)
+                    last_stamped = latest
+                    status.update({
+                        'last_update': time.time(), 'lag_seconds': round(time.time() - latest, 1),
+                        'last_condition': condition_code, 'records_updated': status['records_updated'] + updated,
+                        'updates': status['updates'] + 1, 'failing': False
+                    })
+                    print(f"{datetime.fromtimestamp(latest)}: updated {updated} records to code {condition_code}")
+        except Exception as e:
+            status.update({'db_errors': status['db_errors'] + 1, 'failing': True, 'last_error': f"Database: {e}"})
+            print(f"Error updating database: {e}", file=sys.stderr)
+            if conn is not None:
+                conn.invalidate()
+                conn.close()
+                conn = None
+        status['heartbeat'] = time.time()
+        try:
+            write_daemon_status(status, status_path)
+        except OSError as e:
+            print(f"Error writing daemon status: {e}", file=sys.stderr)
+        stop.wait(poll_seconds)
+    if conn is not None:
+        conn.close()
+    session.close()
+    print("Conditions daemon stopped")
+
 def main():
     """
     Author:
@@ -125,15 +426,43 @@ def main():
     	weather condition update script and handles the overall execution flow, including
     	error handling and success reporting. The script is designed to be run periodically
     	to keep the local weather database synchronized with current weather conditions.
+    	With --backfill, fills in the conditions missed by earlier runs instead.
     Args:
-        None
+        --backfill (bool): Optional flag to backfill missing conditions from the history API.
+        --days (int): Days searched by --backfill (default: 7).
+        --stub-dir (str): Optional directory of saved history responses to backfill from.
+        --daemon (bool): Optional flag to run continuously, updating each new archive record.
+        --poll (int): Seconds between checks for new archive records in daemon mode (default: 10).
+        --status (bool): Optional flag to print the daemon's heartbeat and lag metrics.
     Returns:
         None
     Raises:
         Exception: When any unexpected error occurs during the weather condition update process.
         SystemExit: When any error occurs, the program exits with status code 1.
     """
+    parser = argparse.ArgumentParser(description='Update the weewx archive with WeatherAPI conditions')
+    parser.add_argument('--backfill', action='store_true',
+                        help='Fill in conditions missing from earlier records from the history API')
+    parser.add_argument('--days', type=int, default=BACKFILL_DAYS,
+                        help=f'Days searched for missing conditions (default: {BACKFILL_DAYS})')
+    parser.add_argument('--stub-dir', help='Backfill from saved history responses named YYYY-MM-DD.json')
+    parser.add_argument('--daemon', action='store_true',
+                        help='Run continuously, updating each new archive record as it appears')
+    parser.add_argument('--poll', type=int, default=DAEMON_POLL_SECONDS,
+                        help=f'Seconds between checks for new archive records (default: {DAEMON_POLL_SECONDS})')
+    parser.add_argument('--status', action='store_true', help="Print the daemon's heartbeat and lag metrics")
+    args = parser.parse_args()
+
     try:
+        if args.status:
+            print(json.dumps(read_daemon_status(), indent=4))
+            return
+        if args.daemon:
+            run_daemon(args.poll)
+            return
+        if args.backfill:
+            backfill_conditions(args.days, args.stub_dir)
+            return
         condition_code = get_weather_condition()
         update_database(condition_code)
         print(f"Successfully updated conditions to code: {condition_code}")
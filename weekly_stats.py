@@ -0,0 +1,584 @@
+"""
+Weekly Statistics
+
+Author: David Rogers
+Email: dave@djrogers.net.au
+
+Weekly weather statistics for the dashboard: minimum, maximum and average values for
+the last three Sunday to Saturday weeks, with daylight-only UV averages, prevailing
+wind and gust directions, and week-on-week trends. generate_weekly_stats_cache
+writes them all to WEEKLY_STATS_CACHE_PATH, which the weekly stats endpoints in
+app.py serve from.
+
+Kept separate from app.py so generate_weekly_cache.py can build the cache without
+importing Flask, Selenium or the forecasting models.
+"""
+
+import os
+import json
+import math
+import time
+from datetime import datetime, timedelta
+import pandas as pd
+import pytz
+import requests
+from sqlalchemy import create_engine
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Load DB credentials from environment variables
+DB_USER = 'weewx'
+DB_PASSWORD = os.getenv('WEEWX_DB_PASSWORD')
+DB_HOST = '10.1.1.126'
+DB_NAME = 'weewx'
+DB_URI = f'mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}'
+MY_LAT = -27.40737
+MY_LNG = 152.91990
+
+# Weekly Statistics configuration
+WEEKLY_STATS_CACHE_PATH = os.path.join(os.path.dirname(__file__), 'weekly_stats_cache.json')
+WEEKLY_STATS_CACHE_TTL = 604800  # 7 days in seconds (1 week)
+
+def generate_weekly_stats_cache():
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Generate and cache weekly statistics data for improved performance.
+    Description:
+    	Calculates weekly statistics for current, previous, and trends data and stores them in a cache file.
+    	This function is designed to be called weekly (e.g., Sunday at 1 AM) to pre-generate the data
+    	and avoid expensive database queries during page loads. The cache includes all three weekly stats
+    	endpoints: current, previous, and trends.
+    Args:
+        None
+    Returns:
+        bool: True if cache was successfully generated, False otherwise.
+    Raises:
+        Exception: When database connection fails, query execution errors occur, or cache writing fails.
+    """
+    try:
+        engine = create_engine(DB_URI)
+        now = time.time()
+        
+        # Calculate the previous week (Sunday to Saturday)
+        current_time = datetime.now()
+        days_since_saturday = (current_time.weekday() - 5) % 7
+        last_saturday = current_time - timedelta(days=days_since_saturday)
+        
+        # Current week (previous week)
+        week_start = last_saturday - timedelta(days=6)
+        week_end = last_saturday
+        
+        # Previous week
+        previous_week_start = last_saturday - timedelta(days=13)
+        previous_week_end = last_saturday - timedelta(days=7)
+        
+        # Week 3 for trends
+        week3_start = last_saturday - timedelta(days=20)
+        week3_end = last_saturday - timedelta(days=14)
+        
+        # Convert to timestamps
+        start_time = int(week_start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+        end_time = int(week_end.replace(hour=23, minute=59, second=59, microsecond=999999).timestamp())
+        
+        previous_start_time = int(previous_week_start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+        previous_end_time = int(previous_week_end.replace(hour=23, minute=59, second=59, microsecond=999999).timestamp())
+        
+        week3_start_time = int(week3_start.replace(hour=0, minute=0, second=0, microsecond=0).timestamp())
+        week3_end_time = int(week3_end.replace(hour=23, minute=59, second=59, microsecond=999999).timestamp())
+        
+        # Generate current week data
+        current_query = f"""
+            SELECT 
+                MIN(outTemp) as min_temp,
+                MAX(outTemp) as max_temp,
+                AVG(outTemp) as avg_temp,
+                MIN(outHumidity) as min_humidity,
+                MAX(outHumidity) as max_humidity,
+                AVG(outHumidity) as avg_humidity,
+                MIN(barometer) as min_pressure,
+                MAX(barometer) as max_pressure,
+                AVG(barometer) as avg_pressure,
+                MAX(windGust) as max_wind_gust,
+                AVG(windSpeed) as avg_wind_speed,
+                SUM(rain) as total_rainfall,
+                MAX(UV) as max_uv,
+                AVG(UV) as avg_uv,
+                MAX(lightning_strike_count) as max_lightning_strikes,
+                SUM(lightning_strike_count) as total_lightning_strikes,
+                MAX(pm10_0) as max_pm10,
+                AVG(pm10_0) as avg_pm10
+            FROM archive
+            WHERE dateTime >= {start_time} AND dateTime <= {end_time}
+        """
+        
+        # Generate previous week data
+        previous_query = f"""
+            SELECT 
+                MIN(outTemp) as min_temp,
+                MAX(outTemp) as max_temp,
+                AVG(outTemp) as avg_temp,
+                MIN(outHumidity) as min_humidity,
+                MAX(outHumidity) as max_humidity,
+                AVG(outHumidity) as avg_humidity,
+                MIN(barometer) as min_pressure,
+                MAX(barometer) as max_pressure,
+                AVG(barometer) as avg_pressure,
+                MAX(windGust) as max_wind_gust,
+                AVG(windSpeed) as avg_wind_speed,
+                SUM(rain) as total_rainfall,
+                MAX(UV) as max_uv,
+                AVG(UV) as avg_uv,
+                MAX(lightning_strike_count) as max_lightning_strikes,
+                SUM(lightning_strike_count) as total_lightning_strikes,
+                MAX(pm10_0) as max_pm10,
+                AVG(pm10_0) as avg_pm10
+            FROM archive
+            WHERE dateTime >= {previous_start_time} AND dateTime <= {previous_end_time}
+        """
+        
+        # Generate week 3 data for trends
+        week3_query = f"""
+            SELECT 
+                MIN(outTemp) as min_temp,
+                MAX(outTemp) as max_temp,
+                AVG(outTemp) as avg_temp,
+                MIN(outHumidity) as min_humidity,
+                MAX(outHumidity) as max_humidity,
+                AVG(outHumidity) as avg_humidity,
+                MIN(barometer) as min_pressure,
+                MAX(barometer) as max_pressure,
+                AVG(barometer) as avg_pressure,
+                MAX(windGust) as max_wind_gust,
+                AVG(windSpeed) as avg_wind_speed,
+                SUM(rain) as total_rainfall,
+                MAX(UV) as max_uv,
+                AVG(UV) as avg_uv,
+                MAX(lightning_strike_count) as max_lightning_strikes,
+                SUM(lightning_strike_count) as total_lightning_strikes,
+                MAX(pm10_0) as max_pm10,
+                AVG(pm10_0) as avg_pm10
+            FROM archive
+            WHERE dateTime >= {week3_start_time} AND dateTime <= {week3_end_time}
+        """
+        
+        current_df = pd.read_sql(current_query, engine)
+        previous_df = pd.read_sql(previous_query, engine)
+        week3_df = pd.read_sql(week3_query, engine)
+        
+        # Process current week data
+        current_data = None
+        if not current_df.empty:
+            current_data = {
+                'week_start': week_start.strftime('%Y-%m-%d'),
+                'week_end': week_end.strftime('%Y-%m-%d'),
+                'min_temp': round((current_df['min_temp'].iloc[0] - 32) * 5/9, 1) if current_df['min_temp'].iloc[0] is not None else None,
+                'max_temp': round((current_df['max_temp'].iloc[0] - 32) * 5/9, 1) if current_df['max_temp'].iloc[0] is not None else None,
+                'avg_temp': round((current_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if current_df['avg_temp'].iloc[0] is not None else None,
+                'min_humidity': int(current_df['min_humidity'].iloc[0]) if current_df['min_humidity'].iloc[0] is not None else None,
+                'max_humidity': int(current_df['max_humidity'].iloc[0]) if current_df['max_humidity'].iloc[0] is not None else None,
+                'avg_humidity': round(current_df['avg_humidity'].iloc[0], 1) if current_df['avg_humidity'].iloc[0] is not None else None,
+                'min_pressure': round(current_df['min_pressure'].iloc[0] * 33.8639, 1) if current_df['min_pressure'].iloc[0] is not None else None,
+                'max_pressure': round(current_df['max_pressure'].iloc[0] * 33.8639, 1) if current_df['max_pressure'].iloc[0] is not None else None,
+                'avg_pressure': round(current_df['avg_pressure'].iloc[0] * 33.8639, 1) if current_df['avg_pressure'].iloc[0] is not None else None,
+                'max_wind_gust': round(current_df['max_wind_gust'].iloc[0] * 1.60934, 1) if current_df['max_wind_gust'].iloc[0] is not None else None,
+                'max_wind_gust_direction': get_wind_gust_direction(engine, start_time, end_time),
+                'avg_wind_speed': round(current_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if current_df['avg_wind_speed'].iloc[0] is not None else None,
+                'total_rainfall': round(current_df['total_rainfall'].iloc[0] * 25.4, 1) if current_df['total_rainfall'].iloc[0] is not None else 0,
+                'max_uv': int(current_df['max_uv'].iloc[0]) if current_df['max_uv'].iloc[0] is not None else None,
+                'avg_uv': calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, current_df['avg_uv'].iloc[0]),
+                'max_lightning_strikes': int(current_df['max_lightning_strikes'].iloc[0]) if current_df['max_lightning_strikes'].iloc[0] is not None else 0,
+                'total_lightning_strikes': int(current_df['total_lightning_strikes'].iloc[0]) if current_df['total_lightning_strikes'].iloc[0] is not None else 0,
+                'max_pm10': int(current_df['max_pm10'].iloc[0]) if current_df['max_pm10'].iloc[0] is not None else None,
+                'avg_pm10': round(current_df['avg_pm10'].iloc[0], 1) if current_df['avg_pm10'].iloc[0] is not None else None
+            }
+        
+        # Process previous week data
+        previous_data = None
+        if not previous_df.empty:
+            previous_data = {
+                'week_start': previous_week_start.strftime('%Y-%m-%d'),
+                'week_end': previous_week_end.strftime('%Y-%m-%d'),
+                'min_temp': round((previous_df['min_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['min_temp'].iloc[0] is not None else None,
+                'max_temp': round((previous_df['max_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['max_temp'].iloc[0] is not None else None,
+                'avg_temp': round((previous_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['avg_temp'].iloc[0] is not None else None,
+                'min_humidity': int(previous_df['min_humidity'].iloc[0]) if previous_df['min_humidity'].iloc[0] is not None else None,
+                'max_humidity': int(previous_df['max_humidity'].iloc[0]) if previous_df['max_humidity'].iloc[0] is not None else None,
+                'avg_humidity': round(previous_df['avg_humidity'].iloc[0], 1) if previous_df['avg_humidity'].iloc[0] is not None else None,
+                'min_pressure': round(previous_df['min_pressure'].iloc[0] * 33.8639, 1) if previous_df['min_pressure'].iloc[0] is not None else None,
+                'max_pressure': round(previous_df['max_pressure'].iloc[0] * 33.8639, 1) if previous_df['max_pressure'].iloc[0] is not None else None,
+                'avg_pressure': round(previous_df['avg_pressure'].iloc[0] * 33.8639, 1) if previous_df['avg_pressure'].iloc[0] is not None else None,
+                'max_wind_gust': round(previous_df['max_wind_gust'].iloc[0] * 1.60934, 1) if previous_df['max_wind_gust'].iloc[0] is not None else None,
+                'max_wind_gust_direction': get_wind_gust_direction(engine, previous_start_time, previous_end_time),
+                'avg_wind_speed': round(previous_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if previous_df['avg_wind_speed'].iloc[0] is not None else None,
+                'total_rainfall': round(previous_df['total_rainfall'].iloc[0] * 25.4, 1) if previous_df['total_rainfall'].iloc[0] is not None else 0,
+                'max_uv': int(previous_df['max_uv'].iloc[0]) if previous_df['max_uv'].iloc[0] is not None else None,
+                'avg_uv': calculate_daylight_uv_average(engine, previous_start_time, previous_end_time, previous_week_start, previous_week_end, previous_df['avg_uv'].iloc[0]),
+                'max_lightning_strikes': int(previous_df['max_lightning_strikes'].iloc[0]) if previous_df['max_lightning_strikes'].iloc[0] is not None else 0,
+                'total_lightning_strikes': int(previous_df['total_lightning_strikes'].iloc[0]) if previous_df['total_lightning_strikes'].iloc[0] is not None else 0,
+                'max_pm10': int(previous_df['max_pm10'].iloc[0]) if previous_df['max_pm10'].iloc[0] is not None else None,
+                'avg_pm10': round(previous_df['avg_pm10'].iloc[0], 1) if previous_df['avg_pm10'].iloc[0] is not None else None
+            }
+        
+        # Process trends data
+        trends_data = None
+        if not current_df.empty and not previous_df.empty and not week3_df.empty:
+            # Calculate daylight UV averages for all three weeks
+            current_avg_uv = calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, current_df['avg_uv'].iloc[0])
+            previous_avg_uv = calculate_daylight_uv_average(engine, previous_start_time, previous_end_time, previous_week_start, previous_week_end, previous_df['avg_uv'].iloc[0])
+            week3_avg_uv = calculate_daylight_uv_average(engine, week3_start_time, week3_end_time, week3_start, week3_end, week3_df['avg_uv'].iloc[0])
+            
+            # Process week 1 data (current week)
+            week1_data = {
+                'min_temp': round((current_df['min_temp'].iloc[0] - 32) * 5/9, 1) if current_df['min_temp'].iloc[0] is not None else None,
+                'max_temp': round((current_df['max_temp'].iloc[0] - 32) * 5/9, 1) if current_df['max_temp'].iloc[0] is not None else None,
+                'avg_temp': round((current_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if current_df['avg_temp'].iloc[0] is not None else None,
+                'min_humidity': int(current_df['min_humidity'].iloc[0]) if current_df['min_humidity'].iloc[0] is not None else None,
+                'max_humidity': int(current_df['max_humidity'].iloc[0]) if current_df['max_humidity'].iloc[0] is not None else None,
+                'avg_humidity': round(current_df['avg_humidity'].iloc[0], 1) if current_df['avg_humidity'].iloc[0] is not None else None,
+                'min_pressure': round(current_df['min_pressure'].iloc[0] * 33.8639, 1) if current_df['min_pressure'].iloc[0] is not None else None,
+                'max_pressure': round(current_df['max_pressure'].iloc[0] * 33.8639, 1) if current_df['max_pressure'].iloc[0] is not None else None,
+                'avg_pressure': round(current_df['avg_pressure'].iloc[0] * 33.8639, 1) if current_df['avg_pressure'].iloc[0] is not None else None,
+                'max_wind_gust': round(current_df['max_wind_gust'].iloc[0] * 1.60934, 1) if current_df['max_wind_gust'].iloc[0] is not None else None,
+                'max_wind_gust_direction': get_wind_gust_direction(engine, start_time, end_time),
+                'avg_wind_speed': round(current_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if current_df['avg_wind_speed'].iloc[0] is not None else None,
+                'total_rainfall': round(current_df['total_rainfall'].iloc[0] * 25.4, 1) if current_df['total_rainfall'].iloc[0] is not None else 0,
+                'max_uv': int(current_df['max_uv'].iloc[0]) if current_df['max_uv'].iloc[0] is not None else None,
+                'avg_uv': current_avg_uv,
+                'max_lightning_strikes': int(current_df['max_lightning_strikes'].iloc[0]) if current_df['max_lightning_strikes'].iloc[0] is not None else 0,
+                'total_lightning_strikes': int(current_df['total_lightning_strikes'].iloc[0]) if current_df['total_lightning_strikes'].iloc[0] is not None else 0,
+                'max_pm10': int(current_df['max_pm10'].iloc[0]) if current_df['max_pm10'].iloc[0] is not None else None,
+                'avg_pm10': round(current_df['avg_pm10'].iloc[0], 1) if current_df['avg_pm10'].iloc[0] is not None else None
+            }
+            
+            # Process week 2 data (previous week)
+            week2_data = {
+                'min_temp': round((previous_df['min_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['min_temp'].iloc[0] is not None else None,
+                'max_temp': round((previous_df['max_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['max_temp'].iloc[0] is not None else None,
+                'avg_temp': round((previous_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if previous_df['avg_temp'].iloc[0] is not None else None,
+                'min_humidity': int(previous_df['min_humidity'].iloc[0]) if previous_df['min_humidity'].iloc[0] is not None else None,
+                'max_humidity': int(previous_df['max_humidity'].iloc[0]) if previous_df['max_humidity'].iloc[0] is not None else None,
+                'avg_humidity': round(previous_df['avg_humidity'].iloc[0], 1) if previous_df['avg_humidity'].iloc[0] is not None else None,
+                'min_pressure': round(previous_df['min_pressure'].iloc[0] * 33.8639, 1) if previous_df['min_pressure'].iloc[0] is not None else None,
+                'max_pressure': round(previous_df['max_pressure'].iloc[0] * 33.8639, 1) if previous_df['max_pressure'].iloc[0] is not None else None,
+                'avg_pressure': round(previous_df['avg_pressure'].iloc[0] * 33.8639, 1) if previous_df['avg_pressure'].iloc[0] is not None else None,
+                'max_wind_gust': round(previous_df['max_wind_gust'].iloc[0] * 1.60934, 1) if previous_df['max_wind_gust'].iloc[0] is not None else None,
+                'max_wind_gust_direction': get_wind_gust_direction(engine, previous_start_time, previous_end_time),
+                'avg_wind_speed': round(previous_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if previous_df['avg_wind_speed'].iloc[0] is not None else None,
+                'total_rainfall': round(previous_df['total_rainfall'].iloc[0] * 25.4, 1) if previous_df['total_rainfall'].iloc[0] is not None else 0,
+                'max_uv': int(previous_df['max_uv'].iloc[0]) if previous_df['max_uv'].iloc[0] is not None else None,
+                'avg_uv': previous_avg_uv,
+                'max_lightning_strikes': int(previous_df['max_lightning_strikes'].iloc[0]) if previous_df['max_lightning_strikes'].iloc[0] is not None else 0,
+                'total_lightning_strikes': int(previous_df['total_lightning_strikes'].iloc[0]) if previous_df['total_lightning_strikes'].iloc[0] is not None else 0,
+                'max_pm10': int(previous_df['max_pm10'].iloc[0]) if previous_df['max_pm10'].iloc[0] is not None else None,
+                'avg_pm10': round(previous_df['avg_pm10'].iloc[0], 1) if previous_df['avg_pm10'].iloc[0] is not None else None
+            }
+            
+            # Process week 3 data
+            week3_data = {
+                'min_temp': round((week3_df['min_temp'].iloc[0] - 32) * 5/9, 1) if week3_df['min_temp'].iloc[0] is not None else None,
+                'max_temp': round((week3_df['max_temp'].iloc[0] - 32) * 5/9, 1) if week3_df['max_temp'].iloc[0] is not None else None,
+                'avg_temp': round((week3_df['avg_temp'].iloc[0] - 32) * 5/9, 1) if week3_df['avg_temp'].iloc[0] is not None else None,
+                'min_humidity': int(week3_df['min_humidity'].iloc[0]) if week3_df['min_humidity'].iloc[0] is not None else None,
+                'max_humidity': int(week3_df['max_humidity'].iloc[0]) if week3_df['max_humidity'].iloc[0] is not None else None,
+                'avg_humidity': round(week3_df['avg_humidity'].iloc[0], 1) if week3_df['avg_humidity'].iloc[0] is not None else None,
+                'min_pressure': round(week3_df['min_pressure'].iloc[0] * 33.8639, 1) if week3_df['min_pressure'].iloc[0] is not None else None,
+                'max_pressure': round(week3_df['max_pressure'].iloc[0] * 33.8639, 1) if week3_df['max_pressure'].iloc[0] is not None else None,
+                'avg_pressure': round(week3_df['avg_pressure'].iloc[0] * 33.8639, 1) if week3_df['avg_pressure'].iloc[0] is not None else None,
+                'max_wind_gust': round(week3_df['max_wind_gust'].iloc[0] * 1.60934, 1) if week3_df['max_wind_gust'].iloc[0] is not None else None,
+                'max_wind_gust_direction': get_wind_gust_direction(engine, week3_start_time, week3_end_time),
+                'avg_wind_speed': round(week3_df['avg_wind_speed'].iloc[0] * 1.60934, 1) if week3_df['avg_wind_speed'].iloc[0] is not None else None,
+                'total_rainfall': round(week3_df['total_rainfall'].iloc[0] * 25.4, 1) if week3_df['total_rainfall'].iloc[0] is not None else 0,
+                'max_uv': int(week3_df['max_uv'].iloc[0]) if week3_df['max_uv'].iloc[0] is not None else None,
+                'avg_uv': week3_avg_uv,
+                'max_lightning_strikes': int(week3_df['max_lightning_strikes'].iloc[0]) if week3_df['max_lightning_strikes'].iloc[0] is not None else 0,
+                'total_lightning_strikes': int(week3_df['total_lightning_strikes'].iloc[0]) if week3_df['total_lightning_strikes'].iloc[0] is not None else 0,
+                'max_pm10': int(week3_df['max_pm10'].iloc[0]) if week3_df['max_pm10'].iloc[0] is not None else None,
+                'avg_pm10': round(week3_df['avg_pm10'].iloc[0], 1) if week3_df['avg_pm10'].iloc[0] is not None else None
+            }
+            
+            # Calculate trends
+            def calculate_trend(current, previous, threshold=0.1):
+                if current is None or previous is None or previous == 0:
+                    return 'stable'
+                change = abs(current - previous) / abs(previous)
+                if change < threshold:
+                    return 'stable'
+                return 'up' if current > previous else 'down'
+            
+            trends_data = {
+                'current_week': week1_data,
+                'previous_week': week2_data,
+                'week3': week3_data,
+                'trends': {
+                    'avg_temp': calculate_trend(week1_data['avg_temp'], week2_data['avg_temp']),
+                    'avg_humidity': calculate_trend(week1_data['avg_humidity'], week2_data['avg_humidity']),
+                    'avg_pressure': calculate_trend(week1_data['avg_pressure'], week2_data['avg_pressure']),
+                    'avg_wind_speed': calculate_trend(week1_data['avg_wind_speed'], week2_data['avg_wind_speed']),
+                    'total_rainfall': calculate_trend(week1_data['total_rainfall'], week2_data['total_rainfall']),
+                    'avg_uv': calculate_trend(week1_data['avg_uv'], week2_data['avg_uv']),
+                    'total_lightning_strikes': calculate_trend(week1_data['total_lightning_strikes'], week2_data['total_lightning_strikes']),
+                    'avg_pm10': calculate_trend(week1_data['avg_pm10'], week2_data['avg_pm10'])
+                }
+            }
+        
+        # Create cache data
+        cache_data = {
+            'timestamp': now,
+            'current': current_data,
+            'previous': previous_data,
+            'trends': trends_data,
+            'last_updated': datetime.now().strftime('%d-%m-%Y %H:%M:%S')
+        }
+        
+        # Write to cache file
+        with open(WEEKLY_STATS_CACHE_PATH, 'w') as f:
+            json.dump(cache_data, f)
+        
+        print(f"Weekly stats cache generated successfully at {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+        return True
+        
+    except Exception as e:
+        print(f"Error generating weekly stats cache: {e}")
+        return False
+
+def get_sunrise_sunset_times(date):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Get sunrise and sunset times for a specific date using the sunrise-sunset.org API.
+    Description:
+    	Fetches sunrise and sunset times for the specified date using the sunrise-sunset.org API.
+    	The times are converted to Brisbane timezone and returned as timezone-aware datetime objects.
+    	If the API call fails or returns invalid data, None values are returned for both times.
+    Args:
+        date (datetime.date): The date for which to fetch sunrise and sunset times.
+    Returns:
+        tuple: A tuple containing (sunrise_time, sunset_time) as timezone-aware datetime objects, or (None, None) if an error occurs.
+    Raises:
+        Exception: When API request fails or data parsing errors occur.
+    """
+    try:
+        url = f"https://api.sunrise-sunset.org/json?lat={MY_LAT}&lng={MY_LNG}&date={date.strftime('%Y-%m-%d')}&tzid=Australia/Brisbane"
+        response = requests.get(url, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+        
+        if data['status'] == 'OK' and data['results']:
+            # Parse sunrise and sunset times
+            sunrise_str = data['results']['sunrise']
+            sunset_str = data['results']['sunset']
+            
+            # Convert to datetime objects in Brisbane timezone
+            brisbane_tz = pytz.timezone('Australia/Brisbane')
+            
+            # Parse the time strings (format: "6:15:23 AM")
+            def parse_time_string(time_str):
+                # Remove timezone info if present and parse
+                time_str = time_str.split(' ')[0] + ' ' + time_str.split(' ')[1]
+                time_obj = datetime.strptime(time_str, '%I:%M:%S %p')
+                # Combine with the date
+                combined = datetime.combine(date, time_obj.time())
+                return brisbane_tz.localize(combined)
+            
+            sunrise_time = parse_time_string(sunrise_str)
+            sunset_time = parse_time_string(sunset_str)
+            
+            return sunrise_time, sunset_time
+        else:
+            return None, None
+    except Exception as e:
+        print(f"Error fetching sunrise/sunset times for {date}: {e}")
+        return None, None
+
+def calculate_daylight_uv_average(engine, start_time, end_time, week_start, week_end, fallback_avg=None):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Calculate average UV index only during daylight hours for a given week period.
+    Description:
+    	Retrieves UV data from the database for the specified time period and filters it to only include
+    	measurements taken during daylight hours (between sunrise and sunset). This provides a more accurate
+    	representation of UV exposure during active hours. If no daylight data is available, falls back to
+    	the provided fallback average or returns None.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the time period.
+        end_time (int): Unix timestamp for the end of the time period.
+        week_start (datetime): Start date of the week for sunrise/sunset calculations.
+        week_end (datetime): End date of the week for sunrise/sunset calculations.
+        fallback_avg (float, optional): Fallback average UV value if daylight calculation fails. Defaults to None.
+    Returns:
+        int: Average UV index during daylight hours, rounded to nearest whole number, or None if no data available.
+    Raises:
+        Exception: When database query fails or UV calculation errors occur.
+    """
+    try:
+        # Get all UV data for the week with timestamps
+        uv_query = f"""
+            SELECT dateTime, UV
+            FROM archive
+            WHERE dateTime >= {start_time} AND dateTime <= {end_time} AND UV IS NOT NULL
+            ORDER BY dateTime ASC
+        """
+        uv_df = pd.read_sql(uv_query, engine)
+        
+        if not uv_df.empty:
+            # Convert timestamps to datetime
+            uv_df['dateTime'] = pd.to_datetime(uv_df['dateTime'], unit='s', utc=True).dt.tz_convert('Australia/Brisbane')
+            
+            # Filter UV data to only include daylight hours
+            daylight_uv_values = []
+            
+            # Group by date to get sunrise/sunset for each day
+            # Convert week_start and week_end to datetime.date objects for the loop
+            week_start_date = week_start.date() if hasattr(week_start, 'date') else week_start
+            week_end_date = week_end.date() if hasattr(week_end, 'date') else week_end
+            
+            for date in pd.date_range(start=week_start_date, end=week_end_date, freq='D'):
+                sunrise_time, sunset_time = get_sunrise_sunset_times(date.date())
+                
+                if sunrise_time and sunset_time:
+                    # Create timezone-aware datetime objects for day boundaries
+                    brisbane_tz = pytz.timezone('Australia/Brisbane')
+                    day_start = brisbane_tz.localize(datetime.combine(date.date(), datetime.min.time()))
+                    day_end = brisbane_tz.localize(datetime.combine(date.date(), datetime.max.time().replace(microsecond=999999)))
+                    
+                    # Convert sunrise and sunset times to pandas Timestamp for comparison
+                    sunrise_ts = pd.Timestamp(sunrise_time)
+                    sunset_ts = pd.Timestamp(sunset_time)
+                    
+                    day_uv_data = uv_df[
+                        (uv_df['dateTime'] >= day_start) & 
+                        (uv_df['dateTime'] <= day_end) &
+                        (uv_df['dateTime'] >= sunrise_ts) & 
+                        (uv_df['dateTime'] <= sunset_ts)
+                    ]
+                    
+                    if not day_uv_data.empty:
+                        daylight_uv_values.extend(day_uv_data['UV'].tolist())
+            
+            # Calculate average of daylight UV values and round to whole number
+            if daylight_uv_values:
+                return round(sum(daylight_uv_values) / len(daylight_uv_values))
+            else:
+                # Fallback to the original average if no daylight data
+                return round(fallback_avg) if fallback_avg is not None else None
+        else:
+            # Fallback to the original average if no UV data
+            return round(fallback_avg) if fallback_avg is not None else None
+    except Exception as e:
+        print(f"Error calculating daylight UV average: {e}")
+        # Fallback to the original average if calculation fails
+        return round(fallback_avg) if fallback_avg is not None else None
+
+def calculate_average_wind_direction(engine, start_time, end_time):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Calculate the average wind direction for a given time period using vector mathematics.
+    Description:
+    	Retrieves wind direction data from the database and calculates the average direction using vector math.
+    	Wind directions are converted from degrees to x,y components, averaged, then converted back to degrees
+    	and finally to compass direction (N, NNE, NE, etc.). This method properly handles the circular nature
+    	of wind direction data.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the time period.
+        end_time (int): Unix timestamp for the end of the time period.
+    Returns:
+        str: Average wind direction as a compass direction (N, NNE, NE, ENE, E, ESE, SE, SSE, S, SSW, SW, WSW, W, WNW, NW, NNW), or None if no data available.
+    Raises:
+        Exception: When database query fails or wind direction calculation errors occur.
+    """
+    try:
+        # Get all wind direction data for the period
+        wind_query = f"""
+            SELECT windDir
+            FROM archive
+            WHERE dateTime >= {start_time} AND dateTime <= {end_time} AND windDir IS NOT NULL
+        """
+        wind_df = pd.read_sql(wind_query, engine)
+        
+        if not wind_df.empty:
+            # Convert degrees to radians and calculate x,y components
+            wind_df['radians'] = wind_df['windDir'] * (3.14159 / 180)
+            wind_df['x_component'] = wind_df['radians'].apply(lambda x: -1 * math.sin(x))  # Negative because wind direction is "from"
+            wind_df['y_component'] = wind_df['radians'].apply(lambda x: -1 * math.cos(x))  # Negative because wind direction is "from"
+            
+            # Calculate average components
+            avg_x = wind_df['x_component'].mean()
+            avg_y = wind_df['y_component'].mean()
+            
+            # Convert back to degrees
+            avg_degrees = math.atan2(avg_x, avg_y) * (180 / 3.14159)
+            
+            # Normalize to 0-360 range
+            if avg_degrees < 0:
+                avg_degrees += 360
+            
+            # Convert to compass direction
+            directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
+            index = round(avg_degrees / 22.5) % 16
+            return directions[index]
+        else:
+            return None
+    except Exception as e:
+        print(f"Error calculating average wind direction: {e}")
+        return None
+
+def get_wind_gust_direction(engine, start_time, end_time):
+    """
+    Author:
+	    David Rogers
+    Email:		
+	    dave@djrogers.net.au
+    Summary:
+	    Get the wind direction for the maximum wind gust in a given time period.
+    Description:
+    	Queries the database to find the record with the highest wind gust value within the specified
+    	time period and returns the corresponding wind direction. The wind direction is converted from
+    	degrees to compass direction (N, NNE, NE, etc.) for easier interpretation.
+    Args:
+        engine (sqlalchemy.engine.Engine): Database engine for querying weather data.
+        start_time (int): Unix timestamp for the start of the time period.
+        end_time (int): Unix timestamp for the end of the time period.
+    Returns:
+        str: Wind direction as a compass direction (N, NNE, NE, ENE, E, ESE, SE, SSE, S, SSW, SW, WSW, W, WNW, NW, NNW), or None if no data available.
+    Raises:
+        Exception: When database query fails or wind direction calculation errors occur.
+    """
+    try:
+        # Get the wind direction for the maximum wind gust
+        gust_query = f"""
+            SELECT windDir
+            FROM archive
+            WHERE dateTime >= {start_time} AND dateTime <= {end_time} AND windGust IS NOT NULL
+            ORDER BY windGust DESC
+            LIMIT 1
+        """
+        gust_df = pd.read_sql(gust_query, engine)
+        
+        if not gust_df.empty and gust_df['windDir'].iloc[0] is not None:
+            wind_dir_degrees = gust_df['windDir'].iloc[0]
+            directions = ['N', 'NNE', 'NE', 'ENE', 'E', 'ESE', 'SE', 'SSE', 'S', 'SSW', 'SW', 'WSW', 'W', 'WNW', 'NW', 'NNW']
+            index = round(wind_dir_degrees / 22.5) % 16
+            return directions[index]
+        else:
+            return None
+    except Exception as e:
+        print(f"Error getting wind gust direction: {e}")
+        return None